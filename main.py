@@ -1,20 +1,105 @@
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
 import uvicorn
 import sys
 import os
 sys.path.insert(0, 'src')
 
 from clients.ai_clients.client_factory import AIClientFactory
+from clients.embeddings.embedding_engine import get_embedding_engine
+from clients.embeddings.embedding_batcher import EmbeddingBatcher
 from clients.faiss.faiss_client import FAISSClient
-from clients.mcp.mcp_client import MCPClient
-from clients.mongodb.mongodb_client import MongoDBClient
-from config.settings import MONGODB_URI, DATABASE_NAME, ROLE_MAPPING
-from sentence_transformers import SentenceTransformer
+from clients.faiss.async_faiss_client import AsyncFAISSClient
+from clients.mcp.mcp_client import get_mcp_client
+from clients.mongodb.async_mongodb_client import AsyncMongoDBClient
+from clients.mongodb.interaction_logger import InteractionLogger
+from config.settings import ROLE_MAPPING, FAISS_SERVICE_URL, RAG_SEARCH_MODE
+from services.rag.response_cache import ResponseCache
+from services.rag.chunk_store import ChunkStore
+from services.rag.context_builder import ContextBuilder
 from datetime import datetime, timezone
 import asyncio
+import json
+import time
 
-app = FastAPI(title="MOBO Chat Interface")
+embedding_engine = get_embedding_engine()
+embedding_batcher = EmbeddingBatcher(embedding_engine)
+faiss_client = AsyncFAISSClient(FAISS_SERVICE_URL)
+mongo_client = AsyncMongoDBClient()
+interaction_logger = InteractionLogger(mongo_client)
+response_cache = ResponseCache()
+chunk_store = ChunkStore(mongo_client)
+context_builder = ContextBuilder(count_tokens=embedding_engine.count_tokens)
+
+
+def _log_warmup_result(future):
+    if future.exception() is not None:
+        print(f"Embedding model warm-up failed: {future.exception()}")
+    else:
+        print(f"Embedding model ready in {embedding_engine.load_seconds:.2f}s")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Se carga el modelo de embeddings en segundo plano, /ready indica cuando ya está listo
+    loop = asyncio.get_running_loop()
+    warmup = loop.run_in_executor(None, embedding_engine.load)
+    warmup.add_done_callback(_log_warmup_result)
+    await embedding_batcher.start()
+    # Un solo pool de conexiones keep-alive hacia FAISS para toda la app
+    await faiss_client.start()
+    await mongo_client.connect()
+    await chunk_store.ensure_index()
+    await interaction_logger.start()
+    yield
+    await interaction_logger.stop()
+    await get_mcp_client().close()
+    await mongo_client.close()
+    await faiss_client.aclose()
+    await embedding_batcher.stop()
+
+
+app = FastAPI(title="MOBO Chat Interface", lifespan=lifespan)
+
+@app.get("/ready")
+async def readiness():
+    """Readiness probe: only OK once the embedding model is hot."""
+    status = embedding_engine.status()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+@app.get("/embedding_stats")
+async def embedding_stats():
+    """Batch-size and queue-wait histograms of the query embedding batcher, plus cache hit rates."""
+    cache = embedding_engine.cache
+    return {**embedding_batcher.stats(), "cache": cache.stats() if cache is not None else None}
+
+@app.get("/interaction_stats")
+async def interaction_stats():
+    """Queue depth, counters and flush latency of the interaction logger."""
+    return interaction_logger.stats()
+
+@app.get("/response_cache_stats")
+async def response_cache_stats():
+    """Exact and semantic hit counters of the chat response cache."""
+    return response_cache.stats()
+
+@app.get("/chunk_store_stats")
+async def chunk_store_stats():
+    """Hit rate of the chunk text LRU and number of Mongo lookups."""
+    return chunk_store.stats()
+
+@app.get("/mcp_stats")
+async def mcp_stats():
+    """State of the shared MCP session: connects, calls and retries."""
+    return get_mcp_client().stats()
+
+@app.get("/context_stats")
+async def context_stats():
+    """Tokens sent vs. saved by the RAG context builder."""
+    return context_builder.stats()
 
 @app.get("/", response_class=HTMLResponse)
 async def chat_interface():
@@ -74,10 +159,29 @@ async def chat_interface():
                 const response = await fetch('/chat', {
                     method: 'POST',
                     headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify({ message, rag_role: ragRole, use_mcp: useMcp })
+                    body: JSON.stringify({ message, rag_role: ragRole, use_mcp: useMcp, stream: true })
                 });
-                const data = await response.json();
-                addMessage('bot', data.response);
+
+                // Los tokens llegan como Server-Sent Events y se agregan al mensaje conforme llegan
+                const botDiv = addMessage('bot', '');
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, { stream: true });
+                    const events = buffer.split('\\n\\n');
+                    buffer = events.pop();
+                    for (const event of events) {
+                        const dataLine = event.split('\\n').find(line => line.startsWith('data: '));
+                        if (!dataLine) continue;
+                        const data = JSON.parse(dataLine.slice(6));
+                        if (data.token) botDiv.textContent += data.token;
+                        if (data.error) botDiv.textContent += 'Error: ' + data.error;
+                        document.getElementById('chat').scrollTop = document.getElementById('chat').scrollHeight;
+                    }
+                }
             }
             
             function addMessage(sender, text) {
@@ -87,6 +191,7 @@ async def chat_interface():
                 div.textContent = (sender === 'user' ? 'You: ' : 'Bot: ') + text;
                 chat.appendChild(div);
                 chat.scrollTop = chat.scrollHeight;
+                return div;
             }
             
             function openMongoExpress() {
@@ -124,91 +229,195 @@ async def chat_interface():
     return html
 
 
-@app.post("/chat")
-async def chat(request: Request):
-    data = await request.json()
-    message = data.get('message', '')
-    rag_role = data.get('rag_role', '')
-    use_mcp = data.get('use_mcp', False)
-    
-    # Creación del cliente de IA con OpenRouter
-    client = AIClientFactory.create_client("openrouter") 
-    
+async def build_prompt(message: str, rag_role: str, query_vector=None):
+    """
+    Add the RAG context of the selected role to the user message.
+
+    Returns:
+        The prompt, the token accounting of its context (empty without RAG) and
+        the RAG error, if the context could not be added.
+    """
     prompt = message
+    context_stats = {}
+    rag_error = None
     
     # Funcionalidad de RAG con los clientes
     if rag_role:
         try:
-            print(f"DEBUG: Initializing FAISS client with base_url='http://faiss:8001'")
-            model = SentenceTransformer('all-MiniLM-L6-v2')
-            query_vector = model.encode(message).tolist()
-            faiss_client = FAISSClient(base_url="http://faiss:8001")
-            print(f"DEBUG: FAISS client created, attempting search with role_id={ROLE_MAPPING.get(rag_role, 4)}")
+            if query_vector is None:
+                query_vector = await embedding_batcher.embed(message)
+            print(f"DEBUG: Searching FAISS at '{faiss_client.base_url}' with role_id={ROLE_MAPPING.get(rag_role, 4)}")
             role_id = ROLE_MAPPING.get(rag_role, 4)  # Default to ALL if not found
-            results = faiss_client.search_similar(query_vector, k=5, role_id=role_id)
+            results = await faiss_client.search_similar(query_vector, k=5, role_id=role_id, text=message,
+                                                        mode=RAG_SEARCH_MODE)
             print(f"DEBUG: FAISS search successful, found {len(results)} results")
-            context = "\\n".join([f"Doc {i+1}: {res['id']} (score: {res['score']:.3f})" for i, res in enumerate(results)])
-            prompt = f"Context from {rag_role} docs:\\n{context}\\n\\nUser: {message}"
+            # Una sola consulta a Mongo para todos los ids que no están en la caché
+            chunks = await chunk_store.get_chunks([res['id'] for res in results])
+            context, context_stats = context_builder.build(results, chunks)
+            print(f"DEBUG: RAG context {context_stats['context_tokens']} tokens, "
+                  f"saved {context_stats['context_tokens_saved']} of {context_stats['context_tokens_raw']}")
+            prompt = f"Context from {rag_role} docs:\n{context}\n\nUser: {message}"
         except Exception as e:
             print(f"DEBUG: RAG error occurred: {str(e)}")
+            rag_error = str(e)
             prompt += f"\\n(RAG error: {str(e)})"
-    
-    # Funcionalidad de MCP con clientes
-    tools = None
-    if use_mcp:
-        #Definición de las tools (Se puede hacer más automatico con un metodo OPTIONS)
-        tools = [
-            {
-                "type": "function",
-                "function": {
-                    "name": "get_usd_price",
-                    "description": "Get the current USD exchange rates from open.er-api.com",
-                    "parameters": {
-                        "type": "object",
-                        "properties": {},
-                        "required": []
-                    }
+    return prompt, context_stats, rag_error
+
+def chat_tools(use_mcp: bool):
+    """Tools offered to the model when MCP is enabled."""
+    if not use_mcp:
+        return None
+    #Definición de las tools (Se puede hacer más automatico con un metodo OPTIONS)
+    return [
+        {
+            "type": "function",
+            "function": {
+                "name": "get_usd_price",
+                "description": "Get the current USD exchange rates from open.er-api.com",
+                "parameters": {
+                    "type": "object",
+                    "properties": {},
+                    "required": []
                 }
             }
-        ]
+        }
+    ]
 
-    try:
-        response = client.generate_text(prompt, tools=tools)
-    except Exception as e:
-        response = f"Error: {str(e)}"
-
-    # Guardado de la interacción
-    mongo_client = MongoDBClient(uri=MONGODB_URI, database_name=DATABASE_NAME)
+def log_interaction(message: str, rag_role: str, use_mcp: bool, prompt: str, response: str, **timings):
+    # Guardado de la interacción por lotes en segundo plano, la respuesta no espera a Mongo
     interaction = {
         "timestamp": datetime.now(timezone.utc),
         "user_message": message,
         "rag_role": rag_role,
         "use_mcp": use_mcp,
         "prompt": prompt,
-        "response": response
+        "response": response,
+        **timings
     }
-    mongo_client.insert_document("interactions", interaction)
+    interaction_logger.log(interaction)
+
+def sse_event(data: dict, event: str = None) -> str:
+    """Format one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+async def stream_cached(response: str, cache_kind: str):
+    """Send a cached answer with the same events as a live stream."""
+    yield sse_event({"token": response})
+    yield sse_event({"ttft_ms": 0.0, "total_ms": 0.0, "cached": cache_kind}, event="done")
+
+async def stream_chat(client, prompt: str, tools, message: str, rag_role: str, use_mcp: bool, query_vector=None,
+                      context_stats: dict = None, cacheable: bool = True):
+    """Forward the model tokens as Server-Sent Events, measuring time to first token."""
+    started = time.perf_counter()
+    ttft_ms = None
+    parts = []
+    try:
+        async for token in client.astream_text(prompt, tools=tools):
+            if ttft_ms is None:
+                ttft_ms = (time.perf_counter() - started) * 1000
+            parts.append(token)
+            yield sse_event({"token": token})
+        total_ms = (time.perf_counter() - started) * 1000
+        if cacheable:
+            response_cache.put(rag_role, use_mcp, message, "".join(parts), query_vector)
+        yield sse_event({"ttft_ms": ttft_ms, "total_ms": total_ms}, event="done")
+    except Exception as e:
+        parts.append(f"Error: {str(e)}")
+        yield sse_event({"error": str(e)}, event="error")
+    finally:
+        total_ms = (time.perf_counter() - started) * 1000
+        ttft_text = f"{ttft_ms:.0f}ms" if ttft_ms is not None else "n/a"
+        print(f"Chat stream: time to first token {ttft_text}, total {total_ms:.0f}ms")
+        log_interaction(message, rag_role, use_mcp, prompt, "".join(parts), ttft_ms=ttft_ms, total_ms=total_ms,
+                        **(context_stats or {}))
+
+@app.post("/chat")
+async def chat(request: Request):
+    data = await request.json()
+    message = data.get('message', '')
+    rag_role = data.get('rag_role', '')
+    use_mcp = data.get('use_mcp', False)
+    stream = data.get('stream', False)
+    # use_cache=false salta la caché de respuestas (p. ej. pruebas de carga contra el proveedor)
+    use_cache = data.get('use_cache', True)
+    
+    # Cliente de IA con OpenRouter, una sola instancia (y pool HTTP) por proceso
+    client = AIClientFactory.get_client("openrouter")
+
+    # Con RAG el embedding de la pregunta se calcula una vez y sirve para la caché y para FAISS
+    query_vector = None
+    if rag_role:
+        try:
+            query_vector = await embedding_batcher.embed(message)
+        except Exception as e:
+            print(f"DEBUG: Query embedding failed: {str(e)}")
+
+    cached = response_cache.get(rag_role, use_mcp, message, query_vector) if use_cache else None
+    if cached is not None:
+        response, cache_kind = cached
+        log_interaction(message, rag_role, use_mcp, None, response, cached=cache_kind)
+        if stream:
+            return StreamingResponse(stream_cached(response, cache_kind), media_type="text/event-stream")
+        return {"response": response, "cached": cache_kind}
+    
+    prompt, context_stats, rag_error = await build_prompt(message, rag_role, query_vector)
+    # Una respuesta sin contexto por una caída de Mongo/FAISS no se guarda: se serviría durante todo el TTL
+    cacheable = use_cache and rag_error is None
+    if rag_error is not None:
+        context_stats = {**context_stats, "rag_error": rag_error}
+    
+    # Funcionalidad de MCP con clientes
+    tools = chat_tools(use_mcp)
+
+    if stream:
+        return StreamingResponse(
+            stream_chat(client, prompt, tools, message, rag_role, use_mcp, query_vector, context_stats, cacheable),
+            media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    started = time.perf_counter()
+    try:
+        response = await client.agenerate_text(prompt, tools=tools)
+        if cacheable:
+            response_cache.put(rag_role, use_mcp, message, response, query_vector)
+    except Exception as e:
+        response = f"Error: {str(e)}"
+    total_ms = (time.perf_counter() - started) * 1000
+    print(f"Chat completion: total {total_ms:.0f}ms")
+
+    log_interaction(message, rag_role, use_mcp, prompt, response, total_ms=total_ms, **context_stats)
 
     return {"response": response}
 
+async def count_documents() -> int:
+    return await mongo_client.get_collection("documents").estimated_document_count()
+
 @app.get("/faiss_summary")
 async def get_faiss_summary():
-    try:
-        faiss_client = FAISSClient(base_url="http://faiss:8001")
-        loop = asyncio.get_event_loop()
-        status = await loop.run_in_executor(None, faiss_client.get_status)
-        vectors = await loop.run_in_executor(None, faiss_client.get_all_vectors)
-        count = len(vectors)
-        return {"status": status, "count": count}
-    except Exception as e:
-        return {"error": str(e)}
+    # Cada consulta falla por separado: si Mongo no responde, el estado de FAISS se sigue mostrando
+    status, documents = await asyncio.gather(faiss_client.get_status(), count_documents(), return_exceptions=True)
+    if isinstance(status, Exception):
+        return {"error": str(status)}
+    summary = {"status": status, "count": status.get("total_vectors", 0), "embedding": embedding_engine.status()}
+    if isinstance(documents, Exception):
+        summary["documents"] = None
+        summary["documents_error"] = str(documents)
+    else:
+        summary["documents"] = documents
+    return summary
 
 @app.post("/load_documents")
 async def load_documents_endpoint():
     try:
-        faiss_client = FAISSClient(base_url="http://faiss:8001")
-        loop = asyncio.get_event_loop()
-        result = await loop.run_in_executor(None, faiss_client.load_documents)
+        # La carga usa el cliente síncrono en un hilo, el pipeline ya trabaja con sus propios hilos
+        loader = FAISSClient(base_url=FAISS_SERVICE_URL)
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(None, loader.load_documents)
+        # Las respuestas guardadas se basaban en los documentos anteriores
+        response_cache.clear()
+        chunk_store.clear()
         return result
     except Exception as e:
         return {"error": str(e)}
@@ -216,9 +425,9 @@ async def load_documents_endpoint():
 @app.post("/clear_faiss")
 async def clear_faiss_endpoint():
     try:
-        faiss_client = FAISSClient(base_url="http://faiss:8001")
-        loop = asyncio.get_event_loop()
-        await loop.run_in_executor(None, faiss_client.clear_index)
+        await faiss_client.clear_index()
+        response_cache.clear()
+        chunk_store.clear()
         return {"message": "Index cleared"}
     except Exception as e:
         return {"error": str(e)}
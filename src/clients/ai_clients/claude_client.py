@@ -3,7 +3,10 @@ Claude AI Client for connecting to Anthropic API.
 """
 
 import anthropic
-from src.config.settings import ANTHROPIC_API_KEY
+import httpx
+from typing import AsyncIterator, Iterator
+from config.settings import (ANTHROPIC_API_KEY, AI_CLIENT_MAX_CONNECTIONS, AI_CLIENT_MAX_KEEPALIVE,
+                             AI_CLIENT_TIMEOUT_SECONDS)
 from .ia_client_interface import AIClient
 
 
@@ -20,6 +23,15 @@ class ClaudeClient(AIClient):
             model (str): The model to use for completions.
         """
         self.client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        # Cliente async con su propio pool keep-alive, compartido por todas las peticiones
+        self.async_client = anthropic.AsyncAnthropic(
+            api_key=ANTHROPIC_API_KEY,
+            timeout=AI_CLIENT_TIMEOUT_SECONDS,
+            http_client=anthropic.DefaultAsyncHttpxClient(limits=httpx.Limits(
+                max_connections=AI_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=AI_CLIENT_MAX_KEEPALIVE
+            ))
+        )
         self.model = model
 
     def generate_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> str:
@@ -45,6 +57,30 @@ class ClaudeClient(AIClient):
         except Exception as e:
             raise Exception(f"Error generating text with Claude: {str(e)}")
 
+    def stream_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> Iterator[str]:
+        """
+        Stream text from the configured Claude model.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+
+        Returns:
+            Iterator[str]: The generated text fragments, in order.
+        """
+        try:
+            with self.client.messages.stream(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": prompt}]
+            ) as stream:
+                for text in stream.text_stream:
+                    yield text
+        except Exception as e:
+            raise Exception(f"Error streaming text with Claude: {str(e)}")
+
     def chat_completion(self, messages: list, **kwargs) -> dict:
         """
         Perform a chat completion using the configured Claude model.
@@ -57,28 +93,103 @@ class ClaudeClient(AIClient):
             dict: The completion response.
         """
         try:
-            # Convert messages to Anthropic format if needed
-            anthropic_messages = []
-            for msg in messages:
-                if msg["role"] == "system":
-                    # Anthropic handles system messages differently
-                    anthropic_messages.append({"role": "user", "content": f"System: {msg['content']}"})
-                else:
-                    anthropic_messages.append(msg)
-
             response = self.client.messages.create(
                 model=self.model,
-                messages=anthropic_messages,
+                messages=self._to_anthropic_messages(messages),
                 **kwargs
             )
-            # Convert back to dict format similar to OpenAI
-            return {
-                "choices": [{"message": {"content": response.content[0].text}}],
-                "usage": {"input_tokens": response.usage.input_tokens, "output_tokens": response.usage.output_tokens}
-            }
+            return self._to_completion_dict(response)
         except Exception as e:
             raise Exception(f"Error in chat completion with Claude: {str(e)}")
 
+    async def agenerate_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> str:
+        """
+        Generate text using the configured Claude model without blocking the event loop.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+
+        Returns:
+            str: The generated text response.
+        """
+        try:
+            response = await self.async_client.messages.create(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": prompt}]
+            )
+            return response.content[0].text
+        except Exception as e:
+            raise Exception(f"Error generating text with Claude: {str(e)}")
+
+    async def astream_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> AsyncIterator[str]:
+        """
+        Stream text from the configured Claude model without blocking the event loop.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+
+        Returns:
+            AsyncIterator[str]: The generated text fragments, in order.
+        """
+        try:
+            async with self.async_client.messages.stream(
+                model=self.model,
+                max_tokens=max_tokens,
+                temperature=temperature,
+                messages=[{"role": "user", "content": prompt}]
+            ) as stream:
+                async for text in stream.text_stream:
+                    yield text
+        except Exception as e:
+            raise Exception(f"Error streaming text with Claude: {str(e)}")
+
+    async def achat_completion(self, messages: list, **kwargs) -> dict:
+        """
+        Perform a chat completion using the configured Claude model without blocking the event loop.
+
+        Args:
+            messages (list): List of message dictionaries with 'role' and 'content'.
+            **kwargs: Additional parameters for the completion.
+
+        Returns:
+            dict: The completion response.
+        """
+        try:
+            response = await self.async_client.messages.create(
+                model=self.model,
+                messages=self._to_anthropic_messages(messages),
+                **kwargs
+            )
+            return self._to_completion_dict(response)
+        except Exception as e:
+            raise Exception(f"Error in chat completion with Claude: {str(e)}")
+
+    @staticmethod
+    def _to_anthropic_messages(messages: list) -> list:
+        # Convert messages to Anthropic format if needed
+        anthropic_messages = []
+        for msg in messages:
+            if msg["role"] == "system":
+                # Anthropic handles system messages differently
+                anthropic_messages.append({"role": "user", "content": f"System: {msg['content']}"})
+            else:
+                anthropic_messages.append(msg)
+        return anthropic_messages
+
+    @staticmethod
+    def _to_completion_dict(response) -> dict:
+        # Convert back to dict format similar to OpenAI
+        return {
+            "choices": [{"message": {"content": response.content[0].text}}],
+            "usage": {"input_tokens": response.usage.input_tokens, "output_tokens": response.usage.output_tokens}
+        }
+
 
 # Example usage
 if __name__ == "__main__":
@@ -3,7 +3,8 @@ Factory for creating AI clients based on configuration.
 This demonstrates dependency injection by allowing selection of the AI provider at runtime.
 """
 
-from typing import Optional
+import threading
+from typing import Dict, Optional, Tuple
 from .ia_client_interface import AIClient
 from .openai_client import OpenAIClient
 from .claude_client import ClaudeClient
@@ -16,6 +17,9 @@ class AIClientFactory:
     Allows injecting different AI clients based on the provider type.
     """
 
+    _instances: Dict[Tuple[str, Optional[str]], AIClient] = {}
+    _lock = threading.Lock()
+
     @staticmethod
     def create_client(provider: str, **kwargs) -> AIClient:
         """
@@ -44,6 +48,27 @@ class AIClientFactory:
         else:
             raise ValueError(f"Unsupported AI provider: {provider}. Supported: openai, claude, openrouter")
 
+    @staticmethod
+    def get_client(provider: str, **kwargs) -> AIClient:
+        """
+        Get the shared client for a provider (and model), creating it on first use.
+
+        Reusing one instance per process keeps a single HTTP connection pool per
+        provider instead of opening a new one for every request.
+
+        Args:
+            provider (str): The AI provider ('openai', 'claude', 'openrouter').
+            **kwargs: Additional arguments for client initialization.
+
+        Returns:
+            AIClient: The shared instance of the requested AI client.
+        """
+        key = (provider.lower(), kwargs.get("model"))
+        with AIClientFactory._lock:
+            if key not in AIClientFactory._instances:
+                AIClientFactory._instances[key] = AIClientFactory.create_client(provider, **kwargs)
+            return AIClientFactory._instances[key]
+
 
 if __name__ == "__main__":
    pass
\ No newline at end of file
@@ -3,7 +3,7 @@ Abstract interface for AI clients to enable dependency injection and abstraction
 """
 
 from abc import ABC, abstractmethod
-from typing import Dict, List, Any
+from typing import AsyncIterator, Dict, Iterator, List, Any
 
 
 class AIClient(ABC):
@@ -28,6 +28,21 @@ class AIClient(ABC):
         """
         pass
 
+    @abstractmethod
+    def stream_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> Iterator[str]:
+        """
+        Generate text using the AI model, yielding it piece by piece as the provider streams it.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+
+        Returns:
+            Iterator[str]: The generated text fragments, in order.
+        """
+        pass
+
     @abstractmethod
     def chat_completion(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
         """
@@ -40,4 +55,48 @@ class AIClient(ABC):
         Returns:
             Dict[str, Any]: The completion response.
         """
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def agenerate_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> str:
+        """
+        Generate text without blocking the event loop.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+
+        Returns:
+            str: The generated text response.
+        """
+        pass
+
+    @abstractmethod
+    def astream_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> AsyncIterator[str]:
+        """
+        Async counterpart of stream_text.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+
+        Returns:
+            AsyncIterator[str]: The generated text fragments, in order.
+        """
+        pass
+
+    @abstractmethod
+    async def achat_completion(self, messages: List[Dict[str, str]], **kwargs) -> Dict[str, Any]:
+        """
+        Perform a chat completion without blocking the event loop.
+
+        Args:
+            messages (List[Dict[str, str]]): List of message dictionaries with 'role' and 'content'.
+            **kwargs: Additional parameters for the completion.
+
+        Returns:
+            Dict[str, Any]: The completion response.
+        """
+        pass
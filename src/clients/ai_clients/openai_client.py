@@ -2,8 +2,11 @@
 OpenAI AI Client for connecting to OpenAI API.
 """
 
+import httpx
 import openai
-from src.config.settings import OPENAI_API_KEY
+from typing import AsyncIterator, Iterator
+from config.settings import (OPENAI_API_KEY, AI_CLIENT_MAX_CONNECTIONS, AI_CLIENT_MAX_KEEPALIVE,
+                             AI_CLIENT_TIMEOUT_SECONDS)
 from .ia_client_interface import AIClient
 
 
@@ -20,6 +23,15 @@ class OpenAIClient(AIClient):
             model (str): The model to use for completions.
         """
         self.client = openai.OpenAI(api_key=OPENAI_API_KEY)
+        # Cliente async con su propio pool keep-alive, compartido por todas las peticiones
+        self.async_client = openai.AsyncOpenAI(
+            api_key=OPENAI_API_KEY,
+            timeout=AI_CLIENT_TIMEOUT_SECONDS,
+            http_client=openai.DefaultAsyncHttpxClient(limits=httpx.Limits(
+                max_connections=AI_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=AI_CLIENT_MAX_KEEPALIVE
+            ))
+        )
         self.model = model
 
     def generate_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> str:
@@ -45,6 +57,81 @@ class OpenAIClient(AIClient):
         except Exception as e:
             raise Exception(f"Error generating text with OpenAI: {str(e)}")
 
+    def stream_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> Iterator[str]:
+        """
+        Stream text from the configured OpenAI model.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+
+        Returns:
+            Iterator[str]: The generated text fragments, in order.
+        """
+        try:
+            stream = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"Error streaming text with OpenAI: {str(e)}")
+
+    async def agenerate_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> str:
+        """
+        Generate text using the configured OpenAI model without blocking the event loop.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+
+        Returns:
+            str: The generated text response.
+        """
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return response.choices[0].message.content
+        except Exception as e:
+            raise Exception(f"Error generating text with OpenAI: {str(e)}")
+
+    async def astream_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> AsyncIterator[str]:
+        """
+        Stream text from the configured OpenAI model without blocking the event loop.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+
+        Returns:
+            AsyncIterator[str]: The generated text fragments, in order.
+        """
+        try:
+            stream = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                max_tokens=max_tokens,
+                temperature=temperature,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"Error streaming text with OpenAI: {str(e)}")
+
     def chat_completion(self, messages: list, **kwargs) -> dict:
         """
         Perform a chat completion using the configured OpenAI model.
@@ -66,6 +153,27 @@ class OpenAIClient(AIClient):
         except Exception as e:
             raise Exception(f"Error in chat completion with OpenAI: {str(e)}")
 
+    async def achat_completion(self, messages: list, **kwargs) -> dict:
+        """
+        Perform a chat completion using the configured OpenAI model without blocking the event loop.
+
+        Args:
+            messages (list): List of message dictionaries with 'role' and 'content'.
+            **kwargs: Additional parameters for the completion.
+
+        Returns:
+            dict: The completion response.
+        """
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                **kwargs
+            )
+            return response
+        except Exception as e:
+            raise Exception(f"Error in chat completion with OpenAI: {str(e)}")
+
 
 # Example usage
 if __name__ == "__main__":
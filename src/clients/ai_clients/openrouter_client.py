@@ -2,10 +2,21 @@
 OpenRouter AI Client for connecting to OpenRouter API.
 """
 
+import asyncio
+import json
+import httpx
 import openai
-from src.config.settings import OPENROUTER_API_KEY, OPENROUTER_MODEL
+from typing import AsyncIterator, Iterator
+from config.settings import (OPENROUTER_API_KEY, OPENROUTER_MODEL, AI_CLIENT_MAX_CONNECTIONS,
+                             AI_CLIENT_MAX_KEEPALIVE, AI_CLIENT_TIMEOUT_SECONDS, USD_RATES_URL,
+                             USD_RATES_TIMEOUT_SECONDS, TOOL_CACHE_TTL_SECONDS)
+from utils.ttl_cache import TTLCache
 from .ia_client_interface import AIClient
 
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+# Resultados de las tools ejecutadas en local, compartidos por todos los hilos
+_tool_cache = TTLCache(TOOL_CACHE_TTL_SECONDS)
+
 
 class OpenRouterClient(AIClient):
     """
@@ -18,7 +29,17 @@ class OpenRouterClient(AIClient):
         """
         self.client = openai.OpenAI(
             api_key=OPENROUTER_API_KEY,
-            base_url="https://openrouter.ai/api/v1"
+            base_url=OPENROUTER_BASE_URL
+        )
+        # Cliente async con su propio pool keep-alive, compartido por todas las peticiones
+        self.async_client = openai.AsyncOpenAI(
+            api_key=OPENROUTER_API_KEY,
+            base_url=OPENROUTER_BASE_URL,
+            timeout=AI_CLIENT_TIMEOUT_SECONDS,
+            http_client=openai.DefaultAsyncHttpxClient(limits=httpx.Limits(
+                max_connections=AI_CLIENT_MAX_CONNECTIONS,
+                max_keepalive_connections=AI_CLIENT_MAX_KEEPALIVE
+            ))
         )
         self.model = OPENROUTER_MODEL
 
@@ -50,15 +71,7 @@ class OpenRouterClient(AIClient):
                 message = response.choices[0].message
                 if message.tool_calls:
                     tool_results = self._handle_tool_calls(message.tool_calls)
-                    # Add assistant message with tool calls
-                    messages.append(message)
-                    # Add tool results for each call
-                    for i, tool_call in enumerate(message.tool_calls):
-                        messages.append({
-                            "role": "tool",
-                            "tool_call_id": tool_call.id,
-                            "content": tool_results[i] if i < len(tool_results) else "Error: No result"
-                        })
+                    self._append_tool_results(messages, message, tool_results)
                     # Get final response
                     final_response = self.client.chat.completions.create(
                         model=self.model,
@@ -81,19 +94,215 @@ class OpenRouterClient(AIClient):
         except Exception as e:
             raise Exception(f"Error generating text with OpenRouter: {str(e)}")
 
-    def _handle_tool_calls(self, tool_calls):
-        """Handle tool calls by executing them and returning results per call."""
+    def stream_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7, tools=None) -> Iterator[str]:
+        """
+        Stream text from the configured OpenRouter model.
+
+        With tools, the first (tool selection) call is not streamed; the final
+        answer after the tool results is.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+            tools: Optional tools for function calling.
+
+        Returns:
+            Iterator[str]: The generated text fragments, in order.
+        """
+        try:
+            if tools:
+                messages = [{"role": "user", "content": prompt}]
+                response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    tools=tools,
+                    tool_choice="auto"
+                )
+                message = response.choices[0].message
+                if not message.tool_calls:
+                    if message.content:
+                        yield message.content
+                    return
+                tool_results = self._handle_tool_calls(message.tool_calls)
+                self._append_tool_results(messages, message, tool_results)
+                stream = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True
+                )
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            else:
+                stream = self.client.completions.create(
+                    model=self.model,
+                    prompt=prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True
+                )
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].text:
+                        yield chunk.choices[0].text
+        except Exception as e:
+            raise Exception(f"Error streaming text with OpenRouter: {str(e)}")
+
+    async def agenerate_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7, tools=None) -> str:
+        """
+        Generate text using the configured OpenRouter model without blocking the event loop.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+            tools: Optional tools for function calling.
+
+        Returns:
+            str: The generated text response.
+        """
+        try:
+            if tools:
+                messages = [{"role": "user", "content": prompt}]
+                response = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    tools=tools,
+                    tool_choice="auto"
+                )
+                message = response.choices[0].message
+                if not message.tool_calls:
+                    return message.content
+                tool_results = await self._ahandle_tool_calls(message.tool_calls)
+                self._append_tool_results(messages, message, tool_results)
+                final_response = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature
+                )
+                return final_response.choices[0].message.content
+            response = await self.async_client.completions.create(
+                model=self.model,
+                prompt=prompt,
+                max_tokens=max_tokens,
+                temperature=temperature
+            )
+            return response.choices[0].text
+        except Exception as e:
+            raise Exception(f"Error generating text with OpenRouter: {str(e)}")
+
+    async def astream_text(self, prompt: str, max_tokens: int = 1000, temperature: float = 0.7,
+                           tools=None) -> AsyncIterator[str]:
+        """
+        Stream text from the configured OpenRouter model without blocking the event loop.
+
+        Args:
+            prompt (str): The input prompt for text generation.
+            max_tokens (int): Maximum number of tokens to generate.
+            temperature (float): Sampling temperature for generation.
+            tools: Optional tools for function calling.
+
+        Returns:
+            AsyncIterator[str]: The generated text fragments, in order.
+        """
+        try:
+            if tools:
+                messages = [{"role": "user", "content": prompt}]
+                response = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    tools=tools,
+                    tool_choice="auto"
+                )
+                message = response.choices[0].message
+                if not message.tool_calls:
+                    if message.content:
+                        yield message.content
+                    return
+                tool_results = await self._ahandle_tool_calls(message.tool_calls)
+                self._append_tool_results(messages, message, tool_results)
+                stream = await self.async_client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True
+                )
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+            else:
+                stream = await self.async_client.completions.create(
+                    model=self.model,
+                    prompt=prompt,
+                    max_tokens=max_tokens,
+                    temperature=temperature,
+                    stream=True
+                )
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].text:
+                        yield chunk.choices[0].text
+        except Exception as e:
+            raise Exception(f"Error streaming text with OpenRouter: {str(e)}")
+
+    @staticmethod
+    def _append_tool_results(messages: list, message, tool_results: list) -> None:
+        """Add the assistant message with its tool calls and one tool message per result."""
+        messages.append(message)
+        for i, tool_call in enumerate(message.tool_calls):
+            messages.append({
+                "role": "tool",
+                "tool_call_id": tool_call.id,
+                "content": tool_results[i] if i < len(tool_results) else "Error: No result"
+            })
+
+    async def _ahandle_tool_calls(self, tool_calls):
+        """
+        Run the tool calls on the MCP server through the shared session; the
+        calls that fail there (server unreachable or tool error) run locally in
+        a thread.
+        """
+        async def call_mcp(tool_call):
+            from ..mcp.mcp_client import get_mcp_client
+            arguments = json.loads(tool_call.function.arguments or "{}")
+            return await get_mcp_client().call_tool(tool_call.function.name, arguments)
+
+        results = await asyncio.gather(*(call_mcp(tool_call) for tool_call in tool_calls), return_exceptions=True)
+
+        failed = [number for number, result in enumerate(results) if isinstance(result, Exception)]
+        if failed:
+            print(f"MCP tools failed ({results[failed[0]]}), running {len(failed)} of them locally")
+            # Las tools locales son bloqueantes, se ejecutan en un hilo
+            local_results = await asyncio.to_thread(self._handle_tool_calls, [tool_calls[number] for number in failed])
+            for number, result in zip(failed, local_results):
+                results[number] = result
+        return [result if result is not None else "Error: No result" for result in results]
+
+    @staticmethod
+    def _fetch_usd_rates() -> str:
         import requests
 
+        response = requests.get(USD_RATES_URL, timeout=USD_RATES_TIMEOUT_SECONDS)
+        response.raise_for_status()
+        return f"USD rates: {response.json()}"
+
+    def _handle_tool_calls(self, tool_calls):
+        """Handle tool calls by executing them and returning results per call."""
         results = []
         for tool_call in tool_calls:
             if tool_call.function.name == "get_usd_price":
-                # Execute the tool directly
+                # Execute the tool directly, una sola petición a la API por TTL aunque lleguen varias a la vez
                 try:
-                    response = requests.get("https://open.er-api.com/v6/latest/USD")
-                    response.raise_for_status()
-                    data = response.json()
-                    results.append(f"USD rates: {data}")
+                    results.append(_tool_cache.get_or_load("get_usd_price", self._fetch_usd_rates))
                 except Exception as e:
                     results.append(f"Error getting USD rates: {str(e)}")
             else:
@@ -122,6 +331,27 @@ class OpenRouterClient(AIClient):
         except Exception as e:
             raise Exception(f"Error in chat completion with OpenRouter: {str(e)}")
 
+    async def achat_completion(self, messages: list, **kwargs) -> dict:
+        """
+        Perform a chat completion using the configured OpenRouter model without blocking the event loop.
+
+        Args:
+            messages (list): List of message dictionaries with 'role' and 'content'.
+            **kwargs: Additional parameters for the completion.
+
+        Returns:
+            dict: The completion response.
+        """
+        try:
+            response = await self.async_client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                **kwargs
+            )
+            return response
+        except Exception as e:
+            raise Exception(f"Error in chat completion with OpenRouter: {str(e)}")
+
 
 # Example usage
 if __name__ == "__main__":
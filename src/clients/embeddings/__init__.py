@@ -0,0 +1 @@
+# Embeddings client package
\ No newline at end of file
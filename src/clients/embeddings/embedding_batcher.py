@@ -0,0 +1,129 @@
+"""
+Dynamic micro-batching of query embeddings for the chat service.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config.settings import EMBEDDING_BATCH_MAX_SIZE, EMBEDDING_BATCH_MAX_WAIT_MS
+from utils.metrics import Histogram
+from .embedding_engine import EmbeddingEngine
+
+
+class EmbeddingBatcher:
+    """
+    Collects concurrent embedding requests for a few milliseconds and encodes
+    them with a single model call in a worker thread.
+    """
+
+    def __init__(self, engine: EmbeddingEngine, max_batch_size: int = EMBEDDING_BATCH_MAX_SIZE,
+                 max_wait_ms: float = EMBEDDING_BATCH_MAX_WAIT_MS):
+        """
+        Initialize the batcher.
+
+        Args:
+            engine (EmbeddingEngine): The engine that runs the model.
+            max_batch_size (int): Maximum number of texts per model call.
+            max_wait_ms (float): Maximum time the first text of a batch waits for company.
+        """
+        self.engine = engine
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64, 128])
+        self.queue_wait_ms = Histogram([0.5, 1, 2, 5, 10, 20, 50, 100, 250, 1000])
+
+    async def start(self) -> None:
+        """Start the background worker. Must be called inside the event loop."""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker and fail every request still waiting."""
+        if self._worker is None:
+            return
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+        while not self._queue.empty():
+            _, future, _ = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Embedding batcher stopped"))
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Embed one text, sharing the model call with other concurrent requests.
+
+        Args:
+            text (str): The text to embed.
+
+        Returns:
+            np.ndarray: The embedding vector.
+        """
+        if self._worker is None:
+            return await self.engine.aencode(text)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> List[Tuple[str, asyncio.Future, float]]:
+        """Wait for the first request and gather more until the batch is full or the window closes."""
+        batch = [await self._queue.get()]
+        deadline = batch[0][2] + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                # Ventana cerrada, solo se toma lo que ya está en la cola
+                if self._queue.empty():
+                    break
+                batch.append(self._queue.get_nowait())
+                continue
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.queue_wait_ms.observe((started - enqueued) * 1000)
+            self.batch_sizes.observe(len(batch))
+
+            texts = [text for text, _, _ in batch]
+            try:
+                vectors = await loop.run_in_executor(None, self.engine.encode, texts, self.max_batch_size)
+            except asyncio.CancelledError:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Embedding batcher stopped"))
+                raise
+            except Exception as e:
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the batch-size and queue-wait histograms."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_sizes.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot()
+        }
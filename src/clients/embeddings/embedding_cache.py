@@ -0,0 +1,171 @@
+"""
+Two-tier embedding cache shared by the chat and ingestion paths.
+
+Vectors are keyed by (model name, hash of the normalized text). Hot entries
+live in an in-memory LRU; every entry is also written to a SQLite file so
+re-ingesting or rebuilding after a restart does not need the model.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from config.settings import EMBEDDING_CACHE_PATH, EMBEDDING_CACHE_MEMORY_ITEMS
+
+# SQLite limita el número de parámetros por consulta
+_SQL_BATCH_SIZE = 500
+
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only differences share an entry."""
+    return " ".join(text.split())
+
+
+def text_key(text: str) -> str:
+    return hashlib.sha1(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    In-memory LRU in front of an optional on-disk SQLite store.
+    """
+
+    def __init__(self, model_name: str, path: Optional[str] = EMBEDDING_CACHE_PATH,
+                 memory_items: int = EMBEDDING_CACHE_MEMORY_ITEMS):
+        """
+        Initialize the cache.
+
+        Args:
+            model_name (str): Model the vectors belong to; part of every key.
+            path (Optional[str]): SQLite file of the disk tier. Empty or None keeps the cache in memory only.
+            memory_items (int): Maximum vectors kept in the LRU tier.
+        """
+        self.model_name = model_name
+        self.path = path or None
+        self.memory_items = max(0, memory_items)
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        if self.path:
+            try:
+                self._db = self._open(self.path)
+            except (OSError, sqlite3.Error) as e:
+                # Sin disco la caché sigue funcionando solo en memoria
+                print(f"Embedding cache disk tier disabled ({self.path}): {e}")
+                self.path = None
+
+    @staticmethod
+    def _open(path: str) -> sqlite3.Connection:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        db = sqlite3.connect(path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, key TEXT NOT NULL, vector BLOB NOT NULL, "
+            "PRIMARY KEY (model, key)) WITHOUT ROWID"
+        )
+        db.commit()
+        return db
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look texts up in the memory tier, then in the disk tier.
+
+        Returns:
+            List[Optional[np.ndarray]]: The cached vector of each text, or None on a miss.
+        """
+        keys = [text_key(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        from_disk: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    found[key] = vector
+
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if missing and self._db is not None:
+                from_disk = self._read_disk(missing)
+                for key, vector in from_disk.items():
+                    found[key] = vector
+                    self._remember(key, vector)
+
+            for key in keys:
+                if key in from_disk:
+                    self.disk_hits += 1
+                elif key in found:
+                    self.memory_hits += 1
+                else:
+                    self.misses += 1
+        return [found.get(key) for key in keys]
+
+    def put_many(self, texts: List[str], vectors) -> None:
+        """Store the vectors of texts in both tiers."""
+        entries = {text_key(text): np.asarray(vector, dtype=np.float32) for text, vector in zip(texts, vectors)}
+        with self._lock:
+            for key, vector in entries.items():
+                self._remember(key, vector)
+            if self._db is not None:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, key, vector) VALUES (?, ?, ?)",
+                    [(self.model_name, key, vector.tobytes()) for key, vector in entries.items()]
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, vector: np.ndarray) -> None:
+        if self.memory_items == 0:
+            return
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, np.ndarray]:
+        found = {}
+        for start in range(0, len(keys), _SQL_BATCH_SIZE):
+            chunk = keys[start:start + _SQL_BATCH_SIZE]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self._db.execute(
+                f"SELECT key, vector FROM embeddings WHERE model = ? AND key IN ({placeholders})",
+                [self.model_name, *chunk]
+            )
+            for key, blob in rows:
+                found[key] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the hit counters and the size of each tier."""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            disk_items = None
+            if self._db is not None:
+                disk_items = self._db.execute("SELECT COUNT(*) FROM embeddings WHERE model = ?", [self.model_name]).fetchone()[0]
+            return {
+                "model": self.model_name,
+                "path": self.path,
+                "memory_items": len(self._memory),
+                "disk_items": disk_items,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else 0.0
+            }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
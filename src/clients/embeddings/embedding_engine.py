@@ -0,0 +1,153 @@
+"""
+Process-wide sentence-transformers engine shared by the chat and ingestion paths.
+
+Texts found in the embedding cache never reach the model, and the model is
+only loaded when there is at least one miss.
+"""
+
+import asyncio
+import copy
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+import numpy as np
+from sentence_transformers import SentenceTransformer
+
+from config.settings import SENTENCE_TRANSFORMER_MODEL
+from .embedding_cache import EmbeddingCache, text_key
+
+
+class EmbeddingEngine:
+    """
+    Loads the embedding model once per process and serializes access to it.
+    """
+
+    def __init__(self, model_name: str = SENTENCE_TRANSFORMER_MODEL, cache: Optional[EmbeddingCache] = None):
+        """
+        Initialize the engine without loading the model.
+
+        Args:
+            model_name (str): The sentence-transformers model to load.
+            cache (Optional[EmbeddingCache]): Cache consulted before calling the model.
+        """
+        self.model_name = model_name
+        self.cache = cache
+        self._model: Optional[SentenceTransformer] = None
+        self._load_lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+        # Copia propia del tokenizer para contar tokens sin competir con el encode del batcher
+        self._count_tokenizer: Any = None
+        self._count_lock = threading.Lock()
+        self.load_error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+
+    @property
+    def is_ready(self) -> bool:
+        """Whether the model is loaded and warmed up."""
+        return self._model is not None
+
+    def load(self) -> None:
+        """
+        Load and warm up the model. Safe to call from several threads, only the
+        first call does the work.
+        """
+        with self._load_lock:
+            if self._model is not None:
+                return
+            start = time.perf_counter()
+            try:
+                model = SentenceTransformer(self.model_name)
+                # Una primera inferencia deja listos los pesos y los kernels
+                model.encode(["warm-up"])
+                # El tokenizer rápido cambia su estado de truncado/padding en cada llamada
+                count_tokenizer = copy.deepcopy(getattr(model, "tokenizer", None))
+            except Exception as e:
+                self.load_error = str(e)
+                raise
+            self._count_tokenizer = count_tokenizer
+            self._model = model
+            self.load_error = None
+            self.load_seconds = time.perf_counter() - start
+
+    def encode(self, texts: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
+        """
+        Encode one text or a list of texts.
+
+        Args:
+            texts (Union[str, List[str]]): A single text or a list of texts.
+            batch_size (int): Batch size used by the model.
+
+        Returns:
+            np.ndarray: A 1-D vector for a single text, a 2-D matrix for a list.
+        """
+        if self.cache is None:
+            return self._encode_model(texts, batch_size)
+
+        single = isinstance(texts, str)
+        batch = [texts] if single else list(texts)
+        if not batch:
+            return np.empty((0, 0), dtype=np.float32)
+
+        vectors = self.cache.get_many(batch)
+        # Textos que solo difieren en espacios comparten clave y se calculan una vez
+        missing = {}
+        for text, vector in zip(batch, vectors):
+            if vector is None:
+                missing.setdefault(text_key(text), text)
+        if missing:
+            texts_to_encode = list(missing.values())
+            computed = dict(zip(missing, self._encode_model(texts_to_encode, batch_size)))
+            self.cache.put_many(texts_to_encode, computed.values())
+            vectors = [computed[text_key(text)] if vector is None else vector for text, vector in zip(batch, vectors)]
+
+        return vectors[0] if single else np.vstack(vectors).astype(np.float32, copy=False)
+
+    def _encode_model(self, texts: Union[str, List[str]], batch_size: int) -> np.ndarray:
+        if self._model is None:
+            self.load()
+        with self._encode_lock:
+            return self._model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+    async def aencode(self, texts: Union[str, List[str]], batch_size: int = 32) -> np.ndarray:
+        """Encode without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.encode, texts, batch_size)
+
+    def count_tokens(self, text: str) -> Optional[int]:
+        """
+        Count tokens with a copy of the model's (Rust) tokenizer, without
+        running the model. The copy is not the one the model encodes with, so
+        counting from the event loop never waits for an encode batch.
+
+        Returns:
+            Optional[int]: The token count, or None while the model is not loaded.
+        """
+        tokenizer = self._count_tokenizer
+        if tokenizer is None:
+            return None
+        with self._count_lock:
+            return len(tokenizer.encode(text, add_special_tokens=False, verbose=False))
+
+    def status(self) -> Dict[str, Any]:
+        """Get the warm-up status of the engine."""
+        return {
+            "model": self.model_name,
+            "ready": self.is_ready,
+            "load_seconds": self.load_seconds,
+            "error": self.load_error,
+            "cache": self.cache.stats() if self.cache is not None else None
+        }
+
+
+_engine: Optional[EmbeddingEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_embedding_engine() -> EmbeddingEngine:
+    """Get the process-wide embedding engine, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = EmbeddingEngine(cache=EmbeddingCache(SENTENCE_TRANSFORMER_MODEL))
+        return _engine
@@ -0,0 +1,149 @@
+"""
+Async client for the FAISS service, used by the chat app so RAG lookups never
+block the event loop.
+
+One instance is created per process and opened in the app lifespan; every
+request then reuses the same keep-alive connection pool.
+"""
+
+import asyncio
+import random
+from typing import Any, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+from clients.faiss.faiss_client import FAISSClient
+from services.FAISS import wire_format
+from config.settings import (FAISS_SERVICE_URL, FAISS_CLIENT_MAX_CONNECTIONS, FAISS_CLIENT_MAX_KEEPALIVE,
+                             FAISS_CLIENT_TIMEOUT_SECONDS, FAISS_CLIENT_CONNECT_TIMEOUT_SECONDS,
+                             FAISS_CLIENT_RETRIES, FAISS_CLIENT_BACKOFF_SECONDS)
+
+# Respuestas que indican un fallo transitorio del servicio
+RETRY_STATUSES = {429, 502, 503, 504}
+
+
+class AsyncFAISSClient:
+    """Pooled, retrying async client for the FAISS vector service."""
+
+    def __init__(self, base_url: str = FAISS_SERVICE_URL, max_connections: int = FAISS_CLIENT_MAX_CONNECTIONS,
+                 max_keepalive: int = FAISS_CLIENT_MAX_KEEPALIVE, timeout: float = FAISS_CLIENT_TIMEOUT_SECONDS,
+                 connect_timeout: float = FAISS_CLIENT_CONNECT_TIMEOUT_SECONDS, retries: int = FAISS_CLIENT_RETRIES,
+                 backoff: float = FAISS_CLIENT_BACKOFF_SECONDS, use_binary: bool = None):
+        """
+        Initialize the client without opening any connection.
+
+        Args:
+            base_url (str): URL of the FAISS service.
+            max_connections (int): Maximum open connections in the pool.
+            max_keepalive (int): Idle connections kept alive for reuse.
+            timeout (float): Read/write/pool timeout in seconds.
+            connect_timeout (float): TCP connect timeout in seconds.
+            retries (int): Extra attempts after a connection error or a 429/5xx gateway response.
+            backoff (float): Base delay of the exponential backoff, in seconds.
+            use_binary (bool): Force the binary wire format on or off; None asks the service.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive)
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.retries = max(0, retries)
+        self.backoff = backoff
+        self.use_binary = use_binary
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def start(self) -> None:
+        """Open the connection pool. Must be called inside the event loop."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(base_url=self.base_url, limits=self.limits, timeout=self.timeout)
+
+    async def aclose(self) -> None:
+        """Close every pooled connection."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Send a request, retrying transient failures with jittered exponential backoff."""
+        if self._client is None:
+            await self.start()
+        for attempt in range(self.retries + 1):
+            try:
+                response = await self._client.request(method, path, **kwargs)
+                if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                    response.raise_for_status()
+                    return response
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+            await asyncio.sleep(self.backoff * (2 ** attempt) * (0.5 + random.random()))
+
+    async def supports_binary(self) -> bool:
+        """Check (once) whether the service accepts the binary vector wire format."""
+        if self.use_binary is None:
+            try:
+                status = await self.get_status()
+            except httpx.HTTPError:
+                return False
+            self.use_binary = wire_format.CONTENT_TYPE in status.get("wire_formats", [])
+        return self.use_binary
+
+    async def _post_binary(self, path: str, matrix: np.ndarray, header: Dict[str, Any]):
+        """POST a normalized matrix of vectors in the binary wire format."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        body = wire_format.encode(matrix / norms, {**header, "normalized": True})
+        response = await self._request("POST", path, content=body, headers={"Content-Type": wire_format.CONTENT_TYPE})
+        return response.json()
+
+    async def search_similar(self, query_vector: List[float], k: int = 5, role_id: int = 4,
+                             nprobe: int = None, ef_search: int = None, text: str = None,
+                             mode: str = None) -> List[Dict[str, Any]]:
+        """
+        Search for similar vectors in the index. nprobe / ef_search tune IVF / HNSW indexes.
+        With mode="hybrid" the query text is also ranked with BM25 and both rankings are fused;
+        the scores are then reciprocal rank fusion values, not cosine similarities.
+        """
+        options = FAISSClient._search_options(k, role_id, nprobe, ef_search, mode)
+        if await self.supports_binary():
+            matrix = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+            header = {**options, "texts": [text]} if text is not None else options
+            return (await self._post_binary("/search_batch/binary", matrix, header))[0]
+
+        vector = np.asarray(query_vector, dtype=np.float32).tolist()
+        data = {"vector": vector, **options}
+        if text is not None:
+            data["text"] = text
+        response = await self._request("POST", "/search", json=data)
+        return response.json()
+
+    async def search_similar_batch(self, query_vectors: List[List[float]], k: int = 5, role_id: int = 4,
+                                   nprobe: int = None, ef_search: int = None, texts: List[str] = None,
+                                   mode: str = None) -> List[List[Dict[str, Any]]]:
+        """Search several query vectors (and their texts in hybrid mode) in one request, one result list per query."""
+        options = FAISSClient._search_options(k, role_id, nprobe, ef_search, mode)
+        if texts:
+            options["texts"] = list(texts)
+        matrix = np.asarray(query_vectors, dtype=np.float32)
+        if await self.supports_binary():
+            return await self._post_binary("/search_batch/binary", matrix, options)
+
+        response = await self._request("POST", "/search_batch", json={"vectors": matrix.tolist(), **options})
+        return response.json()
+
+    async def get_status(self) -> Dict[str, Any]:
+        """Get the current status of the FAISS index."""
+        response = await self._request("GET", "/status")
+        return response.json()
+
+    async def clear_index(self) -> Dict[str, Any]:
+        """Clear all vectors from the index."""
+        response = await self._request("DELETE", "/clear")
+        return response.json()
+
+    async def is_healthy(self) -> bool:
+        """Check if the FAISS service is healthy."""
+        try:
+            await self.get_status()
+            return True
+        except httpx.HTTPError:
+            return False
@@ -4,39 +4,44 @@ import numpy as np
 import os
 import sys
 sys.path.insert(0, 'src')
-from sentence_transformers import SentenceTransformer
-from clients.mongodb.mongodb_client import MongoDBClient
-from services.database.models.document_model import Document
-from config.settings import MONGODB_URI, DATABASE_NAME, RAG_DATA_PATH, ROLE_MAPPING
-
-# Configuración de los embeddings
-MAX_CHUNK_SIZE = 1000  # Numero máximo de caracteres por chunk
-OVERLAP_SIZE = 200     # Numero de caracteres de overlap
-
-def split_text_with_overlap(text: str, max_chunk_size: int, overlap_size: int):
-    """Split text into chunks with overlap."""
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + max_chunk_size
-        if end < len(text):
-            chunk = text[start:end]
-        else:
-            chunk = text[start:]
-        chunks.append(chunk)
-        start = end - overlap_size
-        if start >= len(text):
-            break
-    return chunks
+from clients.embeddings.embedding_engine import get_embedding_engine
+from clients.mongodb.mongodb_client import get_mongodb_client
+from services.FAISS import wire_format
+from config.settings import RAG_DATA_PATH
+
+# Configuración de los embeddings (el tamaño de los chunks está en settings)
+VECTOR_BATCH_SIZE = 256  # Numero máximo de vectores por petición en los endpoints batch
 
 # Definición del cliente con le cual nos vamos a comunicar con el servicio de FAISS
 class FAISSClient:
     """FAISS client for vector similarity search operations."""
 
-    def __init__(self, base_url: str = "http://localhost:8001"):
+    def __init__(self, base_url: str = "http://localhost:8001", batch_size: int = VECTOR_BATCH_SIZE, use_binary: bool = None):
         self.base_url = base_url.rstrip('/')
+        self.batch_size = batch_size
+        # None: se usa el formato binario solo si el servicio lo anuncia en /status
+        self.use_binary = use_binary
         self.session = requests.Session()
 
+    def supports_binary(self) -> bool:
+        """Check (once) whether the service accepts the binary vector wire format."""
+        if self.use_binary is None:
+            try:
+                self.use_binary = wire_format.CONTENT_TYPE in self.get_status().get("wire_formats", [])
+            except requests.RequestException:
+                return False
+        return self.use_binary
+
+    def _post_binary(self, path: str, matrix: np.ndarray, header: Dict[str, Any]):
+        """POST a normalized matrix of vectors in the binary wire format."""
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1
+        body = wire_format.encode(matrix / norms, {**header, "normalized": True})
+        response = self.session.post(f"{self.base_url}{path}", data=body,
+                                     headers={"Content-Type": wire_format.CONTENT_TYPE})
+        response.raise_for_status()
+        return response.json()
+
     def add_vector(self, vector_id: str, vector: List[float], metadata: Dict[str, Any] = None) -> Dict[str, Any]:
         """Add a vector to the FAISS index."""
         url = f"{self.base_url}/add_vector"
@@ -49,14 +54,39 @@ class FAISSClient:
         response.raise_for_status()
         return response.json()
 
-    def search_similar(self, query_vector: List[float], k: int = 5, role_id: int = 4) -> List[Dict[str, Any]]:
-        """Search for similar vectors in the index."""
+    @staticmethod
+    def _search_options(k: int, role_id: int, nprobe: int = None, ef_search: int = None,
+                        mode: str = None) -> Dict[str, Any]:
+        """Search options, sending the ANN tuning knobs and the search mode only when they are set."""
+        options = {"k": k, "role_id": role_id}
+        if nprobe is not None:
+            options["nprobe"] = nprobe
+        if ef_search is not None:
+            options["ef_search"] = ef_search
+        if mode is not None:
+            options["mode"] = mode
+        return options
+
+    def search_similar(self, query_vector: List[float], k: int = 5, role_id: int = 4,
+                       nprobe: int = None, ef_search: int = None, text: str = None,
+                       mode: str = None) -> List[Dict[str, Any]]:
+        """
+        Search for similar vectors in the index. nprobe / ef_search tune IVF / HNSW indexes.
+        With mode="hybrid" the query text is also ranked with BM25 and both rankings are fused.
+        """
+        options = self._search_options(k, role_id, nprobe, ef_search, mode)
+        if self.supports_binary():
+            matrix = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+            header = {**options, "texts": [text]} if text is not None else options
+            return self._post_binary("/search_batch/binary", matrix, header)[0]
+
         url = f"{self.base_url}/search"
         data = {
             "vector": query_vector,
-            "k": k,
-            "role_id": role_id
+            **options
         }
+        if text is not None:
+            data["text"] = text
         response = self.session.post(url, json=data)
         response.raise_for_status()
         return response.json()
@@ -75,24 +105,104 @@ class FAISSClient:
         response.raise_for_status()
         return response.json()
 
-    def add_vectors_batch(self, vectors_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Add multiple vectors to the index."""
+    def delete_vectors(self, vector_ids: List[str]) -> Dict[str, Any]:
+        """Delete vectors by id."""
+        url = f"{self.base_url}/delete_vectors"
+        response = self.session.post(url, json={"ids": list(vector_ids)})
+        response.raise_for_status()
+        return response.json()
+
+    def index_texts(self, vector_ids: List[str], texts: List[str]) -> Dict[str, Any]:
+        """Index the text of vectors stored without it, for hybrid search."""
+        url = f"{self.base_url}/index_texts"
+        response = self.session.post(url, json={"ids": list(vector_ids), "texts": list(texts)})
+        response.raise_for_status()
+        return response.json()
+
+    def get_all_ids(self) -> List[str]:
+        """Get the ids of every vector in the index."""
+        url = f"{self.base_url}/get_all_id"
+        response = self.session.get(url)
+        response.raise_for_status()
+        return [item["id"] for item in response.json()["vectors"]]
+
+    def rebuild_index(self, index_factory: str) -> Dict[str, Any]:
+        """Switch the service to another index type, rebuilt from the stored vectors."""
+        url = f"{self.base_url}/rebuild"
+        response = self.session.post(url, json={"index_factory": index_factory})
+        response.raise_for_status()
+        return response.json()
+
+    def add_vectors_batch(self, vectors_data: List[Dict[str, Any]], batch_size: int = None) -> List[Dict[str, Any]]:
+        """Add multiple vectors to the index, one request per chunk of batch_size vectors."""
+        url = f"{self.base_url}/add_vectors"
+        batch_size = batch_size or self.batch_size
         results = []
-        for data in vectors_data:
+        binary = self.supports_binary()
+        for start in range(0, len(vectors_data), batch_size):
+            chunk = vectors_data[start:start + batch_size]
+            matrix = np.asarray([item["vector"] for item in chunk], dtype=np.float32)
+            data = {
+                "ids": [item["id"] for item in chunk],
+                "metadata": [item.get("metadata") or {} for item in chunk]
+            }
+            # El texto del chunk alimenta el índice BM25 del servicio
+            if any(item.get("text") for item in chunk):
+                data["texts"] = [item.get("text") or "" for item in chunk]
             try:
-                result = self.add_vector(data["id"], data["vector"], data.get("metadata", {}))
-                results.append(result)
+                if binary:
+                    results.append(self._post_binary("/add_vectors/binary", matrix, data))
+                    continue
+                response = self.session.post(url, json={**data, "vectors": matrix.tolist()})
+                response.raise_for_status()
+                results.append(response.json())
             except Exception as e:
-                results.append({"error": str(e), "id": data.get("id", "unknown")})
+                results.append({"error": str(e), "ids": data["ids"]})
+        return results
+
+    def search_similar_batch(self, query_vectors: List[List[float]], k: int = 5, role_id: int = 4,
+                             batch_size: int = None, nprobe: int = None, ef_search: int = None,
+                             texts: List[str] = None, mode: str = None) -> List[List[Dict[str, Any]]]:
+        """Search several query vectors (and their texts in hybrid mode), returning one result list per query."""
+        url = f"{self.base_url}/search_batch"
+        batch_size = batch_size or self.batch_size
+        options = self._search_options(k, role_id, nprobe, ef_search, mode)
+        binary = self.supports_binary()
+        results = []
+        for start in range(0, len(query_vectors), batch_size):
+            matrix = np.asarray(query_vectors[start:start + batch_size], dtype=np.float32)
+            header = {**options, "texts": texts[start:start + batch_size]} if texts else options
+            if binary:
+                results.extend(self._post_binary("/search_batch/binary", matrix, header))
+                continue
+            data = {
+                "vectors": matrix.tolist(),
+                **header
+            }
+            response = self.session.post(url, json=data)
+            response.raise_for_status()
+            results.extend(response.json())
         return results
 
     def get_all_vectors(self) -> List[Dict[str, Any]]:
         """Get all vectors in the index."""
+        if self.supports_binary():
+            ids, matrix, metadatas = self.export_vectors()
+            return [{"id": vector_id, "vector": vector, "metadata": metadata}
+                    for vector_id, vector, metadata in zip(ids, matrix.tolist(), metadatas)]
+
         url = f"{self.base_url}/get_all"
         response = self.session.get(url)
         response.raise_for_status()
         return response.json()["vectors"]
 
+    def export_vectors(self):
+        """Export all vectors as (ids, float32 matrix, metadata) using the binary wire format."""
+        response = self.session.get(f"{self.base_url}/get_all/binary")
+        response.raise_for_status()
+        header, matrix = wire_format.decode(response.content)
+        return header["ids"], matrix, header["metadata"]
+
     def is_healthy(self) -> bool:
         """Check if the FAISS service is healthy."""
         try:
@@ -101,46 +211,15 @@ class FAISSClient:
         except:
             return False
 
-    def load_documents(self, data_dir: str = RAG_DATA_PATH) -> Dict[str, Any]:
-        """Load documents from directory into FAISS and MongoDB."""
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        mongo_client = MongoDBClient(uri=MONGODB_URI, database_name=DATABASE_NAME)
-
-        loaded_count = 0
-        for filename in os.listdir(data_dir):
-            if filename.endswith('.txt'):
-                filepath = os.path.join(data_dir, filename)
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-
-                role = filename.split('_')[0]
-                role_id = ROLE_MAPPING.get(role)
-
-                chunks = split_text_with_overlap(content, MAX_CHUNK_SIZE, OVERLAP_SIZE)
-
-                print(f"Processing {filename}: {len(chunks)} chunks")
-
-                for chunk_idx, chunk in enumerate(chunks):
-                    embedding = model.encode(chunk).tolist()
-                    chunk_id = f"{filename}_{chunk_idx + 1}"
-
-                    self.add_vector(chunk_id, embedding, metadata={'role_id': role_id})
-
-                    Document.create_document(
-                        mongo_client,
-                        title=f"{filename} - Chunk {chunk_idx + 1}",
-                        content=chunk,
-                        source=filename,
-                        metadata={
-                            'faiss_id': chunk_id,
-                            'chunk_index': chunk_idx,
-                            'total_chunks': len(chunks),
-                            'original_file': filename
-                        },
-                        role_id=role_id
-                    )
-
-                    loaded_count += 1
-                    print(f"Processed chunk: {chunk_id}")
-
-        return {"message": f"Loaded {loaded_count} chunks from documents"}
\ No newline at end of file
+    def load_documents(self, data_dir: str = RAG_DATA_PATH, incremental: bool = True) -> Dict[str, Any]:
+        """Load new and changed documents from directory into FAISS and MongoDB."""
+        from services.ingestion.pipeline import IngestionPipeline
+
+        pipeline = IngestionPipeline(
+            faiss_client=self,
+            embedder=get_embedding_engine(),
+            mongo_client=get_mongodb_client(),
+            incremental=incremental
+        )
+        report = pipeline.run(data_dir)
+        return {"message": f"Loaded {report['chunks']} chunks from documents", "report": report}
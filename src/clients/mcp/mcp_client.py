@@ -1,21 +1,210 @@
+"""
+Long-lived client for the MCP server.
+
+Every tool call shares one SSE connection and one initialized ClientSession,
+instead of connecting and initializing again for each call. The session runs
+in its own task, so that the task that opens the transport is also the one
+that closes it. If a call fails (server restarted, connection dropped) the
+session is rebuilt and the call is retried once. If the server cannot be
+reached at all, calls fail immediately for retry_after_seconds instead of
+waiting for a connect timeout each time.
+"""
+
 import asyncio
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
 from mcp.client.session import ClientSession
 from mcp.client.sse import sse_client
+from config.settings import MCP_SERVER_URL, MCP_CALL_TIMEOUT_SECONDS, MCP_RETRY_AFTER_SECONDS
+
+
+class MCPUnavailableError(ConnectionError):
+    """The MCP server could not be reached recently; the call was not attempted."""
+
+
+class MCPToolError(RuntimeError):
+    """The tool ran on the MCP server and reported an error (isError)."""
+
 
 #Definición del cliente para el mcp
 class MCPClient:
-    def __init__(self, url: str = "http://mcp:8003/sse"):
+    def __init__(self, url: str = MCP_SERVER_URL, timeout_seconds: float = MCP_CALL_TIMEOUT_SECONDS,
+                 retry_after_seconds: float = MCP_RETRY_AFTER_SECONDS):
+        """
+        Initialize the client. The connection is opened on the first call.
+
+        Args:
+            url (str): SSE endpoint of the MCP server.
+            timeout_seconds (float): Timeout to connect and for each tool call.
+            retry_after_seconds (float): After a failed connect, time during which calls fail without
+                trying to connect again.
+        """
         self.url = url
+        self.timeout_seconds = timeout_seconds
+        self.retry_after_seconds = retry_after_seconds
+        self._retry_at = 0.0
+        self._session: Optional[ClientSession] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._lock = asyncio.Lock()
+        self.connects = 0
+        self.calls = 0
+        self.retries = 0
+        self.errors = 0
+        self.tool_errors = 0
+        self.rejected = 0
+
+    async def _run_session(self, ready: asyncio.Future, stop: asyncio.Event) -> None:
+        """Open the transport and the session, publish it through ready and keep it open until stop."""
+        try:
+            async with sse_client(self.url, timeout=self.timeout_seconds) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    if not ready.done():
+                        ready.set_result(session)
+                    await stop.wait()
+        except Exception as e:
+            # anyio envuelve los errores del transporte en un ExceptionGroup
+            while len(getattr(e, "exceptions", ())) == 1:
+                e = e.exceptions[0]
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                print(f"MCP session to {self.url} closed: {e}")
+        finally:
+            if not ready.done():
+                ready.cancel()
+
+    def _alive(self) -> bool:
+        return self._session is not None and self._task is not None and not self._task.done()
+
+    async def _session_or_connect(self) -> ClientSession:
+        if self._alive():
+            return self._session
+        self._check_available()
+        async with self._lock:
+            if self._alive():
+                return self._session
+            # Las llamadas que esperaban el lock mientras fallaba la conexión no lo vuelven a intentar
+            self._check_available()
+            await self._disconnect()
+            ready = asyncio.get_running_loop().create_future()
+            self._stop = asyncio.Event()
+            self._task = asyncio.create_task(self._run_session(ready, self._stop))
+            try:
+                self._session = await asyncio.wait_for(ready, self.timeout_seconds)
+            except BaseException as e:
+                self._task.cancel()
+                if isinstance(e, Exception):
+                    self._retry_at = time.monotonic() + self.retry_after_seconds
+                raise
+            self._retry_at = 0.0
+            self.connects += 1
+            return self._session
+
+    def _check_available(self) -> None:
+        if time.monotonic() < self._retry_at:
+            self.rejected += 1
+            raise MCPUnavailableError(f"MCP server {self.url} unreachable, retrying after "
+                                      f"{self._retry_at - time.monotonic():.0f}s")
+
+    async def _disconnect(self) -> None:
+        task, self._task, self._session = self._task, None, None
+        if task is None:
+            return
+        self._stop.set()
+        # La sesión se cierra en su propia task; si no termina a tiempo se cancela
+        done, _ = await asyncio.wait([task], timeout=self.timeout_seconds)
+        if not done:
+            task.cancel()
+
+    async def _reset(self, session: Optional[ClientSession]) -> None:
+        """Drop the session that failed, unless another call already replaced it."""
+        async with self._lock:
+            if session is None or self._session is session:
+                await self._disconnect()
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Call a tool on the shared session, reconnecting once if it fails.
+
+        Args:
+            name (str): Tool name.
+            arguments (Optional[Dict[str, Any]]): Tool arguments.
+
+        Returns:
+            Optional[str]: Text of the first content item of the result, or None if empty.
+
+        Raises:
+            MCPUnavailableError: The server could not be reached within the last retry_after_seconds.
+            MCPToolError: The tool reported an error.
+        """
+        for attempt in range(2):
+            session = None
+            try:
+                session = await self._session_or_connect()
+            except MCPUnavailableError:
+                raise
+            except Exception:
+                # Sin conexión no se reintenta: un segundo connect esperaría otro timeout
+                self.errors += 1
+                raise
+            try:
+                result = await session.call_tool(name, arguments or {},
+                                                 read_timeout_seconds=timedelta(seconds=self.timeout_seconds))
+            except Exception as e:
+                if attempt:
+                    self.errors += 1
+                    raise
+                print(f"MCP call {name} failed ({type(e).__name__}: {e}), reconnecting")
+                self.retries += 1
+                await self._reset(session)
+                continue
+            self.calls += 1
+            text = result.content[0].text if result.content else None
+            if result.isError:
+                self.tool_errors += 1
+                raise MCPToolError(f"MCP tool {name} failed: {text}")
+            return text
 
     async def get_usd_price(self):
         """Call the get_usd_price tool from the MCP server."""
-        async with sse_client(self.url) as transport:
-            async with ClientSession(transport) as session:
-                await session.initialize()
-                result = await session.call_tool("get_usd_price", {})
-                if result.content and len(result.content) > 0:
-                    return result.content[0].text
-                return None
+        return await self.call_tool("get_usd_price")
+
+    async def close(self) -> None:
+        """Close the session, if open."""
+        async with self._lock:
+            await self._disconnect()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "url": self.url,
+            "connected": self._alive(),
+            "connects": self.connects,
+            "calls": self.calls,
+            "retries": self.retries,
+            "errors": self.errors,
+            "tool_errors": self.tool_errors,
+            "rejected": self.rejected,
+            "retry_in_seconds": max(0.0, self._retry_at - time.monotonic())
+        }
+
+
+_client: Optional[MCPClient] = None
+_client_lock = threading.Lock()
+
+
+def get_mcp_client() -> MCPClient:
+    """Get the process-wide MCP client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MCPClient()
+        return _client
+
 
 if __name__ == "__main__":
     async def main():
@@ -25,5 +214,7 @@ if __name__ == "__main__":
             print("USD Price Data:", result)
         except Exception as e:
             print(f"Error: {e}")
+        finally:
+            await client.close()
 
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""
+App-scoped async MongoDB client for the chat service, on top of PyMongo's
+native asyncio driver.
+"""
+
+import asyncio
+from typing import Optional, Set
+
+from pymongo import AsyncMongoClient
+from pymongo.errors import BulkWriteError
+
+from config.settings import (MONGODB_URI, DATABASE_NAME, MONGODB_MAX_POOL_SIZE, MONGODB_MIN_POOL_SIZE,
+                             MONGODB_SERVER_SELECTION_TIMEOUT_MS)
+
+DUPLICATE_KEY = 11000
+
+
+class AsyncMongoDBClient:
+    """
+    One connection pool per process, opened in the app lifespan. Writes that
+    nobody waits for (interaction logs) run as background tasks.
+    """
+
+    def __init__(self, uri: str = MONGODB_URI, database_name: str = DATABASE_NAME,
+                 max_pool_size: int = MONGODB_MAX_POOL_SIZE, min_pool_size: int = MONGODB_MIN_POOL_SIZE):
+        """
+        Initialize the client without connecting.
+
+        Args:
+            uri (str): MongoDB connection string.
+            database_name (str): Database used by the app.
+            max_pool_size (int): Maximum pooled connections.
+            min_pool_size (int): Connections kept open while idle.
+        """
+        self.uri = uri
+        self.database_name = database_name
+        self.max_pool_size = max_pool_size
+        self.min_pool_size = min_pool_size
+        self.client: Optional[AsyncMongoClient] = None
+        self.db = None
+        self._pending: Set[asyncio.Task] = set()
+        self.failed_writes = 0
+
+    async def connect(self) -> None:
+        """Open the pool and check the server. Must be called inside the event loop."""
+        if self.client is not None:
+            return
+        self.client = AsyncMongoClient(self.uri, maxPoolSize=self.max_pool_size, minPoolSize=self.min_pool_size,
+                                       serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS)
+        self.db = self.client[self.database_name]
+        try:
+            await self.client.admin.command('ping')
+            print("MongoDB connection successful")
+        except Exception as e:
+            # El driver reconecta solo, la app puede arrancar sin Mongo
+            print(f"MongoDB not reachable yet: {e}")
+
+    def get_collection(self, collection_name: str):
+        """Get a collection from the database."""
+        return self.db[collection_name]
+
+    async def insert_document(self, collection_name: str, document: dict):
+        """Insert a document into a collection."""
+        return await self.get_collection(collection_name).insert_one(document)
+
+    async def insert_documents(self, collection_name: str, documents: list) -> int:
+        """
+        Insert many documents with one unordered bulk write.
+
+        Documents that already exist (same _id, e.g. a retried batch) are skipped.
+
+        Returns:
+            int: How many documents were inserted.
+        """
+        if not documents:
+            return 0
+        try:
+            result = await self.get_collection(collection_name).insert_many(documents, ordered=False)
+            return len(result.inserted_ids)
+        except BulkWriteError as e:
+            if any(error.get('code') != DUPLICATE_KEY for error in e.details.get('writeErrors', [])):
+                raise
+            return e.details.get('nInserted', 0)
+
+    def insert_in_background(self, collection_name: str, document: dict) -> None:
+        """Insert a document without making the caller wait; failures are only logged."""
+        task = asyncio.create_task(self.insert_document(collection_name, document))
+        # Se guarda la referencia para que el task no sea recolectado antes de terminar
+        self._pending.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _write_done(self, task: asyncio.Task) -> None:
+        self._pending.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            self.failed_writes += 1
+            print(f"MongoDB background write failed: {task.exception()}")
+
+    async def close(self) -> None:
+        """Wait for the background writes still in flight, then close the pool."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+            self.db = None
@@ -0,0 +1,235 @@
+"""
+Buffered, bulk writer for the chat interactions.
+
+Interactions are queued in memory and written with one insert_many per batch,
+when the batch is full or the flush interval expires. If a flush fails (Mongo
+down) the batch is appended to a JSON-lines spill file and replayed after the
+next successful flush; if the in-memory queue is full new interactions are
+dropped, so logging never slows a chat reply down.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Dict, List, Optional
+
+from bson import json_util
+
+from config.settings import (INTERACTION_LOG_BATCH_SIZE, INTERACTION_LOG_FLUSH_MS, INTERACTION_LOG_QUEUE_SIZE,
+                             INTERACTION_LOG_SPILL_PATH)
+from utils.metrics import Histogram
+from .async_mongodb_client import AsyncMongoDBClient
+
+_STOP = object()
+
+
+class InteractionLogger:
+    """
+    Background task that batches documents for one collection.
+    """
+
+    def __init__(self, mongo_client: AsyncMongoDBClient, collection_name: str = "interactions",
+                 max_batch_size: int = INTERACTION_LOG_BATCH_SIZE, flush_interval_ms: float = INTERACTION_LOG_FLUSH_MS,
+                 max_queue_size: int = INTERACTION_LOG_QUEUE_SIZE, spill_path: Optional[str] = INTERACTION_LOG_SPILL_PATH):
+        """
+        Initialize the logger.
+
+        Args:
+            mongo_client (AsyncMongoDBClient): Client used for the bulk inserts.
+            collection_name (str): Target collection.
+            max_batch_size (int): Documents per insert_many.
+            flush_interval_ms (float): Maximum time a document waits in memory.
+            max_queue_size (int): Documents kept in memory before new ones are dropped.
+            spill_path (Optional[str]): JSON-lines file for batches that could not be written; None drops them.
+        """
+        self.mongo_client = mongo_client
+        self.collection_name = collection_name
+        self.max_batch_size = max(1, max_batch_size)
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000
+        self.max_queue_size = max(1, max_queue_size)
+        self.spill_path = spill_path or None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self.flush_ms = Histogram([1, 2, 5, 10, 20, 50, 100, 250, 500, 1000, 5000])
+        self.batch_sizes = Histogram([1, 2, 5, 10, 20, 50, 100, 200, 500])
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.failed_flushes = 0
+
+    async def start(self) -> None:
+        """Start the background worker. Must be called inside the event loop."""
+        if self._worker is None:
+            replaying = self._replay_path()
+            if replaying and os.path.exists(replaying):
+                # Un replay interrumpido vuelve al archivo de spill; los _id ya asignados evitan duplicados
+                try:
+                    _append_lines(self.spill_path, _read_lines(replaying))
+                    os.remove(replaying)
+                except OSError as e:
+                    print(f"Interaction log could not recover {replaying}, it is replayed later: {e}")
+            self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Flush everything still queued and stop the worker, waiting at most timeout seconds in total."""
+        if self._worker is None:
+            return
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        try:
+            # Con la cola llena el put espera a que el worker saque documentos, nunca más que el timeout
+            if not self._worker.done():
+                await asyncio.wait_for(self._queue.put(_STOP), timeout)
+            await asyncio.wait_for(self._worker, max(0.0, deadline - loop.time()))
+        except asyncio.TimeoutError:
+            self._worker.cancel()
+            print(f"Interaction logger did not flush within {timeout}s, {self._queue.qsize()} documents lost")
+        self._worker = None
+
+    def log(self, document: Dict[str, Any]) -> bool:
+        """
+        Queue a document without waiting.
+
+        Returns:
+            bool: False if the queue was full and the document was dropped.
+        """
+        if self._worker is None:
+            self.mongo_client.insert_in_background(self.collection_name, document)
+            return True
+        try:
+            self._queue.put_nowait(document)
+            return True
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+
+    async def _collect(self) -> List[Any]:
+        """Wait for the first document and gather more until the batch is full or the interval ends."""
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.flush_interval
+        while len(batch) < self.max_batch_size and batch[-1] is not _STOP:
+            timeout = deadline - time.perf_counter()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._collect()
+            stopping = batch[-1] is _STOP
+            documents = [document for document in batch if document is not _STOP]
+            if stopping:
+                # Lo que quede en la cola se escribe antes de salir
+                while not self._queue.empty():
+                    document = self._queue.get_nowait()
+                    if document is not _STOP:
+                        documents.append(document)
+            for start in range(0, len(documents), self.max_batch_size):
+                try:
+                    await self._flush(documents[start:start + self.max_batch_size])
+                except Exception as e:
+                    # Si el worker terminara, log() seguiría encolando documentos que nadie escribe
+                    print(f"Interaction log worker error: {e}")
+            if stopping:
+                return
+
+    async def _flush(self, documents: List[Dict[str, Any]]) -> None:
+        start = time.perf_counter()
+        try:
+            await self.mongo_client.insert_documents(self.collection_name, documents)
+        except Exception as e:
+            self.failed_flushes += 1
+            print(f"Interaction log flush of {len(documents)} documents failed: {e}")
+            await self._spill(documents)
+            return
+        self.flush_ms.observe((time.perf_counter() - start) * 1000)
+        self.batch_sizes.observe(len(documents))
+        self.written += len(documents)
+
+        if self._spill_pending():
+            await self._replay()
+
+    async def _spill(self, documents: List[Dict[str, Any]]) -> None:
+        if not self.spill_path:
+            self.dropped += len(documents)
+            return
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(None, _append_lines, self.spill_path, documents)
+            self.spilled += len(documents)
+        except OSError as e:
+            print(f"Interaction log spill failed: {e}")
+            self.dropped += len(documents)
+
+    async def _replay(self) -> None:
+        """Write back the spilled documents now that Mongo answers again."""
+        replaying = self._replay_path()
+        loop = asyncio.get_running_loop()
+        try:
+            # Un replay que no pudo devolver su resto al spill se retoma antes de mover el spill
+            if not os.path.exists(replaying):
+                os.replace(self.spill_path, replaying)
+            documents = await loop.run_in_executor(None, _read_lines, replaying)
+        except OSError as e:
+            print(f"Interaction log replay failed: {e}")
+            return
+
+        remaining: List[Dict[str, Any]] = []
+        for start in range(0, len(documents), self.max_batch_size):
+            batch = documents[start:start + self.max_batch_size]
+            try:
+                await self.mongo_client.insert_documents(self.collection_name, batch)
+            except Exception as e:
+                print(f"Interaction log replay stopped: {e}")
+                remaining = documents[start:]
+                break
+            self.replayed += len(batch)
+
+        try:
+            if remaining:
+                await loop.run_in_executor(None, _append_lines, self.spill_path, remaining)
+            os.remove(replaying)
+        except OSError as e:
+            # El archivo de replay se conserva entero; los documentos ya escritos se saltan por su _id
+            print(f"Interaction log replay could not release {replaying}: {e}")
+
+    def _replay_path(self) -> Optional[str]:
+        return f"{self.spill_path}.replay" if self.spill_path else None
+
+    def _spill_pending(self) -> bool:
+        return bool(self.spill_path and (os.path.exists(self.spill_path) or os.path.exists(self._replay_path())))
+
+    def stats(self) -> Dict[str, Any]:
+        """Get queue depth, counters and the flush latency histogram."""
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "max_queue_size": self.max_queue_size,
+            "written": self.written,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "failed_flushes": self.failed_flushes,
+            "spill_pending": self._spill_pending(),
+            "batch_size": self.batch_sizes.snapshot(),
+            "flush_ms": self.flush_ms.snapshot()
+        }
+
+
+def _append_lines(path: str, documents: List[Dict[str, Any]]) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as f:
+        for document in documents:
+            f.write(json_util.dumps(document) + "\n")
+
+
+def _read_lines(path: str) -> List[Dict[str, Any]]:
+    with open(path, "r", encoding="utf-8") as f:
+        return [json_util.loads(line) for line in f if line.strip()]
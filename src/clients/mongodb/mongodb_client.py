@@ -1,13 +1,21 @@
+import threading
+from typing import Optional
+
 from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure
 
+from config.settings import (MONGODB_URI, DATABASE_NAME, MONGODB_MAX_POOL_SIZE, MONGODB_MIN_POOL_SIZE,
+                             MONGODB_SERVER_SELECTION_TIMEOUT_MS)
+
 #Cliente Clasico para comunicarnos con el servicio de mongo DB
 class MongoDBClient:
     """MongoDB client for database operations in the AI API project."""
 
-    def __init__(self, uri: str = "mongodb://localhost:27017", database_name: str = "ai_api_db"):
+    def __init__(self, uri: str = "mongodb://localhost:27017", database_name: str = "ai_api_db",
+                 max_pool_size: int = MONGODB_MAX_POOL_SIZE, min_pool_size: int = MONGODB_MIN_POOL_SIZE):
         try:
-            self.client = MongoClient(uri)
+            self.client = MongoClient(uri, maxPoolSize=max_pool_size, minPoolSize=min_pool_size,
+                                      serverSelectionTimeoutMS=MONGODB_SERVER_SELECTION_TIMEOUT_MS)
             self.db = self.client[database_name]
             # Test the connection
             self.client.admin.command('ping')
@@ -25,6 +33,11 @@ class MongoDBClient:
         collection = self.get_collection(collection_name)
         return collection.insert_one(document)
 
+    def insert_documents(self, collection_name: str, documents: list):
+        """Insert many documents into a collection with one unordered bulk write."""
+        collection = self.get_collection(collection_name)
+        return collection.insert_many(documents, ordered=False)
+
     def find_documents(self, collection_name: str, query: dict = None):
         """Find documents in a collection."""
         collection = self.get_collection(collection_name)
@@ -32,4 +45,17 @@ class MongoDBClient:
 
     def close(self):
         """Close the MongoDB connection."""
-        self.client.close()
\ No newline at end of file
+        self.client.close()
+
+
+_client: Optional[MongoDBClient] = None
+_client_lock = threading.Lock()
+
+
+def get_mongodb_client() -> MongoDBClient:
+    """Get the process-wide blocking client (one connection pool shared by the loaders)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = MongoDBClient(uri=MONGODB_URI, database_name=DATABASE_NAME)
+        return _client
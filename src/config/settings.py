@@ -12,6 +12,20 @@ load_dotenv()
 # configuracion de Mongo db
 MONGODB_URI = os.getenv("MONGODB_URI", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "ai_api_db")
+# Pool de conexiones compartido por proceso
+MONGODB_MAX_POOL_SIZE = int(os.getenv("MONGODB_MAX_POOL_SIZE", "50"))
+MONGODB_MIN_POOL_SIZE = int(os.getenv("MONGODB_MIN_POOL_SIZE", "2"))
+MONGODB_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGODB_SERVER_SELECTION_TIMEOUT_MS", "5000"))
+# Búsqueda de texto completo sobre los documentos (índice de texto de Mongo)
+DOCUMENT_TEXT_LANGUAGE = os.getenv("DOCUMENT_TEXT_LANGUAGE", "spanish")
+DOCUMENT_SEARCH_MAX_LIMIT = int(os.getenv("DOCUMENT_SEARCH_MAX_LIMIT", "100"))
+# Ids secuenciales de documentos reservados por bloques, una sola ida a Mongo por bloque
+DOCUMENT_ID_BLOCK_SIZE = int(os.getenv("DOCUMENT_ID_BLOCK_SIZE", "100"))
+# Escritura por lotes de las interacciones del chat (vacío en el spill para descartar si Mongo no responde)
+INTERACTION_LOG_BATCH_SIZE = int(os.getenv("INTERACTION_LOG_BATCH_SIZE", "100"))
+INTERACTION_LOG_FLUSH_MS = float(os.getenv("INTERACTION_LOG_FLUSH_MS", "1000"))
+INTERACTION_LOG_QUEUE_SIZE = int(os.getenv("INTERACTION_LOG_QUEUE_SIZE", "10000"))
+INTERACTION_LOG_SPILL_PATH = os.getenv("INTERACTION_LOG_SPILL_PATH", "cache/interactions_spill.jsonl")
 
 # Configuración del API principal
 API_HOST = os.getenv("API_HOST", "0.0.0.0")
@@ -22,11 +36,64 @@ OPENROUTER_API_KEY = 'sk-or-v1-7b274144d237f24001890986c4e34cc36ac4dbf09621aaf26
 OPENROUTER_MODEL = os.getenv("OPENROUTER_MODEL", "x-ai/grok-code-fast-1")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY","apikey")
 ANTHROPIC_API_KEY= os.getenv("ANTHROPIC_API_KEY","apikey")
+# Pool HTTP compartido por cada cliente de IA (una instancia por proveedor y proceso)
+AI_CLIENT_MAX_CONNECTIONS = int(os.getenv("AI_CLIENT_MAX_CONNECTIONS", "100"))
+AI_CLIENT_MAX_KEEPALIVE = int(os.getenv("AI_CLIENT_MAX_KEEPALIVE", "20"))
+AI_CLIENT_TIMEOUT_SECONDS = float(os.getenv("AI_CLIENT_TIMEOUT_SECONDS", "60"))
 
 # Configuración del modelo de embeddings
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
 EMBEDDING_DIMENSION = int(os.getenv("EMBEDDING_DIMENSION", "1536"))
 
+# Modelo local de sentence-transformers que comparten el chat y la carga de documentos
+SENTENCE_TRANSFORMER_MODEL = os.getenv("SENTENCE_TRANSFORMER_MODEL", "all-MiniLM-L6-v2")
+
+# Micro-batching de los embeddings de las consultas del chat
+EMBEDDING_BATCH_MAX_SIZE = int(os.getenv("EMBEDDING_BATCH_MAX_SIZE", "32"))
+EMBEDDING_BATCH_MAX_WAIT_MS = float(os.getenv("EMBEDDING_BATCH_MAX_WAIT_MS", "5"))
+
+# Caché de embeddings: LRU en memoria y archivo SQLite (vacío para desactivar el disco)
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "cache/embeddings.sqlite")
+EMBEDDING_CACHE_MEMORY_ITEMS = int(os.getenv("EMBEDDING_CACHE_MEMORY_ITEMS", "10000"))
+
+# Cliente HTTP asíncrono del servicio de FAISS (pool compartido, timeouts y reintentos)
+FAISS_SERVICE_URL = os.getenv("FAISS_SERVICE_URL", "http://faiss:8001")
+FAISS_CLIENT_MAX_CONNECTIONS = int(os.getenv("FAISS_CLIENT_MAX_CONNECTIONS", "50"))
+FAISS_CLIENT_MAX_KEEPALIVE = int(os.getenv("FAISS_CLIENT_MAX_KEEPALIVE", "20"))
+FAISS_CLIENT_TIMEOUT_SECONDS = float(os.getenv("FAISS_CLIENT_TIMEOUT_SECONDS", "10"))
+FAISS_CLIENT_CONNECT_TIMEOUT_SECONDS = float(os.getenv("FAISS_CLIENT_CONNECT_TIMEOUT_SECONDS", "2"))
+FAISS_CLIENT_RETRIES = int(os.getenv("FAISS_CLIENT_RETRIES", "2"))
+FAISS_CLIENT_BACKOFF_SECONDS = float(os.getenv("FAISS_CLIENT_BACKOFF_SECONDS", "0.1"))
+
+# Caché de respuestas del chat: coincidencia exacta y, con RAG, por similitud del embedding de la pregunta
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "3600"))
+RESPONSE_CACHE_SIMILARITY_THRESHOLD = float(os.getenv("RESPONSE_CACHE_SIMILARITY_THRESHOLD", "0.95"))
+# Las respuestas con MCP dependen de datos en vivo de las tools: 0 = no se guardan; si se activa, no superar
+# TOOL_CACHE_TTL_SECONDS
+RESPONSE_CACHE_MCP_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_MCP_TTL_SECONDS", "0"))
+
+# Servidor MCP: una sola sesión SSE persistente para todas las llamadas a tools
+MCP_SERVER_URL = os.getenv("MCP_SERVER_URL", "http://mcp:8003/sse")
+MCP_CALL_TIMEOUT_SECONDS = float(os.getenv("MCP_CALL_TIMEOUT_SECONDS", "15"))
+# Tras un fallo al conectar, las llamadas van directo a las tools locales durante este tiempo
+MCP_RETRY_AFTER_SECONDS = float(os.getenv("MCP_RETRY_AFTER_SECONDS", "30"))
+
+# Tools ejecutadas en local cuando el servidor MCP no responde: API de cambios y caché de resultados
+USD_RATES_URL = os.getenv("USD_RATES_URL", "https://open.er-api.com/v6/latest/USD")
+USD_RATES_TIMEOUT_SECONDS = float(os.getenv("USD_RATES_TIMEOUT_SECONDS", "10"))
+TOOL_CACHE_TTL_SECONDS = float(os.getenv("TOOL_CACHE_TTL_SECONDS", "300"))
+
+# Caché en memoria del texto de los chunks más consultados por el RAG
+CHUNK_CACHE_MAX_ITEMS = int(os.getenv("CHUNK_CACHE_MAX_ITEMS", "5000"))
+
+# Búsqueda del RAG en FAISS: "vector" (similitud coseno) o "hybrid" (vectores + BM25, encuentra códigos y
+# nombres exactos). En "hybrid" el score de cada resultado es un valor RRF (~0.01-0.03), no una similitud
+RAG_SEARCH_MODE = os.getenv("RAG_SEARCH_MODE", "vector")
+
+# Presupuesto de tokens del contexto RAG (0 = sin límite), contado con el tokenizador local
+RAG_CONTEXT_MAX_TOKENS = int(os.getenv("RAG_CONTEXT_MAX_TOKENS", "1500"))
+
 # Configuración basica de RAG y definición de roles en la documentación
 RAG_DATA_PATH = os.getenv("RAG_DATA_PATH", "docs")
 MAX_RETRIEVED_DOCUMENTS = int(os.getenv("MAX_RETRIEVED_DOCUMENTS", "5"))
@@ -35,4 +102,15 @@ ROLE_MAPPING = {
     "DEV": 2,
     "HR": 3,
     "ALL": 4
-}
\ No newline at end of file
+}
+
+# Pipeline de carga de documentos (lectura en paralelo -> embeddings por batch -> escritura bulk)
+INGEST_READ_WORKERS = int(os.getenv("INGEST_READ_WORKERS", "4"))
+INGEST_EMBED_BATCH_SIZE = int(os.getenv("INGEST_EMBED_BATCH_SIZE", "64"))
+INGEST_WRITE_BATCH_SIZE = int(os.getenv("INGEST_WRITE_BATCH_SIZE", "256"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "1024"))
+
+# Chunks de los documentos: cortes en párrafos/frases/palabras, lectura de archivos por bloques
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1000"))
+CHUNK_OVERLAP_CHARS = int(os.getenv("CHUNK_OVERLAP_CHARS", "200"))
+CHUNK_READ_BLOCK_CHARS = int(os.getenv("CHUNK_READ_BLOCK_CHARS", str(1 << 20)))
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Recall / latency benchmark for the FAISS microservice.
+
+Builds a synthetic 384-d corpus (or loads one from a .npy file) at several
+sizes and, for every index type and role-filter setting, measures:
+
+- build time and memory footprint of the VectorStore,
+- QPS and p50/p95/p99 latency of single-query searches straight on the store,
+- the same through the HTTP endpoints, in-process with FastAPI's TestClient,
+- recall@k against an exact Flat baseline over the same data.
+
+Results are written as JSON so runs can be compared across commits:
+
+    python benchmark.py --sizes 10000 100000 --index-types Flat "IVF1024,Flat" HNSW32 --out bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Any, Dict, List
+
+import faiss
+import numpy as np
+
+from service_settings import DIMENSION
+from vector_store import VectorStore
+import wire_format
+
+ROLE_IDS = [1, 2, 3, 4]
+
+
+def synthetic_corpus(size: int, dimension: int, seed: int = 0, clusters: int = 256) -> np.ndarray:
+    """Clustered, normalized vectors; closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    corpus = np.empty((size, dimension), dtype=np.float32)
+    for start in range(0, size, 100000):
+        end = min(size, start + 100000)
+        assignment = rng.integers(0, clusters, end - start)
+        corpus[start:end] = centers[assignment] + 0.5 * rng.standard_normal((end - start, dimension), dtype=np.float32)
+    faiss.normalize_L2(corpus)
+    return corpus
+
+
+def make_queries(corpus: np.ndarray, count: int, seed: int = 1) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    queries = corpus[rng.integers(0, len(corpus), count)] + 0.1 * rng.standard_normal((count, corpus.shape[1]), dtype=np.float32)
+    faiss.normalize_L2(queries)
+    return queries
+
+
+def build_store(corpus: np.ndarray, roles: np.ndarray, index_factory: str, batch_size: int = 10000) -> VectorStore:
+    # Se carga como Flat y el índice ANN se entrena una sola vez al final, con cada rol completo
+    store = VectorStore(corpus.shape[1], index_factory="Flat", train_min_vectors=0)
+    for start in range(0, len(corpus), batch_size):
+        end = min(len(corpus), start + batch_size)
+        store.add([f"doc_{i}" for i in range(start, end)], corpus[start:end],
+                  [{"role_id": int(role)} for role in roles[start:end]])
+    if index_factory.strip().lower() != "flat":
+        store.rebuild(index_factory)
+    return store
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "qps": len(latencies) / max(float(np.sum(latencies)), 1e-9),
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "p99_ms": float(np.percentile(latencies_ms, 99))
+    }
+
+
+def recall_at_k(results: List[List[str]], truth: List[List[str]], k: int) -> float:
+    hits = [len(set(found) & set(expected)) / max(1, min(k, len(expected))) for found, expected in zip(results, truth)]
+    return float(np.mean(hits)) if hits else 0.0
+
+
+def footprint_bytes(store: VectorStore) -> int:
+    """Bytes held by the store: index codes, labels and the id/metadata columns."""
+    return int(store.memory_usage()["total_bytes"])
+
+
+def search_direct(store: VectorStore, queries: np.ndarray, query_roles: np.ndarray, k: int, search_params: Dict[str, Any]):
+    latencies, found = [], []
+    for query, role_id in zip(queries, query_roles):
+        start = time.perf_counter()
+        results = store.search(query.reshape(1, -1), k, int(role_id), **search_params)[0]
+        latencies.append(time.perf_counter() - start)
+        found.append([result["id"] for result in results])
+    return latencies, found
+
+
+def search_http(store: VectorStore, queries: np.ndarray, query_roles: np.ndarray, k: int, search_params: Dict[str, Any]):
+    """Single-query searches through /search_batch/binary, in-process (needs httpx for TestClient)."""
+    from fastapi.testclient import TestClient
+    import main
+
+    main.store = store
+    client = TestClient(main.app)
+    latencies = []
+    for query, role_id in zip(queries, query_roles):
+        body = wire_format.encode(query.reshape(1, -1), {"k": k, "role_id": int(role_id), "normalized": True, **search_params})
+        start = time.perf_counter()
+        response = client.post("/search_batch/binary", content=body, headers={"Content-Type": wire_format.CONTENT_TYPE})
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+    return latencies
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args) -> Dict[str, Any]:
+    search_params = {"nprobe": args.nprobe, "ef_search": args.ef_search}
+    base = np.load(args.corpus, mmap_mode="r") if args.corpus else None
+    results = []
+
+    for size in args.sizes:
+        corpus = np.ascontiguousarray(base[:size], dtype=np.float32) if base is not None else synthetic_corpus(size, DIMENSION)
+        if base is not None:
+            faiss.normalize_L2(corpus)
+        queries = make_queries(corpus, args.queries)
+        rng = np.random.default_rng(2)
+
+        for role_filter in args.role_filters:
+            # Sin filtro todo vive en un solo rol; con filtro el corpus se reparte entre los roles
+            roles = rng.choice(ROLE_IDS, len(corpus)) if role_filter == "on" else np.full(len(corpus), ROLE_IDS[-1])
+            query_roles = rng.choice(ROLE_IDS, len(queries)) if role_filter == "on" else np.full(len(queries), ROLE_IDS[-1])
+
+            baseline = build_store(corpus, roles, "Flat")
+            _, truth = search_direct(baseline, queries, query_roles, args.k, {})
+            del baseline
+
+            for index_factory in args.index_types:
+                print(f"size={size} role_filter={role_filter} index={index_factory}")
+                start = time.perf_counter()
+                store = build_store(corpus, roles, index_factory)
+                build_seconds = time.perf_counter() - start
+
+                latencies, found = search_direct(store, queries, query_roles, args.k, search_params)
+                entry = {
+                    "size": size,
+                    "role_filter": role_filter,
+                    "index_type": index_factory,
+                    "build_seconds": build_seconds,
+                    "memory_bytes": footprint_bytes(store),
+                    f"recall@{args.k}": recall_at_k(found, truth, args.k),
+                    "direct": latency_summary(latencies)
+                }
+                if not args.skip_http:
+                    http_queries = min(len(queries), args.http_queries)
+                    entry["http"] = latency_summary(search_http(store, queries[:http_queries], query_roles[:http_queries], args.k, search_params))
+                results.append(entry)
+                print(json.dumps(entry))
+                del store
+
+    return {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count(), "faiss": faiss.__version__},
+        "params": {key: value for key, value in vars(args).items() if key != "out"},
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall/latency benchmark for the FAISS service")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--index-types", nargs="+", default=["Flat", "IVF1024,Flat", "IVF1024,PQ48", "HNSW32"])
+    parser.add_argument("--role-filters", nargs="+", choices=["on", "off"], default=["off", "on"])
+    parser.add_argument("--corpus", help="Optional .npy file with (n, 384) vectors instead of synthetic data")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--http-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--ef-search", type=int, default=64)
+    parser.add_argument("--skip-http", action="store_true", help="Only benchmark the store, not the endpoints")
+    parser.add_argument("--out", default="bench_faiss.json")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
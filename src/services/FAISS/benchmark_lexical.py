@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+BM25 / hybrid search benchmark for the FAISS microservice.
+
+Builds a VectorStore with synthetic chunk texts (each with a product code)
+and random vectors, then measures:
+
+- build time and memory of the lexical index next to the vectors,
+- p50/p95 latency of BM25-only, vector-only and hybrid (RRF) searches,
+- how often the chunk holding a queried product code is in the top k,
+  for vector-only vs hybrid search.
+
+    python benchmark_lexical.py --sizes 10000 100000 --out bench_lexical.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+
+from service_settings import DIMENSION, HYBRID_CANDIDATES, HYBRID_RRF_K
+from vector_store import VectorStore
+
+ROLE_IDS = [1, 2, 3, 4]
+
+
+def synthetic_texts(size: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    syllables = ["ca", "de", "li", "mo", "ra", "to", "ven", "sor", "pla", "nes", "ti", "gu", "ser", "cion", "bre"]
+    vocabulary = ["".join(rng.choice(syllables) for _ in range(rng.randint(1, 4))) for _ in range(20000)]
+    return [" ".join(rng.choices(vocabulary, k=150)) + f" producto PX-{i:07d}." for i in range(size)]
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "mean_ms": float(np.mean(latencies_ms))
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run_size(size: int, args) -> Dict[str, Any]:
+    rng = np.random.default_rng(0)
+    texts = synthetic_texts(size)
+    vectors = rng.standard_normal((size, DIMENSION), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    roles = [ROLE_IDS[i % len(ROLE_IDS)] for i in range(size)]
+
+    store = VectorStore(DIMENSION)
+    start = time.perf_counter()
+    for first in range(0, size, 10000):
+        rows = slice(first, first + 10000)
+        store.add([f"chunk_{i}" for i in range(first, min(size, first + 10000))], vectors[rows],
+                  [{"role_id": role} for role in roles[rows]], texts[rows])
+    store.lexical.merge()
+    build_seconds = time.perf_counter() - start
+
+    # Consultas con el código de un producto y un vector con ruido cerca de su chunk
+    targets = rng.integers(0, size, args.queries)
+    queries = vectors[targets] + args.noise * rng.standard_normal((args.queries, DIMENSION), dtype=np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    query_texts = [f"¿qué es el PX-{target:07d}?" for target in targets]
+
+    timings = {"lexical": [], "vector": [], "hybrid": []}
+    found = {"vector": 0, "hybrid": 0}
+    for target, query, text in zip(targets, queries, query_texts):
+        role_id, expected = roles[target], f"chunk_{target}"
+        start = time.perf_counter()
+        store.lexical.search(text, args.k, role_id)
+        timings["lexical"].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        results = store.search(query.reshape(1, -1), args.k, role_id)[0]
+        timings["vector"].append(time.perf_counter() - start)
+        found["vector"] += any(result["id"] == expected for result in results)
+
+        start = time.perf_counter()
+        results = store.search_hybrid(query.reshape(1, -1), [text], args.k, role_id, HYBRID_CANDIDATES, HYBRID_RRF_K)[0]
+        timings["hybrid"].append(time.perf_counter() - start)
+        found["hybrid"] += any(result["id"] == expected for result in results)
+
+    memory = store.memory_usage()
+    return {
+        "size": size,
+        "build_seconds": round(build_seconds, 3),
+        "lexical": store.lexical_stats(),
+        "lexical_bytes_per_chunk": memory["lexical_bytes"] / size,
+        "vector_bytes_per_chunk": memory["vector_bytes"] / size,
+        "latency": {name: latency_summary(values) for name, values in timings.items()},
+        "code_hit_rate": {name: count / args.queries for name, count in found.items()}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BM25 and hybrid search benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--noise", type=float, default=0.2, help="Noise added to the query vectors (per dimension)")
+    parser.add_argument("--out", default="bench_lexical.json")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        result = run_size(size, args)
+        results.append(result)
+        print(json.dumps(result))
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {key: value for key, value in vars(args).items() if key != "out"},
+        "results": results
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
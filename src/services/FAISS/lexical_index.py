@@ -0,0 +1,245 @@
+"""
+BM25 inverted index over the chunk texts, kept next to the vector indexes.
+
+Documents are identified by the same integer labels as the vectors. Postings
+live in two segments:
+
+- a compacted segment in CSR form (term offsets, labels as int32, term
+  frequencies as uint16), where every posting costs 6 bytes,
+- a small pending segment of per-term arrays that takes new documents and is
+  merged into the compacted one once it grows past merge_threshold postings.
+
+Deleted documents get length 0 and are ignored by queries; their postings are
+dropped at the next merge. Until then they still count in the document
+frequency of their terms, as in most inverted indexes.
+
+Query terms found in more than max_df_ratio of the documents are skipped:
+their BM25 weight is close to zero but scanning their postings is the most
+expensive part of a query.
+"""
+
+import os
+import re
+import unicodedata
+from array import array
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+_WORDS = re.compile(r"\w+")
+_COMBINING_MARKS = re.compile(r"[\u0300-\u036f]")
+MAX_TF = np.iinfo(np.uint16).max
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase words without accents, so "Código" and "codigo" match."""
+    if not text.isascii():
+        text = _COMBINING_MARKS.sub("", unicodedata.normalize("NFKD", text))
+    return _WORDS.findall(text.casefold())
+
+
+class LexicalIndex:
+    """
+    BM25 over labels with role filtering. Not thread-safe on its own: the
+    VectorStore calls it under its lock.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, merge_threshold: int = 100000, max_df_ratio: float = 0.5):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1 (float): BM25 term frequency saturation.
+            b (float): BM25 length normalization.
+            merge_threshold (int): Pending postings that trigger a merge into the compacted segment.
+            max_df_ratio (float): Query terms in a larger share of the documents are ignored.
+        """
+        self.k1 = k1
+        self.b = b
+        self.merge_threshold = merge_threshold
+        self.max_df_ratio = max_df_ratio
+        self.vocabulary: Dict[str, int] = {}
+        self.roles: List[Any] = []           # código -> role_id
+        self._role_codes: Dict[Any, int] = {}
+        # Segmento compactado (CSR)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.labels = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.uint16)
+        # Segmento pendiente
+        self._pending: Dict[int, Tuple[array, array]] = {}
+        self._pending_postings = 0
+        # Por label: longitud del documento (0 = sin texto o borrado) y código de rol
+        self.doc_lengths = np.zeros(0, dtype=np.int32)
+        self.doc_roles = np.zeros(0, dtype=np.int32)
+        self.documents = 0
+        self.total_length = 0
+
+    def _ensure_capacity(self, size: int) -> None:
+        if size <= len(self.doc_lengths):
+            return
+        capacity = max(size, 2 * len(self.doc_lengths), 1024)
+        lengths = np.zeros(capacity, dtype=np.int32)
+        lengths[:len(self.doc_lengths)] = self.doc_lengths
+        roles = np.full(capacity, -1, dtype=np.int32)
+        roles[:len(self.doc_roles)] = self.doc_roles
+        self.doc_lengths, self.doc_roles = lengths, roles
+
+    def _role_code(self, role_id) -> int:
+        code = self._role_codes.get(role_id)
+        if code is None:
+            code = len(self.roles)
+            self.roles.append(role_id)
+            self._role_codes[role_id] = code
+        return code
+
+    def has_text(self, label: int) -> bool:
+        return label < len(self.doc_lengths) and self.doc_lengths[label] > 0
+
+    def add(self, labels: List[int], texts: List[str], role_ids: List[Any]) -> None:
+        """Index the text of new labels. Empty texts are skipped."""
+        if labels:
+            self._ensure_capacity(max(labels) + 1)
+        for label, text, role_id in zip(labels, texts, role_ids):
+            tokens = tokenize(text or "")
+            if not tokens or self.doc_lengths[label] > 0:
+                continue
+            counts = Counter(tokens)
+            for token, count in counts.items():
+                term = self.vocabulary.setdefault(token, len(self.vocabulary))
+                postings = self._pending.get(term)
+                if postings is None:
+                    postings = self._pending[term] = (array('i'), array('H'))
+                postings[0].append(label)
+                postings[1].append(min(count, MAX_TF))
+            self._pending_postings += len(counts)
+            self.doc_lengths[label] = len(tokens)
+            self.doc_roles[label] = self._role_code(role_id)
+            self.documents += 1
+            self.total_length += len(tokens)
+        if self._pending_postings >= self.merge_threshold:
+            self.merge()
+
+    def remove(self, labels: List[int]) -> None:
+        """Forget labels; their postings are dropped at the next merge."""
+        for label in labels:
+            if self.has_text(label):
+                self.documents -= 1
+                self.total_length -= int(self.doc_lengths[label])
+                self.doc_lengths[label] = 0
+                self.doc_roles[label] = -1
+
+    def merge(self) -> None:
+        """Fold the pending segment into the compacted one, dropping deleted documents."""
+        terms = [np.repeat(np.arange(len(self.offsets) - 1, dtype=np.int64), np.diff(self.offsets))]
+        labels = [self.labels]
+        tfs = [self.tfs]
+        for term, (term_labels, term_tfs) in self._pending.items():
+            terms.append(np.full(len(term_labels), term, dtype=np.int64))
+            labels.append(np.frombuffer(term_labels, dtype=np.int32).copy())
+            tfs.append(np.frombuffer(term_tfs, dtype=np.uint16).copy())
+        terms, labels, tfs = np.concatenate(terms), np.concatenate(labels), np.concatenate(tfs)
+
+        alive = self.doc_lengths[labels] > 0 if len(labels) else np.zeros(0, dtype=bool)
+        terms, labels, tfs = terms[alive], labels[alive], tfs[alive]
+        order = np.argsort(terms, kind="stable")
+        self.labels, self.tfs = labels[order], tfs[order]
+        self.offsets = np.zeros(len(self.vocabulary) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=len(self.vocabulary)), out=self.offsets[1:])
+        self._pending = {}
+        self._pending_postings = 0
+
+    def _document_frequency(self, term: int) -> int:
+        compacted = self.offsets[term + 1] - self.offsets[term] if term + 1 < len(self.offsets) else 0
+        pending = self._pending.get(term)
+        return int(compacted) + (len(pending[0]) if pending is not None else 0)
+
+    def _postings(self, term: int) -> Tuple[np.ndarray, np.ndarray]:
+        if term + 1 < len(self.offsets):
+            start, end = self.offsets[term], self.offsets[term + 1]
+            labels, tfs = self.labels[start:end], self.tfs[start:end]
+        else:
+            labels, tfs = self.labels[:0], self.tfs[:0]
+        pending = self._pending.get(term)
+        if pending is not None:
+            labels = np.concatenate([labels, np.frombuffer(pending[0], dtype=np.int32)])
+            tfs = np.concatenate([tfs, np.frombuffer(pending[1], dtype=np.uint16)])
+        return labels, tfs
+
+    def search(self, query: str, k: int, role_id=None) -> List[Tuple[int, float]]:
+        """
+        Best k labels for a query, optionally only among the documents of a role.
+
+        Returns:
+            List[Tuple[int, float]]: (label, BM25 score), best first.
+        """
+        if self.documents == 0 or k <= 0:
+            return []
+        role_code = self._role_codes.get(role_id) if role_id is not None else None
+        if role_id is not None and role_code is None:
+            return []
+
+        average_length = self.total_length / self.documents
+        found_labels, found_scores = [], []
+        max_df = max(1, self.max_df_ratio * self.documents)
+        for term in dict.fromkeys(self.vocabulary[token] for token in tokenize(query) if token in self.vocabulary):
+            document_frequency = self._document_frequency(term)
+            if not document_frequency or document_frequency > max_df:
+                continue
+            labels, tfs = self._postings(term)
+            idf = np.log1p((self.documents - len(labels) + 0.5) / (len(labels) + 0.5))
+            lengths = self.doc_lengths[labels]
+            keep = lengths > 0
+            if role_code is not None:
+                keep &= self.doc_roles[labels] == role_code
+            labels, tfs, lengths = labels[keep], tfs[keep].astype(np.float32), lengths[keep]
+            norm = self.k1 * (1 - self.b + self.b * lengths / average_length)
+            found_labels.append(labels)
+            found_scores.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+        if not found_labels:
+            return []
+
+        labels, inverse = np.unique(np.concatenate(found_labels), return_inverse=True)
+        if not len(labels):
+            return []
+        scores = np.bincount(inverse, weights=np.concatenate(found_scores))
+        top = np.argpartition(-scores, k - 1)[:k] if len(scores) > k else np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(labels[i]), float(scores[i])) for i in top]
+
+    def memory_bytes(self) -> int:
+        pending = sum(labels.itemsize * len(labels) + tfs.itemsize * len(tfs) for labels, tfs in self._pending.values())
+        return int(self.offsets.nbytes + self.labels.nbytes + self.tfs.nbytes + self.doc_lengths.nbytes
+                   + self.doc_roles.nbytes + pending)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "documents": self.documents,
+            "terms": len(self.vocabulary),
+            "postings": int(len(self.labels)) + self._pending_postings,
+            "pending_postings": self._pending_postings,
+            "memory_bytes": self.memory_bytes()
+        }
+
+    def save(self, path: str) -> Dict[str, Any]:
+        """Write the index into a snapshot directory; returns the entries for state.json."""
+        self.merge()
+        np.savez(os.path.join(path, "lexical.npz"), offsets=self.offsets, labels=self.labels, tfs=self.tfs,
+                 doc_lengths=self.doc_lengths, doc_roles=self.doc_roles)
+        return {"file": "lexical.npz", "vocabulary": list(self.vocabulary), "roles": self.roles}
+
+    def load(self, path: str, state: Optional[Dict[str, Any]]) -> None:
+        """Restore from a snapshot directory; an older snapshot without lexical data leaves it empty."""
+        if not state:
+            return
+        with np.load(os.path.join(path, state["file"])) as data:
+            self.offsets, self.labels, self.tfs = data["offsets"], data["labels"], data["tfs"]
+            self.doc_lengths, self.doc_roles = data["doc_lengths"], data["doc_roles"]
+        self.vocabulary = {term: number for number, term in enumerate(state["vocabulary"])}
+        self.roles = []
+        self._role_codes = {}
+        for role_id in state["roles"]:
+            self._role_code(role_id)
+        alive = self.doc_lengths > 0
+        self.documents = int(alive.sum())
+        self.total_length = int(self.doc_lengths[alive].sum())
@@ -4,110 +4,249 @@ Basic FAISS microservice using FastAPI.
 Provides endpoints for adding vectors and searching similar vectors.
 """
 
+import asyncio
+from contextlib import asynccontextmanager
 import numpy as np
-from fastapi import FastAPI, HTTPException
-from typing import List, Tuple
-import faiss
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from typing import Any, Dict, List, Optional, Tuple
 from models import *
-
-app = FastAPI(title="FAISS Microservice", version="1.0.0")
+from service_settings import (DIMENSION, SNAPSHOT_DIR, SNAPSHOT_INTERVAL_SECONDS, SNAPSHOT_MMAP,
+                              INDEX_FACTORY, TRAIN_MIN_VECTORS, TRAIN_SAMPLE_SIZE, BM25_K1, BM25_B,
+                              BM25_MAX_DF_RATIO, LEXICAL_MERGE_THRESHOLD, HYBRID_CANDIDATES, HYBRID_RRF_K)
+from vector_store import VectorStore
+import wire_format
 
 # Servidor y exposición de los enpoints del servicio de FAISS
+# Los endpoints que usan el store son def (o lo llaman con run_in_threadpool): su lock puede estar
+# tomado por un rebuild o un snapshot durante segundos y no debe bloquear el event loop
+
+dimension = DIMENSION
+store = VectorStore(dimension, index_factory=INDEX_FACTORY, train_min_vectors=TRAIN_MIN_VECTORS,
+                    train_sample_size=TRAIN_SAMPLE_SIZE,
+                    lexical_options={"k1": BM25_K1, "b": BM25_B, "max_df_ratio": BM25_MAX_DF_RATIO,
+                                     "merge_threshold": LEXICAL_MERGE_THRESHOLD})
+
+
+async def snapshot_periodically():
+    """Write a snapshot every SNAPSHOT_INTERVAL_SECONDS if something changed."""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(SNAPSHOT_INTERVAL_SECONDS)
+        if store.dirty:
+            try:
+                await loop.run_in_executor(None, store.save, SNAPSHOT_DIR)
+            except Exception as e:
+                print(f"Snapshot failed: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Restauración del último snapshot (memory-mapped) antes de aceptar peticiones
+    try:
+        if store.load(SNAPSHOT_DIR, mmap=SNAPSHOT_MMAP):
+            print(f"Restored {store.ntotal} vectors from {store.snapshot['path']}")
+    except Exception as e:
+        print(f"Could not restore snapshot from {SNAPSHOT_DIR}: {e}")
+
+    timer = asyncio.create_task(snapshot_periodically()) if SNAPSHOT_INTERVAL_SECONDS > 0 else None
+    yield
+    if timer is not None:
+        timer.cancel()
+    if store.dirty:
+        try:
+            store.save(SNAPSHOT_DIR)
+        except Exception as e:
+            print(f"Final snapshot failed: {e}")
+
+
+app = FastAPI(title="FAISS Microservice", version="1.0.0", lifespan=lifespan)
+
+
+def to_matrix(vectors) -> np.ndarray:
+    """Build a float32 matrix of row vectors normalized for cosine similarity."""
+    try:
+        matrix = np.array(vectors, dtype=np.float32)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Vector dimension must be {dimension}")
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    if matrix.ndim != 2 or matrix.shape[1] != dimension:
+        raise HTTPException(status_code=400, detail=f"Vector dimension must be {dimension}")
 
-dimension = 384  
-index = faiss.IndexFlatIP(dimension)
-id_to_vector = {}  
-vector_to_id = {}  
-id_to_metadata = {}  
-next_id = 0
-
-
-
-@app.post("/add_vector")
-async def add_vector(data: VectorData):
-    """Add a vector to the FAISS index."""
-    global next_id
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    matrix /= norms
+    return matrix
+
+
+def read_binary(request: Request, body: bytes) -> Tuple[Dict[str, Any], np.ndarray]:
+    """Decode a binary wire format body, normalizing the vectors unless the sender already did."""
+    if request.headers.get("content-type", "").split(";")[0].strip() != wire_format.CONTENT_TYPE:
+        raise HTTPException(status_code=415, detail=f"Content type must be {wire_format.CONTENT_TYPE}")
+    try:
+        header, matrix = wire_format.decode(body)
+    except (ValueError, KeyError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid binary payload: {e}")
+    if matrix.shape[1] != dimension:
+        raise HTTPException(status_code=400, detail=f"Vector dimension must be {dimension}")
+    if not header.get("normalized"):
+        matrix = to_matrix(matrix)
+    return header, matrix
 
-    vector = np.array(data.vector, dtype=np.float32)
 
-    if len(vector) != dimension:
-        raise HTTPException(status_code=400, detail=f"Vector dimension must be {dimension}")
+def check_texts(texts: Optional[List[str]], count: int) -> None:
+    if texts and len(texts) != count:
+        raise HTTPException(status_code=400, detail="texts must have one entry per vector")
 
-    # Normalize vector for cosine similarity
-    norm = np.linalg.norm(vector)
-    if norm > 0:
-        vector = vector / norm
 
-    # Add to FAISS index
-    index.add(vector.reshape(1, -1))
+def run_search(matrix: np.ndarray, k: int, role_id, nprobe: int = None, ef_search: int = None,
+               mode: str = "vector", texts: Optional[List[str]] = None) -> List[List[Dict[str, Any]]]:
+    """Vector search, or vector + BM25 fused with RRF when mode is "hybrid"."""
+    if mode == "vector":
+        return store.search(matrix, k, role_id, nprobe, ef_search)
+    if mode != "hybrid":
+        raise HTTPException(status_code=400, detail=f"Unknown search mode '{mode}'")
+    if not texts or len(texts) != len(matrix):
+        raise HTTPException(status_code=400, detail="Hybrid search needs one query text per vector")
+    return store.search_hybrid(matrix, texts, k, role_id, HYBRID_CANDIDATES, HYBRID_RRF_K, nprobe, ef_search)
 
-    # Store mapping
-    id_to_vector[data.id] = vector
-    vector_to_id[next_id] = data.id
-    id_to_metadata[data.id] = data.metadata
-    next_id += 1
 
-    return {"message": f"Vector with ID '{data.id}' added successfully"}
+@app.post("/add_vector")
+def add_vector(data: VectorData):
+    """Add a vector to the FAISS index, replacing any vector with the same ID."""
+    replaced = store.add([data.id], to_matrix(data.vector), [data.metadata], [data.text] if data.text else None)
+    action = "replaced" if replaced else "added"
+    return {"message": f"Vector with ID '{data.id}' {action} successfully"}
+
+@app.post("/add_vectors")
+def add_vectors(data: VectorBatch):
+    """Add a batch of vectors to the FAISS index in one request."""
+    if not data.ids:
+        return {"message": "No vectors to add", "count": 0}
+
+    metadatas = data.metadata or [{} for _ in data.ids]
+    if len(data.vectors) != len(data.ids) or len(metadatas) != len(data.ids):
+        raise HTTPException(status_code=400, detail="ids, vectors and metadata must have the same length")
+    check_texts(data.texts, len(data.ids))
+
+    replaced = store.add(data.ids, to_matrix(data.vectors), metadatas, data.texts)
+    return {"message": f"{len(data.ids)} vectors added successfully", "count": len(data.ids), "replaced": replaced}
+
+@app.post("/add_vectors/binary")
+async def add_vectors_binary(request: Request):
+    """Add a batch of vectors sent in the binary wire format."""
+    header, matrix = read_binary(request, await request.body())
+    ids = header.get("ids", [])
+    metadatas = header.get("metadata") or [{} for _ in ids]
+    if len(ids) != len(matrix) or len(metadatas) != len(ids):
+        raise HTTPException(status_code=400, detail="ids, vectors and metadata must have the same length")
+    if not ids:
+        return {"message": "No vectors to add", "count": 0}
+    texts = header.get("texts")
+    check_texts(texts, len(ids))
+
+    replaced = await run_in_threadpool(store.add, ids, matrix, metadatas, texts)
+    return {"message": f"{len(ids)} vectors added successfully", "count": len(ids), "replaced": replaced}
 
 @app.post("/search", response_model=List[SearchResult])
-async def search_similar(query: SearchQuery):
-    """Search for similar vectors in the index."""
-    if index.ntotal == 0:
+def search_similar(query: SearchQuery):
+    """Search for similar vectors in the index; mode "hybrid" also ranks the query text with BM25."""
+    texts = [query.text] if query.text is not None else None
+    return run_search(to_matrix(query.vector), query.k, query.role_id, query.nprobe, query.ef_search,
+                      query.mode, texts)[0]
+
+@app.post("/search_batch", response_model=List[List[SearchResult]])
+def search_batch(query: SearchBatchQuery):
+    """Search several query vectors at once, returning one result list per query."""
+    if not query.vectors:
         return []
-
-    vector = np.array(query.vector, dtype=np.float32)
-
-    if len(vector) != dimension:
-        raise HTTPException(status_code=400, detail=f"Vector dimension must be {dimension}")
-
-    # Normalize query vector
-    norm = np.linalg.norm(vector)
-    if norm > 0:
-        vector = vector / norm
-
-    # Search
-    D, I = index.search(vector.reshape(1, -1), min(query.k, index.ntotal))
-
-    results = []
-    for score, idx in zip(D[0], I[0]):
-        if idx != -1:  # Valid result
-            result_id = vector_to_id.get(idx, "unknown")
-            metadata = id_to_metadata.get(result_id, {})
-            if metadata.get('role_id') == query.role_id:
-                results.append(SearchResult(id=result_id, score=float(score), metadata=metadata))
-
-    return results
+    return run_search(to_matrix(query.vectors), query.k, query.role_id, query.nprobe, query.ef_search,
+                      query.mode, query.texts)
+
+@app.post("/search_batch/binary", response_model=List[List[SearchResult]])
+async def search_batch_binary(request: Request):
+    """Search several query vectors sent in the binary wire format."""
+    header, matrix = read_binary(request, await request.body())
+    if len(matrix) == 0:
+        return []
+    return await run_in_threadpool(run_search, matrix, int(header.get("k", 5)), header.get("role_id", 4),
+                                   header.get("nprobe"), header.get("ef_search"), header.get("mode", "vector"),
+                                   header.get("texts"))
 
 @app.get("/status")
-async def get_status():
+def get_status():
     """Get index status."""
     return {
-        "total_vectors": index.ntotal,
+        "total_vectors": store.ntotal,
         "dimension": dimension,
-        "index_type": "IndexFlatIP"
+        "index_type": store.index_factory,
+        "roles": store.index_types(),
+        "wire_formats": ["application/json", wire_format.CONTENT_TYPE],
+        "snapshot": store.snapshot_status(),
+        "memory": store.memory_usage(),
+        "lexical": store.lexical_stats(),
+        "search_modes": ["vector", "hybrid"]
     }
 
 @app.get("/get_all")
-async def get_all_vectors():
+def get_all_vectors():
     """Get all vectors in the index."""
-    return {"vectors": [{"id": vector_to_id[i], "vector": id_to_vector[vector_to_id[i]].tolist(), "metadata": id_to_metadata.get(vector_to_id[i], {})} for i in range(next_id) if i in vector_to_id]}
+    ids, matrix, metadatas = store.export()
+    return {"vectors": [{"id": vector_id, "vector": vector, "metadata": metadata} for vector_id, vector, metadata in zip(ids, matrix.tolist(), metadatas)]}
+
+@app.get("/get_all/binary")
+def get_all_vectors_binary():
+    """Export all vectors in the binary wire format, with ids and metadata in the header."""
+    ids, matrix, metadatas = store.export()
+    body = wire_format.encode(matrix, {"ids": ids, "metadata": metadatas, "normalized": True})
+    return Response(content=body, media_type=wire_format.CONTENT_TYPE)
 
 @app.get("/get_all_id")
-async def get_all_ids():
-    return {"vectors": [{"id": vector_to_id[i]} for i in range(next_id) if i in vector_to_id]}
+def get_all_ids():
+    return {"vectors": [{"id": vector_id} for vector_id in store.all_ids()]}
    
 
+@app.post("/delete_vectors")
+def delete_vectors(data: DeleteRequest):
+    """Delete vectors by ID. Unknown IDs are ignored."""
+    deleted = store.delete(data.ids)
+    return {"message": f"{deleted} vectors deleted", "count": deleted}
+
+@app.post("/index_texts")
+def index_texts(data: TextsRequest):
+    """Index the text of vectors stored without it, so they also take part in hybrid search."""
+    if len(data.texts) != len(data.ids):
+        raise HTTPException(status_code=400, detail="ids and texts must have the same length")
+    indexed = store.index_texts(data.ids, data.texts)
+    return {"message": f"{indexed} texts indexed", "count": indexed}
+
 @app.delete("/clear")
-async def clear_index():
+def clear_index():
     """Clear all vectors from the index."""
-    global index, id_to_vector, vector_to_id, id_to_metadata, next_id
-    index = faiss.IndexFlatIP(dimension)
-    id_to_vector = {}
-    vector_to_id = {}
-    id_to_metadata = {}
-    next_id = 0
+    store.clear()
     return {"message": "Index cleared"}
 
+@app.post("/rebuild")
+async def rebuild_index(data: RebuildRequest):
+    """Switch the ANN index type and rebuild it from the stored vectors, without re-embedding."""
+    loop = asyncio.get_running_loop()
+    try:
+        await loop.run_in_executor(None, store.rebuild, data.index_factory)
+    except RuntimeError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid index factory '{data.index_factory}': {e}")
+    return {"message": f"Index rebuilt as {data.index_factory}", "roles": await run_in_threadpool(store.index_types)}
+
+@app.post("/snapshot")
+async def write_snapshot():
+    """Write a snapshot of the index, ids and metadata to disk now."""
+    loop = asyncio.get_running_loop()
+    try:
+        snapshot = await loop.run_in_executor(None, store.save, SNAPSHOT_DIR)
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Snapshot failed: {e}")
+    return {"message": "Snapshot written", "snapshot": snapshot}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Literal, Optional
 
 # Modelos de los datos del servicio de FAISS
 
@@ -7,13 +7,45 @@ class VectorData(BaseModel):
     id: str
     vector: List[float]
     metadata: Dict[str, Any] = {}
+    text: Optional[str] = None  # Texto del chunk para la búsqueda léxica
 
 class SearchQuery(BaseModel):
     vector: List[float]
     k: int = 5
     role_id: int = 4
+    nprobe: Optional[int] = None     # Solo índices IVF
+    ef_search: Optional[int] = None  # Solo índices HNSW
+    mode: Literal["vector", "hybrid"] = "vector"
+    text: Optional[str] = None       # Texto de la consulta, obligatorio en modo hybrid
 
 class SearchResult(BaseModel):
     id: str
     score: float
-    metadata: Dict[str, Any] = {}
\ No newline at end of file
+    metadata: Dict[str, Any] = {}
+
+class VectorBatch(BaseModel):
+    ids: List[str]
+    vectors: List[List[float]]
+    metadata: List[Dict[str, Any]] = []
+    texts: List[str] = []
+
+class SearchBatchQuery(BaseModel):
+    vectors: List[List[float]]
+    k: int = 5
+    role_id: int = 4
+    nprobe: Optional[int] = None
+    ef_search: Optional[int] = None
+    mode: Literal["vector", "hybrid"] = "vector"
+    texts: List[str] = []
+
+class RebuildRequest(BaseModel):
+    index_factory: str
+
+
+class DeleteRequest(BaseModel):
+    ids: List[str]
+
+
+class TextsRequest(BaseModel):
+    ids: List[str]
+    texts: List[str]
@@ -0,0 +1,29 @@
+"""
+Configuration of the FAISS microservice, read from the environment.
+"""
+
+import os
+
+# Dimensión de los embeddings de all-MiniLM-L6-v2
+DIMENSION = int(os.getenv("FAISS_DIMENSION", "384"))
+
+# Snapshots del índice en disco para no re-embeber todo al reiniciar el contenedor
+SNAPSHOT_DIR = os.getenv("FAISS_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_INTERVAL_SECONDS = int(os.getenv("FAISS_SNAPSHOT_INTERVAL_SECONDS", "300"))  # 0 desactiva el timer
+SNAPSHOT_MMAP = os.getenv("FAISS_SNAPSHOT_MMAP", "true").lower() == "true"
+
+# Tipo de índice ANN por despliegue, como string de faiss.index_factory ("Flat", "IVF1024,Flat",
+# "IVF1024,PQ48", "HNSW32"...). Al entrenar el ANN de un rol se libera su IndexFlatIP: con PQ/SQ los
+# vectores exactos ya no se guardan y un /rebuild parte de los vectores reconstruidos (aproximados).
+INDEX_FACTORY = os.getenv("FAISS_INDEX_FACTORY", "Flat")
+# Un rol usa el índice ANN solo cuando tiene al menos estos vectores, antes se busca de forma exacta
+TRAIN_MIN_VECTORS = int(os.getenv("FAISS_TRAIN_MIN_VECTORS", "10000"))
+TRAIN_SAMPLE_SIZE = int(os.getenv("FAISS_TRAIN_SAMPLE_SIZE", "100000"))
+
+# Índice BM25 de los textos de los chunks y búsqueda híbrida (vector + BM25 con reciprocal rank fusion)
+BM25_K1 = float(os.getenv("FAISS_BM25_K1", "1.2"))
+BM25_B = float(os.getenv("FAISS_BM25_B", "0.75"))
+BM25_MAX_DF_RATIO = float(os.getenv("FAISS_BM25_MAX_DF_RATIO", "0.5"))  # Términos más comunes se ignoran al buscar
+LEXICAL_MERGE_THRESHOLD = int(os.getenv("FAISS_LEXICAL_MERGE_THRESHOLD", "100000"))
+HYBRID_CANDIDATES = int(os.getenv("FAISS_HYBRID_CANDIDATES", "50"))  # Resultados de cada buscador antes de fusionar
+HYBRID_RRF_K = int(os.getenv("FAISS_HYBRID_RRF_K", "60"))
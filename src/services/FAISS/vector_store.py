@@ -0,0 +1,543 @@
+"""
+In-memory state of the FAISS microservice: one sub-index per role plus the
+ids and metadata of every vector, with snapshot and restore to disk.
+"""
+
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from array import array
+from typing import Any, Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from lexical_index import LexicalIndex
+
+SNAPSHOT_VERSION = 3
+# Los snapshots v2 guardaban el índice exacto y el ANN de cada rol; al cargarlos se reconstruye el ANN
+COMPATIBLE_SNAPSHOT_VERSIONS = (2, 3)
+CURRENT_FILE = "CURRENT"
+
+
+class VectorStore:
+    """
+    Vectors split in one IndexFlatIP per role_id, so filtering by role happens
+    inside the search and costs only the size of that role.
+
+    Every vector gets an integer label (its insertion number), and the rest of
+    its data lives in columns indexed by that label: the string id and a code
+    into a table of distinct metadata dicts.
+
+    Each role keeps a single copy of its vectors. With an index_factory other
+    than "Flat", a role that reaches train_min_vectors moves from its flat
+    index to an ANN index (IVF, PQ, HNSW...) trained on a sample of its
+    vectors, and the flat copy is dropped; smaller roles keep searching the
+    flat index. Rebuilding with another type reconstructs the vectors from the
+    current index, which for PQ/SQ codes is an approximation.
+
+    Vectors added with their chunk text are also indexed by a BM25
+    LexicalIndex under the same labels, for hybrid searches.
+    """
+
+    def __init__(self, dimension: int, index_factory: str = "Flat", train_min_vectors: int = 10000,
+                 train_sample_size: int = 100000, lexical_options: Dict[str, Any] = None):
+        self.dimension = dimension
+        self.index_factory = index_factory
+        self.train_min_vectors = train_min_vectors
+        self.train_sample_size = train_sample_size
+        self.lexical_options = lexical_options or {}
+        self._lock = threading.RLock()
+        self.dirty = False
+        self.snapshot: Optional[Dict[str, Any]] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.role_indexes: Dict[Any, faiss.Index] = {}  # rol -> IndexIDMap(IndexFlatIP) o índice ANN
+        self.ids: List[Optional[str]] = []   # label -> id (None si se borró)
+        self.id_to_label: Dict[str, int] = {}
+        self.metadata_codes = array('i')     # label -> posición en metadata_table
+        self.metadata_table: List[Dict[str, Any]] = []
+        self._metadata_lookup: Dict[str, int] = {}
+        self.lexical = LexicalIndex(**self.lexical_options)
+
+    @property
+    def ntotal(self) -> int:
+        return sum(role_index.ntotal for role_index in self.role_indexes.values())
+
+    def _new_role_index(self) -> faiss.IndexIDMap:
+        return faiss.IndexIDMap(faiss.IndexFlatIP(self.dimension))
+
+    @property
+    def uses_ann(self) -> bool:
+        return self.index_factory.strip().lower() != "flat"
+
+    @staticmethod
+    def _inner(index: faiss.Index) -> faiss.Index:
+        """The index that holds the codes, without the IndexIDMap wrapper."""
+        return faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+
+    def _is_flat(self, index: faiss.Index) -> bool:
+        return isinstance(self._inner(index), faiss.IndexFlat)
+
+    def _role_vectors(self, role_id) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Vectors of a role and their labels. For a flat index it is a zero-copy
+        view, only valid under the lock; ANN indexes are reconstructed.
+        """
+        index = self.role_indexes[role_id]
+        inner = self._inner(index)
+        if isinstance(inner, faiss.IndexFlat):
+            vectors = faiss.rev_swig_ptr(inner.get_xb(), inner.ntotal * self.dimension)
+            return vectors.reshape(inner.ntotal, self.dimension), faiss.vector_to_array(index.id_map)
+        if isinstance(index, faiss.IndexIDMap):
+            labels = faiss.vector_to_array(index.id_map)
+            return inner.reconstruct_n(0, inner.ntotal), labels
+        invlists = faiss.extract_index_ivf(index).invlists
+        labels = np.concatenate([np.zeros(0, dtype=np.int64)] + [
+            faiss.rev_swig_ptr(invlists.get_ids(number), invlists.list_size(number)).copy()
+            for number in range(invlists.nlist) if invlists.list_size(number)
+        ])
+        return index.reconstruct_batch(labels), labels
+
+    def _build_ann(self, role_id) -> None:
+        """Train (on a sample) an ANN index from the vectors of a role and replace its flat index with it."""
+        vectors, labels = self._role_vectors(role_id)
+        index = faiss.index_factory(self.dimension, self.index_factory, faiss.METRIC_INNER_PRODUCT)
+        if not index.is_trained:
+            sample_size = min(len(vectors), self.train_sample_size)
+            sample = np.random.default_rng(0).choice(len(vectors), sample_size, replace=False)
+            try:
+                index.train(np.ascontiguousarray(vectors[np.sort(sample)]))
+            except RuntimeError as e:
+                # Muy pocos vectores para este tipo de índice, se sigue buscando de forma exacta
+                print(f"Could not train {self.index_factory} for role {role_id}: {e}")
+                return
+        try:
+            # Los IVF guardan los labels en sus listas; el direct map permite borrar y reconstruir por label
+            faiss.extract_index_ivf(index).set_direct_map_type(faiss.DirectMap.Hashtable)
+            ann = index
+        except RuntimeError:
+            ann = faiss.IndexIDMap2(index)
+        ann.add_with_ids(vectors, labels)
+        # Se libera la copia exacta: el ANN queda como único índice del rol
+        self.role_indexes[role_id] = ann
+
+    def _is_mapped(self, index: faiss.Index) -> bool:
+        """Whether a flat index still reads its vectors from a memory-mapped snapshot file."""
+        inner = self._inner(index)
+        return isinstance(inner, faiss.IndexFlat) and not inner.codes.is_owned
+
+    def _writable(self, role_id) -> faiss.Index:
+        """
+        The index of a role, copied to memory first if it is memory-mapped:
+        faiss aborts the process when a mapped index is resized.
+        """
+        index = self.role_indexes[role_id]
+        if self._is_mapped(index):
+            vectors, labels = self._role_vectors(role_id)
+            index = self._new_role_index()
+            index.add_with_ids(vectors, labels)
+            self.role_indexes[role_id] = index
+        return index
+
+    def _maybe_build_ann(self, role_id) -> None:
+        role_index = self.role_indexes[role_id]
+        if self.uses_ann and self._is_flat(role_index) and role_index.ntotal >= self.train_min_vectors:
+            self._build_ann(role_id)
+
+    def _reload_role(self, role_id, keep: Optional[np.ndarray] = None) -> None:
+        """Move the vectors of a role (optionally only the rows in keep) to a new flat index and retrain."""
+        vectors, labels = self._role_vectors(role_id)
+        if keep is not None:
+            vectors, labels = vectors[keep], labels[keep]
+        flat = self._new_role_index()
+        flat.add_with_ids(np.ascontiguousarray(vectors), labels)
+        self.role_indexes[role_id] = flat
+        self._maybe_build_ann(role_id)
+
+    def _remove_from_role(self, role_id, labels: np.ndarray) -> None:
+        try:
+            self._writable(role_id).remove_ids(labels)
+        except RuntimeError:
+            # Algunos índices (HNSW) no soportan borrado: se reconstruye el rol sin esos labels
+            role_labels = self._role_vectors(role_id)[1]
+            self._reload_role(role_id, keep=~np.isin(role_labels, labels))
+
+    def rebuild(self, index_factory: str = None) -> None:
+        """Switch the ANN index type (optional) and rebuild every role from its current vectors."""
+        with self._lock:
+            if index_factory is not None:
+                # Se valida el string antes de tirar los índices actuales
+                faiss.index_factory(self.dimension, index_factory, faiss.METRIC_INNER_PRODUCT)
+                self.index_factory = index_factory
+            for role_id in list(self.role_indexes):
+                self._reload_role(role_id)
+            self.dirty = True
+
+    def index_types(self) -> Dict[str, Dict[str, Any]]:
+        """Vectors and the index type actually searched for each role."""
+        with self._lock:
+            types = {}
+            for role_id, role_index in self.role_indexes.items():
+                types[str(role_id)] = {"vectors": role_index.ntotal, "index_type": type(self._inner(role_index)).__name__}
+            return types
+
+    def _search_params(self, index: faiss.Index, nprobe: int = None, ef_search: int = None):
+        """Per-request search parameters for IVF (nprobe) and HNSW (efSearch) indexes."""
+        inner = self._inner(index)
+        if ef_search and isinstance(inner, faiss.IndexHNSW):
+            return faiss.SearchParametersHNSW(efSearch=ef_search)
+        if nprobe:
+            try:
+                faiss.extract_index_ivf(inner)
+            except RuntimeError:
+                return None
+            return faiss.SearchParametersIVF(nprobe=nprobe)
+        return None
+
+    def _metadata_code(self, metadata: Dict[str, Any]) -> int:
+        """Intern a metadata dict; most chunks share the same few dicts."""
+        key = json.dumps(metadata, sort_keys=True, default=str)
+        code = self._metadata_lookup.get(key)
+        if code is None:
+            code = len(self.metadata_table)
+            self.metadata_table.append(metadata)
+            self._metadata_lookup[key] = code
+        return code
+
+    def metadata(self, label: int) -> Dict[str, Any]:
+        return self.metadata_table[self.metadata_codes[label]]
+
+    def _remove_labels(self, labels: List[int]) -> None:
+        """Remove labels from the indexes of their roles."""
+        by_role: Dict[Any, List[int]] = {}
+        for label in labels:
+            by_role.setdefault(self.metadata(label).get('role_id'), []).append(label)
+
+        for role_id, role_labels in by_role.items():
+            self._remove_from_role(role_id, np.asarray(role_labels, dtype=np.int64))
+
+        self.lexical.remove(labels)
+        for label in labels:
+            del self.id_to_label[self.ids[label]]
+            self.ids[label] = None
+
+    def add(self, ids: List[str], matrix: np.ndarray, metadatas: List[Dict[str, Any]],
+            texts: List[str] = None) -> int:
+        """
+        Add or replace (upsert) normalized vectors, calling index.add once per role present in the batch.
+
+        Args:
+            texts (List[str]): Optional chunk texts, indexed for lexical and hybrid search.
+
+        Returns:
+            int: How many of the ids already existed and were replaced.
+        """
+        with self._lock:
+            # Si un id se repite en el mismo batch gana la última aparición
+            last_row = {vector_id: row for row, vector_id in enumerate(ids)}
+            if len(last_row) != len(ids):
+                rows = sorted(last_row.values())
+                ids, matrix, metadatas = [ids[row] for row in rows], matrix[rows], [metadatas[row] for row in rows]
+                texts = [texts[row] for row in rows] if texts else texts
+
+            labels = np.arange(len(self.ids), len(self.ids) + len(ids), dtype=np.int64)
+            roles = [metadata.get('role_id') for metadata in metadatas]
+            added: List[Tuple[Any, np.ndarray]] = []
+            created = []
+            try:
+                for role_id in dict.fromkeys(roles):
+                    rows = [row for row, row_role in enumerate(roles) if row_role == role_id]
+                    if role_id not in self.role_indexes:
+                        self.role_indexes[role_id] = self._new_role_index()
+                        created.append(role_id)
+                    self._writable(role_id).add_with_ids(matrix[rows], labels[rows])
+                    added.append((role_id, labels[rows]))
+            except Exception:
+                # Todo o nada: si falla un rol se quitan los vectores ya añadidos a los demás
+                for role_id, role_labels in added:
+                    self._remove_from_role(role_id, role_labels)
+                for role_id in created:
+                    del self.role_indexes[role_id]
+                raise
+
+            # Los ids que ya existían se quitan solo cuando la nueva versión ya está en el índice
+            replaced = [self.id_to_label[vector_id] for vector_id in ids if vector_id in self.id_to_label]
+            if replaced:
+                self._remove_labels(replaced)
+            for role_id in dict.fromkeys(roles):
+                self._maybe_build_ann(role_id)
+
+            self.ids.extend(ids)
+            self.id_to_label.update(zip(ids, labels.tolist()))
+            self.metadata_codes.extend(self._metadata_code(metadata) for metadata in metadatas)
+            if texts:
+                self.lexical.add(labels.tolist(), texts, roles)
+            self.dirty = True
+            return len(replaced)
+
+    def index_texts(self, ids: List[str], texts: List[str]) -> int:
+        """
+        Add the text of vectors that were stored without it (e.g. before the lexical index existed).
+
+        Returns:
+            int: How many vectors got their text indexed.
+        """
+        with self._lock:
+            labels, label_texts = [], []
+            for vector_id, text in zip(ids, texts):
+                label = self.id_to_label.get(vector_id)
+                if label is not None and not self.lexical.has_text(label):
+                    labels.append(label)
+                    label_texts.append(text)
+            before = self.lexical.documents
+            self.lexical.add(labels, label_texts, [self.metadata(label).get('role_id') for label in labels])
+            if labels:
+                self.dirty = True
+            return self.lexical.documents - before
+
+    def delete(self, ids: List[str]) -> int:
+        """
+        Delete vectors by id. Unknown ids are ignored.
+
+        Returns:
+            int: How many vectors were deleted.
+        """
+        with self._lock:
+            labels = [self.id_to_label[vector_id] for vector_id in dict.fromkeys(ids) if vector_id in self.id_to_label]
+            if labels:
+                self._remove_labels(labels)
+                self.dirty = True
+            return len(labels)
+
+    def search(self, matrix: np.ndarray, k: int, role_id, nprobe: int = None,
+               ef_search: int = None) -> List[List[Dict[str, Any]]]:
+        """Search every row of the matrix inside the sub-index of the role with one index.search call."""
+        with self._lock:
+            index = self.role_indexes.get(role_id)
+            if index is None or index.ntotal == 0:
+                return [[] for _ in range(len(matrix))]
+
+            params = self._search_params(index, nprobe, ef_search)
+            D, I = index.search(matrix, min(k, index.ntotal), params=params)
+
+            all_results = []
+            for scores, labels in zip(D, I):
+                all_results.append([
+                    {"id": self.ids[label], "score": float(score), "metadata": self.metadata(label)}
+                    for score, label in zip(scores, labels) if label != -1  # Valid result
+                ])
+            return all_results
+
+    def search_hybrid(self, matrix: np.ndarray, texts: List[str], k: int, role_id, candidates: int = 50,
+                      rrf_k: int = 60, nprobe: int = None, ef_search: int = None) -> List[List[Dict[str, Any]]]:
+        """
+        Run the vector and the BM25 search for every query and fuse both rankings
+        with reciprocal rank fusion: score = sum of 1 / (rrf_k + rank).
+
+        Args:
+            matrix (np.ndarray): Normalized query vectors.
+            texts (List[str]): Query texts, one per vector.
+            candidates (int): Results taken from each retriever before fusing.
+            rrf_k (int): RRF constant; larger values flatten the rank weights.
+        """
+        with self._lock:
+            depth = max(k, candidates)
+            all_vector_results = self.search(matrix, depth, role_id, nprobe, ef_search)
+            all_results = []
+            for vector_results, text in zip(all_vector_results, texts):
+                fused: Dict[int, float] = {}
+                for rank, result in enumerate(vector_results):
+                    label = self.id_to_label[result["id"]]
+                    fused[label] = fused.get(label, 0.0) + 1.0 / (rrf_k + rank + 1)
+                for rank, (label, _) in enumerate(self.lexical.search(text or "", depth, role_id)):
+                    fused[label] = fused.get(label, 0.0) + 1.0 / (rrf_k + rank + 1)
+                best = sorted(fused.items(), key=lambda item: item[1], reverse=True)[:k]
+                all_results.append([
+                    {"id": self.ids[label], "score": score, "metadata": self.metadata(label)}
+                    for label, score in best
+                ])
+            return all_results
+
+    def all_ids(self) -> List[str]:
+        """All ids, in insertion order."""
+        with self._lock:
+            return [vector_id for vector_id in self.ids if vector_id is not None]
+
+    def export(self) -> Tuple[List[str], np.ndarray, List[Dict[str, Any]]]:
+        """All vectors in insertion order, reconstructed from the sub-indexes (approximate for PQ/SQ codes)."""
+        with self._lock:
+            labels = []
+            blocks = []
+            for role_id in self.role_indexes:
+                vectors, role_labels = self._role_vectors(role_id)
+                labels.append(role_labels)
+                blocks.append(vectors)
+
+            if not blocks:
+                return [], np.zeros((0, self.dimension), dtype=np.float32), []
+            labels = np.concatenate(labels)
+            order = np.argsort(labels, kind="stable")
+            return ([self.ids[label] for label in labels[order]], np.vstack(blocks)[order],
+                    [self.metadata(label) for label in labels[order]])
+
+    def lexical_stats(self) -> Dict[str, Any]:
+        """Documents, terms and postings of the BM25 index."""
+        with self._lock:
+            return self.lexical.stats()
+
+    def _index_bytes(self, index: faiss.Index) -> int:
+        """Approximate resident bytes of a role index: codes, labels and graph links or centroids."""
+        inner = self._inner(index)
+        if isinstance(inner, faiss.IndexHNSW):
+            storage = faiss.downcast_index(inner.storage)
+            code_size = storage.code_size if isinstance(storage, faiss.IndexFlatCodes) else self.dimension * 4
+            return index.ntotal * (code_size + 8) + inner.hnsw.neighbors.size() * 4
+        try:
+            ivf = faiss.extract_index_ivf(index)
+        except RuntimeError:
+            ivf = None
+        if ivf is not None:
+            return index.ntotal * (ivf.code_size + 8) + ivf.nlist * self.dimension * 4
+        if isinstance(inner, faiss.IndexFlatCodes):
+            return index.ntotal * (inner.code_size + 8)
+        return index.ntotal * (self.dimension * 4 + 8)
+
+    def memory_usage(self) -> Dict[str, Any]:
+        """Approximate bytes held per vector: index codes and labels, and the id/metadata columns."""
+        with self._lock:
+            ntotal = self.ntotal
+            vectors = sum(self._index_bytes(index) for index in self.role_indexes.values())
+            columns = (self.metadata_codes.itemsize * len(self.metadata_codes) + sys.getsizeof(self.id_to_label)
+                       + sum(sys.getsizeof(vector_id) for vector_id in self.ids if vector_id is not None))
+            lexical = self.lexical.memory_bytes()
+            total = vectors + columns + lexical
+            return {
+                "total_bytes": total,
+                "vector_bytes": vectors,
+                "lexical_bytes": lexical,
+                "bytes_per_vector": total / ntotal if ntotal else 0,
+                "distinct_metadata": len(self.metadata_table)
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._reset()
+            self.dirty = True
+
+    def save(self, directory: str) -> Dict[str, Any]:
+        """
+        Write a snapshot atomically: everything goes to a new sub-directory and the
+        CURRENT pointer is swapped with os.replace once it is complete.
+        """
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            name = f"snapshot-{time.time_ns()}"
+            path = os.path.join(directory, name)
+            os.makedirs(path)
+
+            roles = []
+            for number, (role_id, role_index) in enumerate(self.role_indexes.items()):
+                role = {"role_id": role_id, "index": f"role_{number}.index", "ann": not self._is_flat(role_index)}
+                faiss.write_index(role_index, os.path.join(path, role["index"]))
+                roles.append(role)
+            np.save(os.path.join(path, "metadata_codes.npy"), np.frombuffer(self.metadata_codes, dtype=np.int32))
+            lexical = self.lexical.save(path)
+
+            state = {
+                "version": SNAPSHOT_VERSION,
+                "created_at": time.time(),
+                "dimension": self.dimension,
+                "index_factory": self.index_factory,
+                "roles": roles,
+                "ids": self.ids,
+                "metadata_table": self.metadata_table,
+                "lexical": lexical
+            }
+            with open(os.path.join(path, "state.json"), "w", encoding="utf-8") as f:
+                json.dump(state, f)
+                f.flush()
+                os.fsync(f.fileno())
+
+            self._write_current(directory, name)
+            self.dirty = False
+            self.snapshot = self._describe(path, state["created_at"])
+
+        self._remove_old_snapshots(directory, keep=name)
+        return self.snapshot
+
+    def load(self, directory: str, mmap: bool = True) -> bool:
+        """
+        Restore the latest snapshot. With mmap the vectors of the flat
+        sub-indexes are memory-mapped instead of read, so startup cost and
+        resident memory do not depend on their size; a role is copied to memory
+        the first time it is written to. ANN indexes are always read into
+        memory: mmap turns IVF lists into read-only OnDiskInvertedLists.
+
+        Returns:
+            bool: False if there was no snapshot to restore.
+        """
+        current = os.path.join(directory, CURRENT_FILE)
+        if not os.path.exists(current):
+            return False
+        with open(current, encoding="utf-8") as f:
+            path = os.path.join(directory, f.read().strip())
+        with open(os.path.join(path, "state.json"), encoding="utf-8") as f:
+            state = json.load(f)
+        if state.get("version") not in COMPATIBLE_SNAPSHOT_VERSIONS:
+            raise ValueError(f"Unsupported snapshot version {state.get('version')}")
+        if state["dimension"] != self.dimension:
+            raise ValueError(f"Snapshot dimension {state['dimension']} does not match {self.dimension}")
+
+        # IO_FLAG_MMAP solo mapea las listas IVF; los códigos de un IndexFlat necesitan IO_FLAG_MMAP_IFC
+        flags = faiss.IO_FLAG_MMAP_IFC if mmap else 0
+        with self._lock:
+            self._reset()
+            same_factory = state.get("index_factory", "Flat") == self.index_factory
+            current_format = state["version"] == SNAPSHOT_VERSION
+            for role in state["roles"]:
+                ann = current_format and role.get("ann")
+                self.role_indexes[role["role_id"]] = faiss.read_index(os.path.join(path, role["index"]),
+                                                                      0 if ann else flags)
+            self.ids = state["ids"]
+            self.id_to_label = {vector_id: label for label, vector_id in enumerate(self.ids) if vector_id is not None}
+            self.metadata_codes = array('i', np.load(os.path.join(path, "metadata_codes.npy")).astype(np.int32).tobytes())
+            for metadata in state["metadata_table"]:
+                self._metadata_code(metadata)
+            self.lexical.load(path, state.get("lexical"))
+            self.dirty = False
+            self.snapshot = self._describe(path, state["created_at"])
+            if not same_factory or not current_format:
+                # Otro tipo de índice o formato anterior: se reconstruye sin re-embeber
+                self.rebuild()
+        return True
+
+    def snapshot_status(self) -> Optional[Dict[str, Any]]:
+        """Age and size of the last snapshot written or restored."""
+        if self.snapshot is None:
+            return None
+        return {**self.snapshot, "age_seconds": time.time() - self.snapshot["created_at"], "dirty": self.dirty}
+
+    @staticmethod
+    def _describe(path: str, created_at: float) -> Dict[str, Any]:
+        size = sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
+        return {"path": path, "created_at": created_at, "size_bytes": size}
+
+    @staticmethod
+    def _write_current(directory: str, name: str) -> None:
+        tmp = os.path.join(directory, f"{CURRENT_FILE}.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(directory, CURRENT_FILE))
+
+    @staticmethod
+    def _remove_old_snapshots(directory: str, keep: str) -> None:
+        for entry in os.scandir(directory):
+            if entry.is_dir() and entry.name.startswith("snapshot-") and entry.name != keep:
+                shutil.rmtree(entry.path, ignore_errors=True)
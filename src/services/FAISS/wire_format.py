@@ -0,0 +1,74 @@
+"""
+Binary wire format for the vectors exchanged with the FAISS service.
+
+A message is laid out as (little-endian):
+
+    4 bytes     magic b"FVEC"
+    uint32      length H of the JSON header
+    H bytes     UTF-8 JSON header, padded with spaces to a multiple of 4
+    rows * dim  float32 values, row major
+
+The header always carries "rows" and "dim" plus any sidecar fields of the
+request (ids, metadata, k, role_id...). Because the vector block starts on a
+4 byte boundary it can be read with np.frombuffer without copying.
+"""
+
+import json
+import struct
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+CONTENT_TYPE = "application/x-faiss-vectors"
+MAGIC = b"FVEC"
+_PREFIX = struct.Struct("<4sI")
+
+
+def encode(matrix: np.ndarray, header: Dict[str, Any] = None) -> bytes:
+    """
+    Encode a matrix of vectors and its sidecar fields.
+
+    Args:
+        matrix (np.ndarray): A (rows, dim) matrix, or a single vector.
+        header (Dict[str, Any]): JSON serializable sidecar fields.
+
+    Returns:
+        bytes: The encoded message.
+    """
+    matrix = np.ascontiguousarray(matrix, dtype="<f4")
+    if matrix.ndim == 1:
+        matrix = matrix.reshape(1, -1)
+    rows, dim = matrix.shape
+
+    header_bytes = json.dumps({**(header or {}), "rows": rows, "dim": dim}).encode("utf-8")
+    header_bytes += b" " * (-len(header_bytes) % 4)
+    return b"".join([_PREFIX.pack(MAGIC, len(header_bytes)), header_bytes, matrix.tobytes()])
+
+
+def decode(body: bytes) -> Tuple[Dict[str, Any], np.ndarray]:
+    """
+    Decode a message without copying the vector block.
+
+    Args:
+        body (bytes): The raw message.
+
+    Returns:
+        Tuple[Dict[str, Any], np.ndarray]: The header and a read-only (rows, dim) float32 view.
+
+    Raises:
+        ValueError: If the message is malformed.
+    """
+    if len(body) < _PREFIX.size:
+        raise ValueError("Message too short")
+    magic, header_length = _PREFIX.unpack_from(body)
+    if magic != MAGIC:
+        raise ValueError("Not a FAISS vector message")
+
+    offset = _PREFIX.size + header_length
+    header = json.loads(body[_PREFIX.size:offset].decode("utf-8"))
+    rows, dim = int(header["rows"]), int(header["dim"])
+    if len(body) - offset != rows * dim * 4:
+        raise ValueError("Vector block does not match rows * dim")
+
+    matrix = np.frombuffer(body, dtype="<f4", count=rows * dim, offset=offset).reshape(rows, dim)
+    return header, matrix
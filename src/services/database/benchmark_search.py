@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Regex scan vs text index benchmark for the documents collection.
+
+Fills a scratch database with synthetic chunk-sized documents and, for a set
+of query terms, measures:
+
+- the case-insensitive $regex of find_documents_by_content (full collection scan, every match returned),
+- Document.search on the text index (one page, no content),
+- docs examined and server time for both, from explain("executionStats").
+
+    python src/services/database/benchmark_search.py --documents 100000 --out bench_search.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+import numpy as np
+
+from clients.mongodb.mongodb_client import MongoDBClient
+from services.database.models.document_model import Document
+from config.settings import MONGODB_URI
+
+DEFAULT_TERMS = ["comisiones", "proveedor", "vacaciones", "servidor", "contrato"]
+
+
+def synthetic_words(count: int, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    syllables = ["ca", "de", "li", "mo", "ra", "to", "ven", "sor", "pla", "nes", "ti", "gu", "ser", "cion", "bre"]
+    return ["".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(count)]
+
+
+def populate(db_client: MongoDBClient, size: int, terms: List[str], batch_size: int = 5000, seed: int = 0) -> float:
+    """Insert size documents of ~150 words; each query term appears in roughly 1% of them."""
+    rng = random.Random(seed)
+    vocabulary = synthetic_words(5000, seed)
+    start = time.perf_counter()
+    for first in range(0, size, batch_size):
+        batch = []
+        for i in range(first, min(size, first + batch_size)):
+            words = rng.choices(vocabulary, k=150)
+            for term in terms:
+                if rng.random() < 0.01:
+                    words[rng.randrange(len(words))] = term
+            batch.append({
+                "title": f"Synthetic document {i}",
+                "content": " ".join(words),
+                "source": "benchmark",
+                "metadata": {"faiss_id": f"bench_{i}"},
+                "role_id": rng.choice([1, 2, 3, 4])
+            })
+        Document.create_documents(db_client, batch)
+    Document.ensure_indexes(db_client)
+    return time.perf_counter() - start
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(latencies_ms, 50)),
+        "p95_ms": float(np.percentile(latencies_ms, 95)),
+        "mean_ms": float(np.mean(latencies_ms))
+    }
+
+
+def explain(collection, filters: Dict[str, Any], projection: Dict[str, Any] = None) -> Dict[str, Any]:
+    stats = collection.find(filters, projection).explain()["executionStats"]
+    return {
+        "docs_examined": stats["totalDocsExamined"],
+        "keys_examined": stats["totalKeysExamined"],
+        "returned": stats["nReturned"],
+        "server_ms": stats["executionTimeMillis"]
+    }
+
+
+def run(args) -> Dict[str, Any]:
+    db_client = MongoDBClient(uri=args.uri, database_name=args.database)
+    collection = db_client.get_collection(Document.collection_name)
+    if not args.reuse:
+        collection.drop()
+        db_client.get_collection('counters').delete_one({'_id': 'document_id'})
+    existing = collection.estimated_document_count()
+    populate_seconds = populate(db_client, args.documents - existing, args.terms) if existing < args.documents else 0.0
+
+    results = []
+    for term in args.terms:
+        regex_filter = {'content': {'$regex': term, '$options': 'i'}}
+        regex_latencies, search_latencies = [], []
+        for _ in range(args.runs):
+            start = time.perf_counter()
+            matches = list(collection.find(regex_filter))
+            regex_latencies.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            page = Document.search(db_client, term, page_size=args.page_size)
+            search_latencies.append(time.perf_counter() - start)
+
+        entry = {
+            "term": term,
+            "regex_matches": len(matches),
+            "regex": {**latency_summary(regex_latencies), **explain(collection, regex_filter)},
+            "text_index": {
+                **latency_summary(search_latencies),
+                **explain(collection, {'$text': {'$search': term}}, {'content': 0, 'score': {'$meta': 'textScore'}}),
+                "page_size": len(page)
+            }
+        }
+        results.append(entry)
+        print(json.dumps(entry))
+
+    if not args.reuse:
+        db_client.client.drop_database(args.database)
+    db_client.close()
+    return {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {key: value for key, value in vars(args).items() if key not in ("out", "uri")},
+        "populate_seconds": populate_seconds,
+        "results": results
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regex vs text index search benchmark")
+    parser.add_argument("--uri", default=MONGODB_URI)
+    parser.add_argument("--database", default="ai_api_bench", help="Scratch database, dropped at the end")
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--terms", nargs="+", default=DEFAULT_TERMS)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--reuse", action="store_true", help="Keep the scratch database between runs")
+    parser.add_argument("--out", default="bench_search.json")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
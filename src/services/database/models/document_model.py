@@ -1,5 +1,53 @@
+import threading
 from datetime import datetime, timezone
+from pymongo.errors import OperationFailure
 from clients.mongodb.mongodb_client import MongoDBClient
+from config.settings import DOCUMENT_ID_BLOCK_SIZE, DOCUMENT_TEXT_LANGUAGE, DOCUMENT_SEARCH_MAX_LIMIT
+
+# Código de error de Mongo cuando $text no encuentra un índice de texto
+INDEX_NOT_FOUND = 27
+
+
+class DocumentIdAllocator:
+    """
+    Hands out sequential document ids from blocks reserved on the counters
+    collection with a single $inc, so most creations skip the round trip.
+    Ids left in a block when the process exits are never used (gaps are fine,
+    ids stay unique and increasing per process).
+    """
+
+    def __init__(self, block_size: int = DOCUMENT_ID_BLOCK_SIZE):
+        self.block_size = max(1, block_size)
+        self._blocks = {}  # counters collection -> [next id, last id]
+        self._lock = threading.Lock()
+
+    def reserve(self, db_client: MongoDBClient, count: int = 1) -> int:
+        """
+        Reserve count consecutive ids.
+
+        Returns:
+            int: The first id of the range.
+        """
+        counters_collection = db_client.get_collection('counters')
+        key = counters_collection.full_name
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is None or block[1] - block[0] + 1 < count:
+                size = max(count, self.block_size)
+                counter = counters_collection.find_one_and_update(
+                    {'_id': 'document_id'},
+                    {'$inc': {'seq': size}},
+                    upsert=True,
+                    return_document=True
+                )
+                block = [counter['seq'] - size + 1, counter['seq']]
+                self._blocks[key] = block
+            first_id = block[0]
+            block[0] += count
+            return first_id
+
+
+id_allocator = DocumentIdAllocator()
 
 class Document:
     collection_name = "documents"
@@ -41,15 +89,8 @@ class Document:
 
     @staticmethod
     def create_document(db_client: MongoDBClient, title: str, content: str, source: str = None, metadata: dict = None, role_id: int = None):
-        # Get next sequential ID
-        counters_collection = db_client.get_collection('counters')
-        counter = counters_collection.find_one_and_update(
-            {'_id': 'document_id'},
-            {'$inc': {'seq': 1}},
-            upsert=True,
-            return_document=True
-        )
-        doc_id = counter['seq']
+        # Siguiente ID secuencial, tomado del bloque reservado localmente
+        doc_id = id_allocator.reserve(db_client)
 
         doc = Document(title, content, source, metadata, role_id, _id=doc_id)
         collection = db_client.get_collection(Document.collection_name)
@@ -57,11 +98,151 @@ class Document:
         return doc
 
     @staticmethod
-    def find_documents_by_content(db_client: MongoDBClient, search_text: str):
+    def create_documents(db_client: MongoDBClient, documents: list):
+        """Insert many documents reserving their sequential ids with at most one counter update."""
+        if not documents:
+            return []
+        first_id = id_allocator.reserve(db_client, len(documents))
+
+        docs = [Document(_id=first_id + i, **data) for i, data in enumerate(documents)]
+        collection = db_client.get_collection(Document.collection_name)
+        collection.insert_many([doc.to_dict() for doc in docs], ordered=False)
+        return docs
+
+    @staticmethod
+    def ensure_indexes(db_client: MongoDBClient):
+        """Create the indexes used by the incremental ingestion lookups and the full-text search."""
+        collection = db_client.get_collection(Document.collection_name)
+        collection.create_index('metadata.faiss_id')
+        collection.create_index('metadata.original_file')
+        collection.create_index(
+            [('title', 'text'), ('content', 'text')],
+            name='document_text',
+            weights={'title': 5, 'content': 1},
+            default_language=DOCUMENT_TEXT_LANGUAGE
+        )
+
+    @staticmethod
+    def get_ingestion_manifest(db_client: MongoDBClient):
+        """
+        Get the hashes and file stats of every ingested chunk with a single query.
+
+        Returns:
+            dict: original_file -> {faiss_id -> chunk metadata}.
+        """
+        collection = db_client.get_collection(Document.collection_name)
+        fields = ['faiss_id', 'original_file', 'content_hash', 'file_hash', 'file_size', 'file_mtime']
+        projection = {f'metadata.{field}': 1 for field in fields}
+        projection['_id'] = 0
+
+        manifest = {}
+        for data in collection.find({'metadata.faiss_id': {'$exists': True}}, projection):
+            metadata = data.get('metadata', {})
+            manifest.setdefault(metadata.get('original_file'), {})[metadata['faiss_id']] = metadata
+        return manifest
+
+    @staticmethod
+    def iter_chunk_texts(db_client: MongoDBClient, batch_size: int = 1000):
+        """
+        Iterate over the text of every ingested chunk.
+
+        Yields:
+            tuple: (faiss_ids, contents) lists of at most batch_size items.
+        """
+        collection = db_client.get_collection(Document.collection_name)
+        cursor = collection.find({'metadata.faiss_id': {'$exists': True}},
+                                 {'_id': 0, 'content': 1, 'metadata.faiss_id': 1}).batch_size(batch_size)
+        faiss_ids, contents = [], []
+        for data in cursor:
+            faiss_ids.append(data['metadata']['faiss_id'])
+            contents.append(data.get('content') or "")
+            if len(faiss_ids) >= batch_size:
+                yield faiss_ids, contents
+                faiss_ids, contents = [], []
+        if faiss_ids:
+            yield faiss_ids, contents
+
+    @staticmethod
+    def update_chunk_metadata(db_client: MongoDBClient, faiss_ids: list, fields: dict):
+        """Set metadata fields on the documents of the given chunks."""
+        if not faiss_ids:
+            return 0
+        collection = db_client.get_collection(Document.collection_name)
+        result = collection.update_many(
+            {'metadata.faiss_id': {'$in': list(faiss_ids)}},
+            {'$set': {**{f'metadata.{key}': value for key, value in fields.items()},
+                      'updated_at': datetime.now(timezone.utc)}}
+        )
+        return result.modified_count
+
+    @staticmethod
+    def delete_documents_by_faiss_ids(db_client: MongoDBClient, faiss_ids: list):
+        if not faiss_ids:
+            return 0
+        collection = db_client.get_collection(Document.collection_name)
+        return collection.delete_many({'metadata.faiss_id': {'$in': list(faiss_ids)}}).deleted_count
+
+    @staticmethod
+    def search(db_client: MongoDBClient, query: str, role_id: int = None, page: int = 1, page_size: int = 20,
+               include_content: bool = False):
+        """
+        Full-text search backed by the Mongo text index, best matches first.
+
+        Args:
+            db_client (MongoDBClient): The database client.
+            query (str): Words or "quoted phrases" to look for; -word excludes a word.
+            role_id (int): Only return documents of this role.
+            page (int): 1-based page number.
+            page_size (int): Results per page, capped by DOCUMENT_SEARCH_MAX_LIMIT.
+            include_content (bool): Also return the (large) content field.
+
+        Returns:
+            list: (Document, score) pairs for the requested page.
+        """
+        page_size = max(1, min(page_size, DOCUMENT_SEARCH_MAX_LIMIT))
+        filters = {'$text': {'$search': query}}
+        if role_id is not None:
+            filters['role_id'] = role_id
+        projection = {'score': {'$meta': 'textScore'}}
+        if not include_content:
+            projection['content'] = 0
+
+        collection = db_client.get_collection(Document.collection_name)
+
+        def run():
+            cursor = collection.find(filters, projection).sort([('score', {'$meta': 'textScore'})])
+            return list(cursor.skip((max(1, page) - 1) * page_size).limit(page_size))
+
+        try:
+            data_list = run()
+        except OperationFailure as e:
+            if e.code != INDEX_NOT_FOUND:
+                raise
+            # Primera búsqueda sobre una base sin índices
+            Document.ensure_indexes(db_client)
+            data_list = run()
+        return [(Document.from_dict(data), data.get('score', 0.0)) for data in data_list]
+
+    @staticmethod
+    def find_documents_by_content(db_client: MongoDBClient, search_text: str, limit: int = None):
+        """
+        Documents whose content matches search_text as a case-insensitive regex,
+        so partial words match too. It scans the whole collection; use search
+        for ranked, indexed word search.
+
+        Args:
+            db_client (MongoDBClient): The database client.
+            search_text (str): Regular expression looked for in the content.
+            limit (int): Maximum documents returned; None returns every match.
+
+        Returns:
+            list: The matching documents.
+        """
         collection = db_client.get_collection(Document.collection_name)
-        # Simple text search - in production, use text indexes
-        data_list = collection.find({'content': {'$regex': search_text, '$options': 'i'}})
-        return [Document.from_dict(data) for data in data_list]
+        cursor = collection.find({'content': {'$regex': search_text, '$options': 'i'}})
+        if limit is not None:
+            cursor = cursor.limit(limit)
+        return [Document.from_dict(data) for data in cursor]
 
     @staticmethod
     def find_document_by_id(db_client: MongoDBClient, doc_id):
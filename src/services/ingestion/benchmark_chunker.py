@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Chunker micro-benchmark: throughput and peak memory on a large text file.
+
+Compares the old approach (f.read() of the whole file, then cuts at fixed
+character offsets) with TextChunker streaming the same file in blocks, and
+reports how many chunks of each end in the middle of a word.
+
+Timing and memory are measured in separate passes because tracemalloc slows
+allocation-heavy code down.
+
+    python src/services/ingestion/benchmark_chunker.py --size-mb 300 --out bench_chunker.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, Iterator, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from services.ingestion.chunker import TextChunker
+from config.settings import CHUNK_MAX_CHARS, CHUNK_OVERLAP_CHARS, CHUNK_READ_BLOCK_CHARS
+
+
+def legacy_split(text: str, max_chunk_size: int, overlap_size: int) -> List[str]:
+    """The fixed-offset splitter the ingestion used before TextChunker."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + max_chunk_size
+        chunks.append(text[start:end])
+        start = end - overlap_size
+        if start >= len(text):
+            break
+    return chunks
+
+
+def write_corpus(path: str, size_mb: int, seed: int = 0) -> int:
+    """Write size_mb of Spanish-like prose with sentences and paragraphs."""
+    rng = random.Random(seed)
+    syllables = ["ca", "de", "li", "mo", "ra", "to", "ven", "sor", "pla", "nes", "ti", "gu", "ser", "cion", "bre"]
+    vocabulary = ["".join(rng.choice(syllables) for _ in range(rng.randint(1, 4))) for _ in range(5000)]
+    target = size_mb * 1024 * 1024
+    written = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        while written < target:
+            sentences = []
+            for _ in range(rng.randint(3, 8)):
+                words = rng.choices(vocabulary, k=rng.randint(6, 30))
+                sentences.append(" ".join(words).capitalize() + rng.choice([".", ".", ".", "?", "!"]))
+            paragraph = " ".join(sentences) + "\n\n"
+            f.write(paragraph)
+            written += len(paragraph.encode('utf-8'))
+    return written
+
+
+def legacy_chunks(path: str, args) -> Iterator[str]:
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+    return iter(legacy_split(content, args.max_chars, args.overlap))
+
+
+def streaming_chunks(path: str, args) -> Iterator[str]:
+    return TextChunker(args.max_chars, args.overlap, args.block_size).iter_file(path)
+
+
+def measure(make_chunks: Callable[[str, Any], Iterator[str]], path: str, size_bytes: int, args) -> Dict[str, Any]:
+    count = 0
+    total_chars = 0
+    mid_word = 0
+    start = time.perf_counter()
+    for chunk in make_chunks(path, args):
+        count += 1
+        total_chars += len(chunk)
+        # Un chunk que termina en letra o número seguida de más texto quedó cortado a mitad de palabra
+        if chunk[-1].isalnum():
+            mid_word += 1
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    for _ in make_chunks(path, args):
+        pass
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "seconds": round(seconds, 3),
+        "mb_per_second": round(size_bytes / (1024 * 1024) / seconds, 1) if seconds else 0.0,
+        "peak_memory_mb": round(peak / (1024 * 1024), 1),
+        "chunks": count,
+        "mean_chunk_chars": round(total_chars / count, 1) if count else 0.0,
+        "mid_word_endings": round(mid_word / count, 4) if count else 0.0
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(args) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "corpus.txt")
+        size_bytes = write_corpus(path, args.size_mb)
+        results = {}
+        for name, make_chunks in (("legacy", legacy_chunks), ("streaming", streaming_chunks)):
+            results[name] = measure(make_chunks, path, size_bytes, args)
+            print(json.dumps({name: results[name]}))
+    return {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {key: value for key, value in vars(args).items() if key != "out"},
+        "results": results
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chunker throughput and peak memory benchmark")
+    parser.add_argument("--size-mb", type=int, default=300)
+    parser.add_argument("--max-chars", type=int, default=CHUNK_MAX_CHARS)
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP_CHARS)
+    parser.add_argument("--block-size", type=int, default=CHUNK_READ_BLOCK_CHARS)
+    parser.add_argument("--out", default="bench_chunker.json")
+    args = parser.parse_args()
+
+    report = run(args)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Boundary-aware text chunker shared by every ingestion path.
+
+Files are read in blocks and chunks are yielded as soon as they are complete,
+so memory depends on the block size, not on the file size. Each chunk ends on
+the best boundary available in its second half (paragraph, line, sentence,
+clause, word, in that order) and the next chunk starts on a sentence or word
+start inside the overlap window.
+"""
+
+from typing import Iterable, Iterator, List
+
+from config.settings import CHUNK_MAX_CHARS, CHUNK_OVERLAP_CHARS, CHUNK_READ_BLOCK_CHARS
+
+# Separadores en orden de preferencia para cerrar un chunk
+_CUT_BOUNDARIES = ("\n\n", "\n", ". ", "? ", "! ", "; ", ", ", " ")
+# Separadores en orden de preferencia para empezar el solape del siguiente chunk
+_START_BOUNDARIES = ("\n", ". ", "? ", "! ", " ")
+
+
+def iter_blocks(path: str, block_size: int = CHUNK_READ_BLOCK_CHARS, encoding: str = 'utf-8') -> Iterator[str]:
+    """Read a text file in blocks of block_size characters."""
+    with open(path, 'r', encoding=encoding) as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
+
+
+class TextChunker:
+    """
+    Splits text into chunks of at most max_chars characters that share about
+    overlap_chars characters with the previous chunk.
+    """
+
+    def __init__(self, max_chars: int = CHUNK_MAX_CHARS, overlap_chars: int = CHUNK_OVERLAP_CHARS,
+                 block_size: int = CHUNK_READ_BLOCK_CHARS):
+        """
+        Initialize the chunker.
+
+        Args:
+            max_chars (int): Maximum characters per chunk.
+            overlap_chars (int): Target characters shared by consecutive chunks.
+            block_size (int): Characters read from a file at a time.
+        """
+        self.max_chars = max(2, max_chars)
+        # Un chunk solo se corta en su segunda mitad, así siempre avanza más que el solape
+        self.min_chars = self.max_chars // 2
+        self.overlap_chars = max(0, min(overlap_chars, self.min_chars - 1))
+        self.block_size = max(self.max_chars, block_size)
+
+    def _cut(self, text: str, start: int) -> int:
+        """Position where the chunk starting at start should end."""
+        limit = start + self.max_chars
+        for separator in _CUT_BOUNDARIES:
+            position = text.rfind(separator, start + self.min_chars, limit)
+            if position != -1:
+                return position + len(separator)
+        return limit
+
+    def _next_start(self, text: str, cut: int) -> int:
+        """Start of the next chunk: the first sentence or word start in the overlap window."""
+        if not self.overlap_chars:
+            return cut
+        window = cut - self.overlap_chars
+        # El último cuarto de la ventana se descarta para no dejar un solape casi vacío
+        end = cut - self.overlap_chars // 4
+        for separator in _START_BOUNDARIES:
+            position = text.find(separator, window, end)
+            if position != -1:
+                return position + len(separator)
+        return window
+
+    def chunks(self, blocks: Iterable[str]) -> Iterator[str]:
+        """
+        Yield the chunks of a text given as a sequence of blocks.
+
+        Args:
+            blocks (Iterable[str]): Consecutive pieces of the text.
+
+        Yields:
+            str: Stripped, non-empty chunks in order.
+        """
+        buffer = ""
+        position = 0
+        # Hasta dónde llega el texto que ya salió en algún chunk
+        emitted = 0
+        for block in blocks:
+            # Solo se copia lo pendiente una vez por bloque, no una vez por chunk
+            buffer = buffer[position:] + block
+            emitted = max(0, emitted - position)
+            position = 0
+            while len(buffer) - position > self.max_chars:
+                cut = self._cut(buffer, position)
+                chunk = buffer[position:cut].strip()
+                if chunk:
+                    yield chunk
+                emitted = cut
+                position = self._next_start(buffer, cut)
+
+        if buffer[max(position, emitted):].strip():
+            yield buffer[position:].strip()
+
+    def split(self, text: str) -> List[str]:
+        """Split a text already in memory."""
+        return list(self.chunks([text]))
+
+    def iter_file(self, path: str) -> Iterator[str]:
+        """Yield the chunks of a file, reading it in blocks."""
+        return self.chunks(iter_blocks(path, self.block_size))
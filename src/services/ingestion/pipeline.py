@@ -0,0 +1,392 @@
+"""
+Staged ingestion pipeline for the RAG documents.
+
+    read + chunk (thread pool) -> embed (large batches) -> write (bulk FAISS + bulk Mongo)
+
+Stages are connected by bounded queues, so memory stays flat no matter how
+big the corpus is: a fast reader simply blocks until the embedder catches up.
+Files are hashed and chunked in blocks, and each chunk is queued as soon as
+it is cut, so a single huge file does not have to fit in memory either.
+
+In incremental mode each chunk document keeps the hash of its text plus the
+hash, size and mtime of its file. Files whose size and mtime did not change
+are skipped without being read, unchanged chunks are not embedded again, and
+the chunks of edited or removed files are replaced or deleted in FAISS and
+MongoDB. The file-level metadata and the deletion of an edited file's stale
+chunks are applied only after all of its new chunks are written, so a failed
+write leaves the previous version in place.
+"""
+
+import hashlib
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from clients.mongodb.mongodb_client import MongoDBClient
+from services.database.models.document_model import Document
+from services.ingestion.chunker import TextChunker
+from config.settings import (RAG_DATA_PATH, ROLE_MAPPING, INGEST_READ_WORKERS, INGEST_EMBED_BATCH_SIZE,
+                             INGEST_WRITE_BATCH_SIZE, INGEST_QUEUE_SIZE)
+
+_DONE = object()
+
+
+class StageStats:
+    """Items processed and time spent working (not waiting on queues) by one stage."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items = 0
+        self.busy_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, items: int, seconds: float) -> None:
+        with self._lock:
+            self.items += items
+            self.busy_seconds += seconds
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "items": self.items,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "items_per_second": round(self.items / self.busy_seconds, 1) if self.busy_seconds else 0.0
+        }
+
+
+class IngestionPipeline:
+    """
+    Loads every .txt file of a directory into FAISS and MongoDB.
+    """
+
+    def __init__(self, faiss_client, embedder, mongo_client: MongoDBClient, chunker: TextChunker = None,
+                 read_workers: int = INGEST_READ_WORKERS, embed_batch_size: int = INGEST_EMBED_BATCH_SIZE,
+                 write_batch_size: int = INGEST_WRITE_BATCH_SIZE, queue_size: int = INGEST_QUEUE_SIZE,
+                 progress_interval: float = 5.0, incremental: bool = True):
+        """
+        Initialize the pipeline.
+
+        Args:
+            faiss_client: FAISSClient used for the bulk vector inserts.
+            embedder: Object with an encode(texts, batch_size) method (e.g. the EmbeddingEngine).
+            mongo_client (MongoDBClient): Client used for the bulk document inserts.
+            chunker (TextChunker): Chunker used for every file (default settings if None).
+            read_workers (int): Files read and chunked in parallel.
+            embed_batch_size (int): Chunks per model call.
+            write_batch_size (int): Chunks per bulk write to FAISS and Mongo.
+            queue_size (int): Maximum chunks waiting between two stages.
+            progress_interval (float): Seconds between progress reports.
+            incremental (bool): Skip unchanged files and chunks instead of re-indexing everything.
+        """
+        self.faiss_client = faiss_client
+        self.embedder = embedder
+        self.mongo_client = mongo_client
+        self.chunker = chunker or TextChunker()
+        self.read_workers = max(1, read_workers)
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.write_batch_size = max(1, write_batch_size)
+        self.queue_size = max(1, queue_size)
+        self.progress_interval = progress_interval
+        self.incremental = incremental
+
+    def run(self, data_dir: str = RAG_DATA_PATH) -> Dict[str, Any]:
+        """
+        Run the pipeline over a directory.
+
+        Returns:
+            Dict[str, Any]: Totals and chunks/sec per stage.
+        """
+        self.stats = {name: StageStats(name) for name in ("read", "embed", "write")}
+        self.errors: List[str] = []
+        self._files_read: List[str] = []
+        self._counts = {"files_skipped": 0, "chunks_skipped": 0, "chunks_deleted": 0, "texts_backfilled": 0}
+        self._counts_lock = threading.Lock()
+        # Archivos con algún chunk que no se pudo embeber o escribir
+        self._failed_files = set()
+        self._started = time.perf_counter()
+        self._last_progress = self._started
+
+        filenames = sorted(filename for filename in os.listdir(data_dir) if filename.endswith('.txt'))
+        self._file_stats = {}
+        for filename in filenames:
+            stat = os.stat(os.path.join(data_dir, filename))
+            self._file_stats[filename] = {'file_size': stat.st_size, 'file_mtime': stat.st_mtime_ns}
+
+        self._manifest: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._indexed_ids = set()
+        if self.incremental:
+            filenames = self._plan(filenames)
+
+        chunk_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        # Cada elemento de esta cola ya es un batch de embeddings
+        write_queue: queue.Queue = queue.Queue(maxsize=max(1, self.queue_size // self.embed_batch_size))
+
+        stages = [
+            threading.Thread(target=self._read_stage, args=(data_dir, filenames, chunk_queue), name="ingest-read"),
+            threading.Thread(target=self._embed_stage, args=(chunk_queue, write_queue), name="ingest-embed"),
+            threading.Thread(target=self._write_stage, args=(write_queue,), name="ingest-write")
+        ]
+        for stage in stages:
+            stage.start()
+        for stage in stages:
+            stage.join()
+
+        report = self.report()
+        print(f"Ingestion finished: {report['chunks']} chunks from {report['files']} files in {report['seconds']}s "
+              f"({report['chunks_skipped']} unchanged, {report['chunks_deleted']} deleted)")
+        return report
+
+    def report(self) -> Dict[str, Any]:
+        seconds = time.perf_counter() - self._started
+        chunks = self.stats["write"].items
+        return {
+            "files": len(self._files_read),
+            "chunks": chunks,
+            "seconds": round(seconds, 3),
+            "chunks_per_second": round(chunks / seconds, 1) if seconds else 0.0,
+            **self._counts,
+            "stages": {name: stats.report() for name, stats in self.stats.items()},
+            "errors": self.errors
+        }
+
+    def _plan(self, filenames: List[str]) -> List[str]:
+        """Delete the chunks of removed files and return the files that may have changed."""
+        Document.ensure_indexes(self.mongo_client)
+        # Una sola consulta a Mongo y una a FAISS para todo el corpus
+        self._manifest = Document.get_ingestion_manifest(self.mongo_client)
+        self._indexed_ids = set(self.faiss_client.get_all_ids())
+        lexical = self.faiss_client.get_status().get("lexical")
+        if lexical is not None and lexical["documents"] < len(self._indexed_ids):
+            self._backfill_texts()
+
+        removed = [filename for filename in self._manifest if filename not in self._file_stats]
+        self._delete_chunks([faiss_id for filename in removed for faiss_id in self._manifest[filename]])
+
+        changed = []
+        for filename in filenames:
+            known = self._manifest.get(filename, {})
+            if known and self._is_current(known, self._file_stats[filename]):
+                self._count(files_skipped=1, chunks_skipped=len(known))
+            else:
+                changed.append(filename)
+        return changed
+
+    def _backfill_texts(self) -> None:
+        """Send the text of chunks indexed before the service had a lexical index."""
+        for faiss_ids, texts in Document.iter_chunk_texts(self.mongo_client, self.write_batch_size):
+            result = self.faiss_client.index_texts(faiss_ids, texts)
+            self._count(texts_backfilled=result.get("count", 0))
+
+    def _is_current(self, chunks: Dict[str, Dict[str, Any]], expected: Dict[str, Any]) -> bool:
+        """True if every chunk is in FAISS and its metadata matches the expected values."""
+        return all(
+            faiss_id in self._indexed_ids and all(metadata.get(key) == value for key, value in expected.items())
+            for faiss_id, metadata in chunks.items()
+        )
+
+    def _delete_chunks(self, faiss_ids: List[str]) -> None:
+        if not faiss_ids:
+            return
+        self.faiss_client.delete_vectors(faiss_ids)
+        Document.delete_documents_by_faiss_ids(self.mongo_client, faiss_ids)
+        self._count(chunks_deleted=len(faiss_ids))
+
+    def _count(self, **increments: int) -> None:
+        with self._counts_lock:
+            for name, value in increments.items():
+                self._counts[name] += value
+
+    def _read_file(self, data_dir: str, filename: str, chunk_queue: queue.Queue) -> None:
+        start = time.perf_counter()
+        path = os.path.join(data_dir, filename)
+        file_fields = {'file_hash': _hash_file(path), **self._file_stats[filename]}
+        known = self._manifest.get(filename, {})
+        if known and self._is_current(known, {'file_hash': file_fields['file_hash']}):
+            # Solo cambió la fecha de modificación, el contenido es el mismo
+            Document.update_chunk_metadata(self.mongo_client, list(known), file_fields)
+            self._count(files_skipped=1, chunks_skipped=len(known))
+            return
+
+        role_id = ROLE_MAPPING.get(filename.split('_')[0])
+        self._files_read.append(filename)
+
+        chunk_ids, unchanged = [], []
+        busy_seconds = time.perf_counter() - start
+        chunks = self.chunker.iter_file(path)
+        while True:
+            start = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            chunk_idx = len(chunk_ids)
+            chunk_id = f"{filename}_{chunk_idx + 1}"
+            chunk_ids.append(chunk_id)
+            content_hash = _hash(chunk)
+            busy_seconds += time.perf_counter() - start
+            if chunk_id in known and self._is_current({chunk_id: known[chunk_id]}, {'content_hash': content_hash}):
+                unchanged.append(chunk_id)
+                continue
+            # El chunk sale en cuanto está cortado, sin esperar al resto del archivo
+            chunk_queue.put({
+                "id": chunk_id,
+                "text": chunk,
+                "filename": filename,
+                "role_id": role_id,
+                "chunk_index": chunk_idx,
+                "content_hash": content_hash,
+                "file_fields": dict(file_fields)
+            })
+        self.stats["read"].record(len(chunk_ids), busy_seconds)
+        self._count(chunks_skipped=len(unchanged))
+
+        # El total de chunks, los datos del archivo en los chunks sin cambios y el borrado de los que sobran
+        # se aplican cuando el escritor ya guardó todos los chunks nuevos, detrás de ellos en la cola
+        current_ids = set(chunk_ids)
+        chunk_queue.put({
+            "file_done": filename,
+            "ids": chunk_ids,
+            "fields": {**file_fields, 'total_chunks': len(chunk_ids)},
+            "stale": [faiss_id for faiss_id in known if faiss_id not in current_ids]
+        })
+
+    def _read_stage(self, data_dir: str, filenames: List[str], chunk_queue: queue.Queue) -> None:
+        try:
+            with ThreadPoolExecutor(max_workers=self.read_workers, thread_name_prefix="ingest-reader") as pool:
+                futures = [pool.submit(self._read_file, data_dir, filename, chunk_queue) for filename in filenames]
+                for filename, future in zip(filenames, futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.errors.append(f"read {filename}: {e}")
+        finally:
+            chunk_queue.put(_DONE)
+
+    def _embed_stage(self, chunk_queue: queue.Queue, write_queue: queue.Queue) -> None:
+        batch: List[Dict[str, Any]] = []
+        # Marcas de fin de archivo, viajan detrás de los chunks de ese archivo
+        finished: List[Dict[str, Any]] = []
+        done = False
+        while not done:
+            item = chunk_queue.get()
+            if item is _DONE:
+                done = True
+            elif "file_done" in item:
+                finished.append(item)
+            else:
+                batch.append(item)
+            if (batch or finished) and (done or len(batch) >= self.embed_batch_size):
+                self._embed_batch(batch, finished, write_queue)
+                batch, finished = [], []
+        write_queue.put(_DONE)
+
+    def _embed_batch(self, batch: List[Dict[str, Any]], finished: List[Dict[str, Any]],
+                     write_queue: queue.Queue) -> None:
+        vectors = []
+        if batch:
+            start = time.perf_counter()
+            try:
+                vectors = self.embedder.encode([item["text"] for item in batch], batch_size=self.embed_batch_size)
+                self.stats["embed"].record(len(batch), time.perf_counter() - start)
+            except Exception as e:
+                self.errors.append(f"embed {batch[0]['id']}..{batch[-1]['id']}: {e}")
+                self._mark_failed(batch)
+                batch, vectors = [], []
+        write_queue.put((batch, vectors, finished))
+
+    def _write_stage(self, write_queue: queue.Queue) -> None:
+        pending: List[Dict[str, Any]] = []
+        pending_vectors = []
+        pending_finished: List[Dict[str, Any]] = []
+        done = False
+        while not done:
+            item = write_queue.get()
+            if item is _DONE:
+                done = True
+            else:
+                batch, vectors, finished = item
+                pending.extend(batch)
+                pending_vectors.extend(vectors)
+                pending_finished.extend(finished)
+            if pending and (done or len(pending) >= self.write_batch_size):
+                self._write_batch(pending, pending_vectors)
+                pending, pending_vectors = [], []
+                self._maybe_report_progress()
+            # Todos los chunks de estos archivos ya están escritos
+            if not pending and pending_finished:
+                self._finish_files(pending_finished)
+                pending_finished = []
+
+    def _write_batch(self, batch: List[Dict[str, Any]], vectors: list) -> None:
+        start = time.perf_counter()
+        try:
+            results = self.faiss_client.add_vectors_batch([
+                {"id": item["id"], "vector": vector, "metadata": {'role_id': item["role_id"]}, "text": item["text"]}
+                for item, vector in zip(batch, vectors)
+            ], batch_size=self.write_batch_size)
+            failed = [result["error"] for result in results if "error" in result]
+            if failed:
+                raise RuntimeError(failed[0])
+
+            # Se guarda en MongoDB para futuras referencias, reemplazando las versiones anteriores
+            Document.delete_documents_by_faiss_ids(self.mongo_client, [item["id"] for item in batch])
+            Document.create_documents(self.mongo_client, [
+                {
+                    "title": f"{item['filename']} - Chunk {item['chunk_index'] + 1}",
+                    "content": item["text"],
+                    "source": item["filename"],
+                    "metadata": {
+                        'faiss_id': item["id"],
+                        'chunk_index': item["chunk_index"],
+                        'original_file': item["filename"],
+                        'content_hash': item["content_hash"],
+                        **item["file_fields"]
+                    },
+                    "role_id": item["role_id"]
+                }
+                for item in batch
+            ])
+        except Exception as e:
+            self.errors.append(f"write {batch[0]['id']}..{batch[-1]['id']}: {e}")
+            self._mark_failed(batch)
+            return
+        self.stats["write"].record(len(batch), time.perf_counter() - start)
+
+    def _mark_failed(self, batch: List[Dict[str, Any]]) -> None:
+        with self._counts_lock:
+            self._failed_files.update(item["filename"] for item in batch)
+
+    def _finish_files(self, finished: List[Dict[str, Any]]) -> None:
+        """Apply the file-level metadata and delete the stale chunks of files whose new chunks were all written."""
+        for item in finished:
+            with self._counts_lock:
+                failed = item["file_done"] in self._failed_files
+            if failed:
+                # Sin tocar los chunks anteriores: sus datos de archivo ya no coinciden y la próxima ingesta lo relee
+                continue
+            try:
+                Document.update_chunk_metadata(self.mongo_client, item["ids"], item["fields"])
+                self._delete_chunks(item["stale"])
+            except Exception as e:
+                self.errors.append(f"finish {item['file_done']}: {e}")
+
+    def _maybe_report_progress(self) -> None:
+        now = time.perf_counter()
+        if now - self._last_progress < self.progress_interval:
+            return
+        self._last_progress = now
+        stages = ", ".join(f"{name} {stats.report()['items_per_second']}/s" for name, stats in self.stats.items())
+        print(f"Ingested {self.stats['write'].items} chunks ({stages})")
+
+
+def _hash(text: str) -> str:
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+
+def _hash_file(path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+Concurrency load test for the chat service.
+
+Sends the same number of /chat requests at increasing concurrency levels and
+reports throughput and latency per level. Run it against a single uvicorn
+worker: with the async AI clients throughput should grow with concurrency
+(bounded by the provider pool), instead of staying flat at one chat at a time.
+
+Requests are sent with use_cache=false so every one reaches the AI provider;
+otherwise all but the first would be answered by the response cache. Use
+--use-cache to measure cached answers instead.
+
+    python src/services/load_test_chat.py --url http://localhost:3000 --concurrency 1 4 16 64 --requests 64
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import time
+from typing import Any, Dict, List
+
+import httpx
+import numpy as np
+
+
+async def send_chat(client: httpx.AsyncClient, payload: Dict[str, Any], stream: bool) -> Dict[str, Any]:
+    """One /chat request; in stream mode also records time to first token."""
+    start = time.perf_counter()
+    ttft = None
+    if stream:
+        async with client.stream("POST", "/chat", json={**payload, "stream": True}) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if ttft is None and line.startswith("data: ") and '"token"' in line:
+                    ttft = time.perf_counter() - start
+    else:
+        response = await client.post("/chat", json=payload)
+        response.raise_for_status()
+    return {"seconds": time.perf_counter() - start, "ttft": ttft}
+
+
+async def run_level(url: str, concurrency: int, requests: int, payload: Dict[str, Any], stream: bool,
+                    timeout: float) -> Dict[str, Any]:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+    results, errors = [], []
+
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=timeout) as client:
+        async def worker():
+            async with semaphore:
+                try:
+                    results.append(await send_chat(client, payload, stream))
+                except Exception as e:
+                    errors.append(str(e))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(requests)))
+        elapsed = time.perf_counter() - start
+
+    latencies_ms = np.asarray([result["seconds"] for result in results]) * 1000
+    ttfts_ms = np.asarray([result["ttft"] for result in results if result["ttft"] is not None]) * 1000
+    level = {
+        "concurrency": concurrency,
+        "requests": requests,
+        "errors": len(errors),
+        "seconds": elapsed,
+        "rps": len(results) / elapsed if elapsed else 0.0
+    }
+    if len(latencies_ms):
+        level.update({
+            "p50_ms": float(np.percentile(latencies_ms, 50)),
+            "p95_ms": float(np.percentile(latencies_ms, 95))
+        })
+    if len(ttfts_ms):
+        level["ttft_p50_ms"] = float(np.percentile(ttfts_ms, 50))
+    if errors:
+        level["first_error"] = errors[0]
+    return level
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def run(args) -> Dict[str, Any]:
+    payload = {"message": args.message, "rag_role": args.rag_role, "use_mcp": False, "use_cache": args.use_cache}
+    levels: List[Dict[str, Any]] = []
+    for concurrency in args.concurrency:
+        level = await run_level(args.url, concurrency, args.requests, payload, args.stream, args.timeout)
+        levels.append(level)
+        print(json.dumps(level))
+    return {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {key: value for key, value in vars(args).items() if key != "out"},
+        "levels": levels
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrency load test for /chat")
+    parser.add_argument("--url", default="http://localhost:3000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests", type=int, default=64, help="Requests sent at each concurrency level")
+    parser.add_argument("--message", default="Hola, ¿qué puedes hacer?")
+    parser.add_argument("--rag-role", default="", help="Also exercise the RAG path with this role")
+    parser.add_argument("--stream", action="store_true", help="Use the SSE mode and record time to first token")
+    parser.add_argument("--use-cache", action="store_true", help="Let the response cache answer repeated messages")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--out", default="bench_chat.json")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tool call benchmark for the MCP microservice, against a local stub of the
+exchange-rate API (stub_rates.py), so nothing leaves the machine.
+
+Two modes:
+
+- in-process (default): rounds of concurrent get_usd_price calls straight to
+  the server's tool function, reporting how many requests reached the stub
+  per round and the call latencies;
+- --mcp-url: the same bursts through MCPClient against a running server (start
+  it with USD_RATES_URL pointing at the stub), plus sequential calls with a new
+  session per call vs. the shared session.
+
+    python src/services/mcp/benchmark_tool_cache.py --rounds 5 --concurrency 100 --delay 0.2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Awaitable, Callable, Dict, List
+
+# Al final, para que "main" siga siendo el servidor MCP y no el main.py de la raíz
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+from stub_rates import StubRatesServer
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    latencies_ms = sorted(latency * 1000 for latency in latencies)
+    return {
+        "p50_ms": round(latencies_ms[len(latencies_ms) // 2], 3),
+        "p95_ms": round(latencies_ms[min(len(latencies_ms) - 1, int(len(latencies_ms) * 0.95))], 3),
+        "max_ms": round(latencies_ms[-1], 3)
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def timed(call: Callable[[], Awaitable[Any]]) -> float:
+    start = time.perf_counter()
+    await call()
+    return time.perf_counter() - start
+
+
+async def bursts(call: Callable[[], Awaitable[Any]], stub: StubRatesServer, args) -> List[Dict[str, Any]]:
+    """Rounds of concurrent calls, with a pause between them longer than the TTL so each round starts cold."""
+    rounds = []
+    for number in range(args.rounds):
+        upstream_before = stub.requests
+        latencies = await asyncio.gather(*(timed(call) for _ in range(args.concurrency)))
+        rounds.append({
+            "round": number,
+            "calls": args.concurrency,
+            "upstream_requests": stub.requests - upstream_before,
+            "latency": latency_summary(latencies)
+        })
+        print(json.dumps(rounds[-1]))
+        await asyncio.sleep(args.pause)
+    return rounds
+
+
+async def run_in_process(stub: StubRatesServer, args) -> Dict[str, Any]:
+    os.environ["USD_RATES_URL"] = stub.url
+    os.environ["TOOL_CACHE_TTL_SECONDS"] = str(args.ttl)
+    import main as server
+
+    results = {"bursts": await bursts(server.get_usd_price, stub, args), "cache": server.tool_cache.stats()}
+    await server.http_client().aclose()
+    return results
+
+
+async def run_over_mcp(stub: StubRatesServer, args) -> Dict[str, Any]:
+    from clients.mcp.mcp_client import MCPClient
+
+    # Una sesión nueva por llamada, como hacía el cliente antes
+    sequential = {"new_session": [], "shared_session": []}
+    for _ in range(args.sequential):
+        client = MCPClient(args.mcp_url)
+        sequential["new_session"].append(await timed(client.get_usd_price))
+        await client.close()
+
+    client = MCPClient(args.mcp_url)
+    try:
+        for _ in range(args.sequential):
+            sequential["shared_session"].append(await timed(client.get_usd_price))
+        results = {
+            "sequential": {name: latency_summary(values) for name, values in sequential.items()},
+            "bursts": await bursts(client.get_usd_price, stub, args),
+            "client": client.stats()
+        }
+    finally:
+        await client.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MCP tool cache and session benchmark against a local rates stub")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--delay", type=float, default=0.2, help="Latency of the stub API in seconds")
+    parser.add_argument("--ttl", type=float, default=1.0, help="Tool cache TTL (in-process mode)")
+    parser.add_argument("--pause", type=float, default=1.5, help="Seconds between rounds")
+    parser.add_argument("--stub-port", type=int, default=0, help="Stub port; set it when a server points at the stub")
+    parser.add_argument("--mcp-url", default=None, help="SSE URL of a running MCP server, e.g. http://localhost:8002/sse")
+    parser.add_argument("--sequential", type=int, default=20, help="Sequential calls per session mode (--mcp-url)")
+    parser.add_argument("--out", default="bench_tool_cache.json")
+    args = parser.parse_args()
+
+    stub = StubRatesServer(args.stub_port, args.delay).start()
+    print(f"Stub rates API on {stub.url}")
+    try:
+        results = asyncio.run(run_over_mcp(stub, args) if args.mcp_url else run_in_process(stub, args))
+    finally:
+        stub.shutdown()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.time(),
+        "machine": {"platform": platform.platform(), "cpus": os.cpu_count()},
+        "params": {key: value for key, value in vars(args).items() if key != "out"},
+        "upstream_requests": stub.requests,
+        "results": results
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
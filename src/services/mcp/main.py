@@ -1,20 +1,40 @@
+from typing import Optional
+
+import httpx
 import uvicorn
 from mcp.server import FastMCP
 
+from service_settings import USD_RATES_URL, USD_RATES_TIMEOUT_SECONDS, TOOL_CACHE_TTL_SECONDS
+from src.utils.ttl_cache import AsyncTTLCache
+
 app = FastMCP("usd-price-server")
 
+# Resultados de las tools en caché; una ráfaga de llamadas simultáneas hace una sola petición a la API
+tool_cache = AsyncTTLCache(TOOL_CACHE_TTL_SECONDS)
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def http_client() -> httpx.AsyncClient:
+    """Shared keep-alive HTTP client for the upstream APIs, created inside the server's event loop."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=USD_RATES_TIMEOUT_SECONDS)
+    return _http_client
+
+
+async def fetch_usd_rates() -> str:
+    response = await http_client().get(USD_RATES_URL)
+    response.raise_for_status()
+    return str(response.json())
+
 #Definición de la tool sobre el precio actual del dolar
 @app.tool()
 async def get_usd_price():
     """Get the current USD exchange rates from open.er-api.com"""
-    import requests
     try:
-        response = requests.get("https://open.er-api.com/v6/latest/USD")
-        response.raise_for_status()
-        data = response.json()
-        return str(data)
+        return await tool_cache.get_or_load("get_usd_price", fetch_usd_rates)
     except Exception as e:
         return f"Error fetching USD price: {str(e)}"
 
 if __name__ == "__main__":
-    uvicorn.run(app.sse_app(), host="0.0.0.0", port=8003) #montado de servidor
\ No newline at end of file
+    uvicorn.run(app.sse_app(), host="0.0.0.0", port=8003) #montado de servidor
@@ -0,0 +1,12 @@
+"""
+Configuration of the MCP microservice, read from the environment.
+"""
+
+import os
+
+# API de tipos de cambio; en pruebas se apunta a un stub local (ver stub_rates.py)
+USD_RATES_URL = os.getenv("USD_RATES_URL", "https://open.er-api.com/v6/latest/USD")
+USD_RATES_TIMEOUT_SECONDS = float(os.getenv("USD_RATES_TIMEOUT_SECONDS", "10"))
+
+# Caché de resultados de las tools: la API actualiza los cambios una vez al día
+TOOL_CACHE_TTL_SECONDS = float(os.getenv("TOOL_CACHE_TTL_SECONDS", "300"))
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the exchange-rate API, for tests and benchmarks.
+
+Answers every GET with a fixed open.er-api.com style payload after an optional
+delay and counts the requests, so a test can check how many calls reached the
+upstream. Start the MCP server with USD_RATES_URL pointing at it:
+
+    python src/services/mcp/stub_rates.py --port 8010 --delay 0.2
+    USD_RATES_URL=http://localhost:8010/v6/latest/USD PYTHONPATH=. python src/services/mcp/main.py
+"""
+
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+RATES = {"USD": 1, "EUR": 0.92, "GBP": 0.79, "MXN": 17.1, "ARS": 870.5, "COP": 3930.0}
+
+
+class StubRatesServer(ThreadingHTTPServer):
+    """HTTP server that counts the requests it answers."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, delay_seconds: float = 0.0, status: int = 200):
+        """
+        Initialize the stub.
+
+        Args:
+            port (int): Port to listen on; 0 picks a free one.
+            delay_seconds (float): Delay before each answer, to simulate a slow upstream.
+            status (int): HTTP status of the answers, to simulate failures.
+        """
+        super().__init__(("127.0.0.1", port), _StubHandler)
+        self.delay_seconds = delay_seconds
+        self.status = status
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v6/latest/USD"
+
+    def start(self) -> "StubRatesServer":
+        """Serve from a daemon thread."""
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        with self.server._lock:
+            self.server.requests += 1
+        time.sleep(self.server.delay_seconds)
+        body = json.dumps({"result": "success", "base_code": "USD", "time_last_update_unix": int(time.time()),
+                           "rates": RATES}).encode()
+        self.send_response(self.server.status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the exchange-rate API")
+    parser.add_argument("--port", type=int, default=8010)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds before each answer")
+    args = parser.parse_args()
+
+    server = StubRatesServer(args.port, args.delay)
+    print(f"Serving stub rates on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f"Requests answered: {server.requests}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# Chat RAG helpers package
\ No newline at end of file
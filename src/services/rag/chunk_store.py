@@ -0,0 +1,100 @@
+"""
+Resolves FAISS hit ids to chunk text (and its position in the source file)
+for the RAG prompt.
+
+Hot chunks are served from an in-process LRU; the rest are fetched with a
+single $in query on metadata.faiss_id, so a RAG turn costs at most one Mongo
+round trip no matter how many hits it has.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+from clients.mongodb.async_mongodb_client import AsyncMongoDBClient
+from config.settings import CHUNK_CACHE_MAX_ITEMS
+
+
+class ChunkStore:
+    """
+    LRU of chunks in front of the documents collection.
+    """
+
+    collection_name = "documents"
+
+    def __init__(self, mongo_client: AsyncMongoDBClient, max_items: int = CHUNK_CACHE_MAX_ITEMS):
+        """
+        Initialize the store.
+
+        Args:
+            mongo_client (AsyncMongoDBClient): Client used for the batched lookups.
+            max_items (int): Chunks kept in memory.
+        """
+        self.mongo_client = mongo_client
+        self.max_items = max(0, max_items)
+        self._chunks: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.queries = 0
+
+    async def ensure_index(self) -> None:
+        """Make sure the $in lookup uses an index."""
+        try:
+            await self.mongo_client.get_collection(self.collection_name).create_index('metadata.faiss_id')
+        except Exception as e:
+            print(f"Could not create the faiss_id index: {e}")
+
+    async def get_chunks(self, faiss_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the chunk of each id. Ids without a document are left out.
+
+        Args:
+            faiss_ids (List[str]): Ids returned by a FAISS search.
+
+        Returns:
+            Dict[str, Dict[str, Any]]: faiss_id -> {"text", "file", "chunk_index"}.
+        """
+        chunks = {}
+        missing = []
+        for faiss_id in dict.fromkeys(faiss_ids):
+            chunk = self._chunks.get(faiss_id)
+            if chunk is None:
+                missing.append(faiss_id)
+            else:
+                self._chunks.move_to_end(faiss_id)
+                chunks[faiss_id] = chunk
+        self.hits += len(chunks)
+        self.misses += len(missing)
+
+        if missing:
+            self.queries += 1
+            cursor = self.mongo_client.get_collection(self.collection_name).find(
+                {'metadata.faiss_id': {'$in': missing}},
+                {'_id': 0, 'content': 1, 'metadata.faiss_id': 1, 'metadata.original_file': 1,
+                 'metadata.chunk_index': 1}
+            )
+            async for data in cursor:
+                metadata = data['metadata']
+                chunk = {
+                    "text": data.get('content') or "",
+                    "file": metadata.get('original_file'),
+                    "chunk_index": metadata.get('chunk_index')
+                }
+                chunks[metadata['faiss_id']] = chunk
+                self._remember(metadata['faiss_id'], chunk)
+        return chunks
+
+    def _remember(self, faiss_id: str, chunk: Dict[str, Any]) -> None:
+        if self.max_items == 0:
+            return
+        self._chunks[faiss_id] = chunk
+        self._chunks.move_to_end(faiss_id)
+        while len(self._chunks) > self.max_items:
+            self._chunks.popitem(last=False)
+
+    def clear(self) -> None:
+        """Forget every cached chunk (e.g. after documents are re-ingested)."""
+        self._chunks.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters, Mongo lookups and the cache size."""
+        return {"items": len(self._chunks), "hits": self.hits, "misses": self.misses, "mongo_queries": self.queries}
@@ -0,0 +1,158 @@
+"""
+Token-budgeted RAG context assembly.
+
+The chunker makes consecutive chunks of a file share an overlap, so the top-k
+hits often repeat text. Before the context goes into the prompt:
+
+- hits from the same file with consecutive chunk_index are merged into one
+  span, keeping the shared overlap only once,
+- hits with the same text (e.g. the same paragraph in two files) are kept once,
+- spans are packed by score into a token budget.
+"""
+
+import re
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from clients.embeddings.embedding_cache import text_key
+from config.settings import RAG_CONTEXT_MAX_TOKENS
+
+_TOKEN_PIECES = re.compile(r"\w+|[^\w\s]")
+# Coincidencias más cortas pueden ser casuales (un espacio, una letra), no un solape del chunker
+MIN_OVERLAP = 20
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (words and punctuation) for when no tokenizer is available."""
+    return len(_TOKEN_PIECES.findall(text))
+
+
+def overlap_length(left: str, right: str, min_overlap: int = MIN_OVERLAP) -> int:
+    """Length of the longest suffix of left that is also a prefix of right (0 if below min_overlap)."""
+    for size in range(min(len(left), len(right)), min_overlap - 1, -1):
+        if left.endswith(right[:size]):
+            return size
+    return 0
+
+
+class _Span:
+    __slots__ = ("file", "first", "last", "text", "score", "chunks")
+
+    def __init__(self, file: str, chunk_index: Optional[int], text: str, score: float):
+        self.file = file
+        self.first = chunk_index
+        self.last = chunk_index
+        self.text = text
+        self.score = score
+        self.chunks = 1
+
+    def follows(self, file: str, chunk_index: Optional[int]) -> bool:
+        return (file is not None and file == self.file and chunk_index is not None
+                and self.last is not None and chunk_index == self.last + 1)
+
+    def extend(self, chunk_index: int, text: str, score: float) -> None:
+        self.text += text[overlap_length(self.text, text):]
+        self.last = chunk_index
+        self.score = max(self.score, score)
+        self.chunks += 1
+
+    def header(self, position: int) -> str:
+        if self.first is None:
+            where = self.file or "unknown source"
+        elif self.first == self.last:
+            where = f"{self.file}, chunk {self.first + 1}"
+        else:
+            where = f"{self.file}, chunks {self.first + 1}-{self.last + 1}"
+        return f"Doc {position} ({where}, score: {self.score:.3f}):"
+
+
+class ContextBuilder:
+    """
+    Turns FAISS hits plus their chunks into a deduplicated context that fits a
+    token budget. Keeps running totals of the tokens it saved.
+    """
+
+    def __init__(self, count_tokens: Callable[[str], Optional[int]] = None,
+                 max_tokens: int = RAG_CONTEXT_MAX_TOKENS):
+        """
+        Initialize the builder.
+
+        Args:
+            count_tokens (Callable[[str], Optional[int]]): Local tokenizer; when it
+                returns None (e.g. model not loaded yet) the rough estimate is used.
+            max_tokens (int): Token budget of the context; 0 disables the limit.
+        """
+        self.count_tokens = count_tokens
+        self.max_tokens = max_tokens
+        self.requests = 0
+        self.tokens_in = 0
+        self.tokens_out = 0
+        self.chunks_dropped = 0
+
+    def _tokens(self, text: str) -> int:
+        count = self.count_tokens(text) if self.count_tokens is not None else None
+        return estimate_tokens(text) if count is None else count
+
+    def _spans(self, results: List[Dict[str, Any]], chunks: Dict[str, Dict[str, Any]]) -> List[_Span]:
+        hits = [(chunks[res['id']], res['score']) for res in results if res['id'] in chunks]
+        # Se ordena por archivo y posición para poder unir chunks consecutivos
+        hits.sort(key=lambda hit: (hit[0]["file"] or "", hit[0]["chunk_index"] if hit[0]["chunk_index"] is not None else -1))
+
+        spans: List[_Span] = []
+        seen_texts = set()
+        for chunk, score in hits:
+            key = text_key(chunk["text"])
+            if key in seen_texts:
+                continue
+            seen_texts.add(key)
+            if spans and spans[-1].follows(chunk["file"], chunk["chunk_index"]):
+                spans[-1].extend(chunk["chunk_index"], chunk["text"], score)
+            else:
+                spans.append(_Span(chunk["file"], chunk["chunk_index"], chunk["text"], score))
+        spans.sort(key=lambda span: span.score, reverse=True)
+        return spans
+
+    def build(self, results: List[Dict[str, Any]], chunks: Dict[str, Dict[str, Any]]) -> Tuple[str, Dict[str, int]]:
+        """
+        Build the context for one request.
+
+        Args:
+            results (List[Dict[str, Any]]): FAISS hits ({"id", "score"}), best first.
+            chunks (Dict[str, Dict[str, Any]]): faiss_id -> {"text", "file", "chunk_index"}.
+
+        Returns:
+            Tuple[str, Dict[str, int]]: The context and its token accounting
+            (context_tokens_raw, context_tokens, context_tokens_saved, context_chunks_dropped).
+        """
+        tokens_raw = sum(self._tokens(chunks[res['id']]["text"]) for res in results if res['id'] in chunks)
+
+        blocks, used, dropped = [], 0, 0
+        for span in self._spans(results, chunks):
+            block = f"{span.header(len(blocks) + 1)}\n{span.text}"
+            tokens = self._tokens(block)
+            if self.max_tokens and used + tokens > self.max_tokens:
+                dropped += span.chunks
+                continue
+            blocks.append(block)
+            used += tokens
+
+        self.requests += 1
+        self.tokens_in += tokens_raw
+        self.tokens_out += used
+        self.chunks_dropped += dropped
+        return "\n\n".join(blocks), {
+            "context_tokens_raw": tokens_raw,
+            "context_tokens": used,
+            "context_tokens_saved": max(0, tokens_raw - used),
+            "context_chunks_dropped": dropped
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the token totals since startup."""
+        return {
+            "max_tokens": self.max_tokens,
+            "requests": self.requests,
+            "tokens_raw": self.tokens_in,
+            "tokens_sent": self.tokens_out,
+            "tokens_saved": max(0, self.tokens_in - self.tokens_out),
+            "chunks_dropped": self.chunks_dropped
+        }
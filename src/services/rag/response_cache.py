@@ -0,0 +1,159 @@
+"""
+Response cache for repeated chat questions.
+
+Entries are keyed by (rag_role, use_mcp, normalized message). A lookup first
+tries the exact key and then, when the caller already has the query embedding
+(the RAG path computes it anyway), the most similar cached question of the
+same role and MCP setting above a cosine threshold.
+
+Answers given with MCP tools depend on live tool data, so they get their own
+(shorter) TTL; with the default of 0 they are not cached at all.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from clients.embeddings.embedding_cache import normalize_text
+from config.settings import (RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL_SECONDS,
+                             RESPONSE_CACHE_SIMILARITY_THRESHOLD, RESPONSE_CACHE_MCP_TTL_SECONDS)
+
+
+class _Entry:
+    __slots__ = ("response", "vector", "expires_at")
+
+    def __init__(self, response: str, vector: Optional[np.ndarray], expires_at: float):
+        self.response = response
+        self.vector = vector
+        self.expires_at = expires_at
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of chat answers with optional embedding-similarity lookup.
+    Meant to be used from the event loop only.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES, ttl_seconds: float = RESPONSE_CACHE_TTL_SECONDS,
+                 similarity_threshold: float = RESPONSE_CACHE_SIMILARITY_THRESHOLD,
+                 mcp_ttl_seconds: float = RESPONSE_CACHE_MCP_TTL_SECONDS):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries (int): Maximum cached answers; the least recently used is evicted.
+            ttl_seconds (float): Age after which an answer is no longer served.
+            similarity_threshold (float): Minimum cosine similarity for a semantic hit; 0 disables it.
+            mcp_ttl_seconds (float): TTL of answers given with MCP tools; 0 disables caching them.
+        """
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self.mcp_ttl_seconds = mcp_ttl_seconds
+        self._entries: "OrderedDict[Tuple[str, bool, str], _Entry]" = OrderedDict()
+        self.exact_hits = 0
+        self.semantic_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def _key(rag_role: str, use_mcp: bool, message: str) -> Tuple[str, bool, str]:
+        return (rag_role or "", bool(use_mcp), normalize_text(message).casefold())
+
+    @staticmethod
+    def _unit(vector) -> Optional[np.ndarray]:
+        if vector is None:
+            return None
+        vector = np.asarray(vector, dtype=np.float32).ravel()
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else None
+
+    def _ttl(self, use_mcp: bool) -> float:
+        return self.mcp_ttl_seconds if use_mcp else self.ttl_seconds
+
+    @staticmethod
+    def _expired(entry: _Entry, now: float) -> bool:
+        return now > entry.expires_at
+
+    def get(self, rag_role: str, use_mcp: bool, message: str, vector=None) -> Optional[Tuple[str, str]]:
+        """
+        Look up a cached answer.
+
+        Args:
+            rag_role (str): RAG role of the request ("" when RAG is off).
+            use_mcp (bool): Whether tools were enabled.
+            message (str): The user message.
+            vector: Query embedding, if already computed; enables the similarity lookup.
+
+        Returns:
+            Optional[Tuple[str, str]]: (answer, "exact" or "semantic"), or None on a miss.
+        """
+        if self._ttl(use_mcp) <= 0:
+            return None
+        now = time.monotonic()
+        key = self._key(rag_role, use_mcp, message)
+        entry = self._entries.get(key)
+        if entry is not None:
+            if not self._expired(entry, now):
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return entry.response, "exact"
+            del self._entries[key]
+            self.expirations += 1
+
+        query = self._unit(vector) if self.similarity_threshold > 0 else None
+        if query is not None:
+            best_key, best_score = None, self.similarity_threshold
+            for candidate_key, candidate in list(self._entries.items()):
+                if candidate_key[:2] != key[:2] or candidate.vector is None:
+                    continue
+                if self._expired(candidate, now):
+                    del self._entries[candidate_key]
+                    self.expirations += 1
+                    continue
+                score = float(np.dot(query, candidate.vector))
+                if score >= best_score:
+                    best_key, best_score = candidate_key, score
+            if best_key is not None:
+                self._entries.move_to_end(best_key)
+                self.semantic_hits += 1
+                return self._entries[best_key].response, "semantic"
+
+        self.misses += 1
+        return None
+
+    def put(self, rag_role: str, use_mcp: bool, message: str, response: str, vector=None) -> None:
+        """Cache an answer, evicting the least recently used entries if full."""
+        ttl_seconds = self._ttl(use_mcp)
+        if ttl_seconds <= 0:
+            return
+        key = self._key(rag_role, use_mcp, message)
+        self._entries[key] = _Entry(response, self._unit(vector), time.monotonic() + ttl_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self) -> None:
+        """Drop every cached answer (e.g. after the indexed documents change)."""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters and the cache size."""
+        lookups = self.exact_hits + self.semantic_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "mcp_ttl_seconds": self.mcp_ttl_seconds,
+            "similarity_threshold": self.similarity_threshold,
+            "exact_hits": self.exact_hits,
+            "semantic_hits": self.semantic_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round((self.exact_hits + self.semantic_hits) / lookups, 4) if lookups else 0.0
+        }
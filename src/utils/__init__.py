@@ -0,0 +1 @@
+# Shared helpers package
\ No newline at end of file
@@ -0,0 +1,68 @@
+"""
+Lightweight in-process metrics used to tune batching windows and queues.
+"""
+
+import bisect
+import threading
+from typing import Any, Dict, List
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram. Values are counted in the first bucket whose upper
+    bound is greater or equal to them; anything bigger goes to "+Inf".
+    """
+
+    def __init__(self, bounds: List[float]):
+        """
+        Initialize the histogram.
+
+        Args:
+            bounds (List[float]): Upper bounds of the buckets.
+        """
+        self.bounds = sorted(bounds)
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Drop every observation."""
+        with self._lock:
+            self.counts = [0] * (len(self.bounds) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        with self._lock:
+            self.counts[bisect.bisect_left(self.bounds, value)] += 1
+            self.count += 1
+            self.total += value
+            self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Approximate a quantile with the upper bound of its bucket."""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+            target = q * self.count
+            seen = 0
+            for bound, count in zip(self.bounds, self.counts):
+                seen += count
+                if seen >= target:
+                    return min(bound, self.max)
+            return self.max
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Get a JSON friendly view of the histogram."""
+        buckets = {f"<={bound:g}": count for bound, count in zip(self.bounds, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean": self.total / self.count if self.count else 0.0,
+            "max": self.max,
+            "p50": self.quantile(0.50),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "buckets": buckets
+        }
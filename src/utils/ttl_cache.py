@@ -0,0 +1,188 @@
+"""
+TTL caches with single-flight loading for tool results fetched from upstream APIs.
+
+get_or_load(key, loader) returns the cached value while it is fresh. On a miss
+only the first caller runs the loader; concurrent callers for the same key wait
+for that result, so a burst of calls causes one upstream request. Failures are
+not cached: the callers waiting on a failed load get its exception and the next
+call tries again.
+"""
+
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _TTLEntries:
+    """Expiring entries and counters shared by the thread and asyncio caches."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl_seconds (float): Seconds a loaded value is served from the cache; 0 disables caching
+                (concurrent calls are still coalesced).
+            max_entries (int): Maximum number of keys kept.
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+        self.hits = 0
+        self.loads = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    def _lookup(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            self.hits += 1
+            return True, entry[1]
+        return False, None
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        now = time.monotonic()
+        if key not in self._entries and len(self._entries) >= self.max_entries:
+            for expired in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+                del self._entries[expired]
+            if len(self._entries) >= self.max_entries:
+                del self._entries[next(iter(self._entries))]
+        self._entries[key] = (now + self.ttl_seconds, value)
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one key, or every key when None."""
+        if key is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "loads": self.loads,
+            "coalesced": self.coalesced,
+            "errors": self.errors
+        }
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+
+class TTLCache(_TTLEntries):
+    """Thread-safe TTL cache for blocking loaders."""
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        super().__init__(ttl_seconds, max_entries)
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Flight] = {}
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Get the value of key, running loader at most once for concurrent misses.
+
+        Args:
+            key (Hashable): Cache key (e.g. tool name and arguments).
+            loader (Callable[[], Any]): Blocking function that fetches the value.
+
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                self.loads += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None:
+                    self._store(key, flight.value)
+                else:
+                    self.errors += 1
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        with self._lock:
+            super().invalidate(key)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return super().stats()
+
+
+class AsyncTTLCache(_TTLEntries):
+    """
+    TTL cache for coroutine loaders, used from a single event loop. The load
+    runs in its own task, so a caller that is cancelled does not cancel it for
+    the others.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 256):
+        super().__init__(ttl_seconds, max_entries)
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    async def _load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        try:
+            value = await loader()
+        except BaseException:
+            self.errors += 1
+            raise
+        else:
+            self._store(key, value)
+            return value
+        finally:
+            del self._flights[key]
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Get the value of key, running loader at most once for concurrent misses.
+
+        Args:
+            key (Hashable): Cache key (e.g. tool name and arguments).
+            loader (Callable[[], Awaitable[Any]]): Coroutine function that fetches the value.
+
+        Returns:
+            Any: The cached or freshly loaded value.
+        """
+        found, value = self._lookup(key)
+        if found:
+            return value
+        task = self._flights.get(key)
+        if task is None:
+            self.loads += 1
+            task = self._flights[key] = asyncio.ensure_future(self._load(key, loader))
+            # Si todos los que esperaban se cancelan, el error no queda sin recoger
+            task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
@@ -0,0 +1,9 @@
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Mismos imports que en ejecución: el chat importa desde src/, el servicio FAISS con imports planos
+for path in (ROOT, os.path.join(ROOT, "src"), os.path.join(ROOT, "src", "services", "FAISS")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
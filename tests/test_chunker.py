@@ -0,0 +1,79 @@
+import random
+
+from services.ingestion.chunker import TextChunker, iter_blocks
+
+WORDS = ["dólar", "peso", "tasa", "cambio", "banco", "mercado", "precio", "oferta", "demanda", "inflación"]
+
+
+def make_text(words: int = 3000, seed: int = 7) -> str:
+    rng = random.Random(seed)
+    sentences = []
+    while sum(len(s.split()) for s in sentences) < words:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(4, 18)))
+        sentences.append(sentence.capitalize() + rng.choice([".", "?", "!"]))
+    paragraphs = [" ".join(sentences[i:i + 5]) for i in range(0, len(sentences), 5)]
+    return "\n\n".join(paragraphs)
+
+
+def test_chunks_respect_max_chars_and_cover_the_text():
+    text = make_text()
+    chunker = TextChunker(max_chars=500, overlap_chars=100)
+    chunks = chunker.split(text)
+    assert len(chunks) > 10
+    assert all(0 < len(chunk) <= 500 for chunk in chunks)
+    # Cada palabra del texto aparece en algún chunk, en orden
+    assert chunks[0] == text[:len(chunks[0])]
+    assert text.rstrip().endswith(chunks[-1])
+
+
+def test_consecutive_chunks_overlap():
+    chunker = TextChunker(max_chars=400, overlap_chars=100)
+    chunks = [" ".join(chunk.split()) for chunk in chunker.split(make_text())]
+    for previous, current in zip(chunks, chunks[1:]):
+        # El chunk siguiente empieza con el final del anterior
+        shared = max(size for size in range(len(current) + 1) if previous.endswith(current[:size]))
+        assert 20 <= shared <= 100
+
+
+def test_no_overlap_when_disabled():
+    text = make_text(words=800)
+    chunks = TextChunker(max_chars=300, overlap_chars=0).split(text)
+    assert "".join(chunks).replace(" ", "").replace("\n", "") == text.replace(" ", "").replace("\n", "")
+
+
+def test_cuts_fall_on_word_boundaries():
+    text = make_text()
+    words = set(text.split())
+    for chunk in TextChunker(max_chars=350, overlap_chars=80).split(text):
+        assert chunk.split()[0] in words
+        assert chunk.split()[-1] in words
+
+
+def test_words_longer_than_a_chunk_are_cut_hard():
+    chunks = TextChunker(max_chars=100, overlap_chars=0).split("x" * 450)
+    assert [len(chunk) for chunk in chunks] == [100, 100, 100, 100, 50]
+
+
+def test_output_does_not_depend_on_block_size():
+    text = make_text()
+    chunker = TextChunker(max_chars=500, overlap_chars=120)
+    expected = chunker.split(text)
+    for block_size in (500, 777, 1024, 5000):
+        blocks = [text[i:i + block_size] for i in range(0, len(text), block_size)]
+        assert list(chunker.chunks(blocks)) == expected
+
+
+def test_iter_file_matches_split(tmp_path):
+    text = make_text()
+    path = tmp_path / "doc.txt"
+    path.write_text(text, encoding="utf-8")
+    chunker = TextChunker(max_chars=450, overlap_chars=90, block_size=600)
+    assert "".join(iter_blocks(str(path), 600)) == text
+    assert list(chunker.iter_file(str(path))) == chunker.split(text)
+
+
+def test_empty_and_short_inputs():
+    chunker = TextChunker(max_chars=200, overlap_chars=50)
+    assert chunker.split("") == []
+    assert chunker.split("   \n\n  ") == []
+    assert chunker.split("  hola mundo  ") == ["hola mundo"]
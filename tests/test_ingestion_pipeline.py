@@ -0,0 +1,123 @@
+import pytest
+
+pytest.importorskip("pymongo")
+
+from services.ingestion import pipeline as pipeline_module
+from services.ingestion.chunker import TextChunker
+from services.ingestion.pipeline import IngestionPipeline
+
+
+class FakeDocuments:
+    """In-memory stand-in for the Document model methods used by the pipeline, keyed by faiss_id."""
+
+    def __init__(self):
+        self.chunks = {}
+
+    def ensure_indexes(self, db_client):
+        pass
+
+    def get_ingestion_manifest(self, db_client):
+        manifest = {}
+        for faiss_id, document in self.chunks.items():
+            manifest.setdefault(document["metadata"]["original_file"], {})[faiss_id] = dict(document["metadata"])
+        return manifest
+
+    def iter_chunk_texts(self, db_client, batch_size):
+        return iter(())
+
+    def create_documents(self, db_client, documents):
+        for document in documents:
+            self.chunks[document["metadata"]["faiss_id"]] = document
+
+    def update_chunk_metadata(self, db_client, faiss_ids, fields):
+        for faiss_id in faiss_ids:
+            if faiss_id in self.chunks:
+                self.chunks[faiss_id]["metadata"].update(fields)
+
+    def delete_documents_by_faiss_ids(self, db_client, faiss_ids):
+        for faiss_id in faiss_ids:
+            self.chunks.pop(faiss_id, None)
+
+
+class FakeFaiss:
+    def __init__(self):
+        self.vectors = {}
+        self.fail = False
+
+    def get_all_ids(self):
+        return list(self.vectors)
+
+    def get_status(self):
+        return {"lexical": None}
+
+    def add_vectors_batch(self, items, batch_size):
+        if self.fail:
+            return [{"error": "faiss down"}]
+        for item in items:
+            self.vectors[item["id"]] = item["text"]
+        return [{"count": len(items)}]
+
+    def delete_vectors(self, faiss_ids):
+        for faiss_id in faiss_ids:
+            self.vectors.pop(faiss_id, None)
+
+
+class FakeEmbedder:
+    def encode(self, texts, batch_size):
+        return [[float(len(text))] for text in texts]
+
+
+@pytest.fixture
+def documents(monkeypatch):
+    fake = FakeDocuments()
+    monkeypatch.setattr(pipeline_module, "Document", fake)
+    return fake
+
+
+def paragraphs(count: int, start: int = 0) -> str:
+    return "\n\n".join(f"Párrafo {number} sobre el tipo de cambio del dólar." for number in range(start, start + count))
+
+
+def run(data_dir, faiss, embed_batch_size=4):
+    pipeline = IngestionPipeline(faiss, FakeEmbedder(), mongo_client=None, chunker=TextChunker(60, 0),
+                                 read_workers=2, embed_batch_size=embed_batch_size, write_batch_size=3)
+    return pipeline.run(str(data_dir))
+
+
+def test_edited_file_updates_metadata_and_deletes_stale_chunks(tmp_path, documents):
+    faiss = FakeFaiss()
+    (tmp_path / "a.txt").write_text(paragraphs(8), encoding="utf-8")
+    (tmp_path / "b.txt").write_text(paragraphs(3), encoding="utf-8")
+    assert run(tmp_path, faiss)["chunks"] == 11
+
+    # Se cambia el último párrafo y se quitan tres: 4 chunks iguales, 1 nuevo y 3 que sobran
+    (tmp_path / "a.txt").write_text(paragraphs(4) + "\n\n" + paragraphs(1, start=50), encoding="utf-8")
+    report = run(tmp_path, faiss)
+
+    assert report["chunks"] == 1 and report["chunks_deleted"] == 3 and not report["errors"]
+    a_chunks = {faiss_id: document["metadata"] for faiss_id, document in documents.chunks.items()
+                if faiss_id.startswith("a.txt")}
+    assert sorted(a_chunks) == [f"a.txt_{number}" for number in range(1, 6)]
+    assert set(faiss.vectors) == set(documents.chunks)
+    assert len({metadata["file_hash"] for metadata in a_chunks.values()}) == 1
+    assert all(metadata["total_chunks"] == 5 for metadata in a_chunks.values())
+    assert run(tmp_path, faiss)["files_skipped"] == 2
+
+
+def test_failed_write_leaves_previous_version_in_place(tmp_path, documents):
+    faiss = FakeFaiss()
+    (tmp_path / "a.txt").write_text(paragraphs(8), encoding="utf-8")
+    run(tmp_path, faiss)
+    before = {faiss_id: dict(document["metadata"]) for faiss_id, document in documents.chunks.items()}
+
+    (tmp_path / "a.txt").write_text(paragraphs(4) + "\n\n" + paragraphs(1, start=50), encoding="utf-8")
+    faiss.fail = True
+    report = run(tmp_path, faiss)
+    assert report["errors"] and report["chunks_deleted"] == 0
+    assert {faiss_id: document["metadata"] for faiss_id, document in documents.chunks.items()} == before
+
+    # La siguiente ingesta ve el archivo como cambiado y termina el trabajo
+    faiss.fail = False
+    report = run(tmp_path, faiss)
+    assert not report["errors"] and report["chunks_deleted"] == 3
+    assert sorted(documents.chunks) == [f"a.txt_{number}" for number in range(1, 6)]
@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+import pytest
+
+pytest.importorskip("bson")
+
+from clients.mongodb import interaction_logger as interaction_logger_module
+from clients.mongodb.interaction_logger import InteractionLogger
+
+
+class FakeMongo:
+    def __init__(self, fail_after: int = None):
+        self.documents = []
+        self.calls = 0
+        self.fail_after = fail_after
+
+    async def insert_documents(self, collection_name, documents):
+        self.calls += 1
+        if self.fail_after is not None and self.calls > self.fail_after:
+            raise ConnectionError("mongo down")
+        self.documents.extend(documents)
+        return len(documents)
+
+
+def test_replay_disk_errors_keep_the_worker_running(tmp_path, monkeypatch):
+    spill = str(tmp_path / "spill.jsonl")
+    interaction_logger_module._append_lines(spill, [{"_id": number} for number in range(10)])
+
+    def disk_full(*args):
+        raise OSError(28, "No space left on device")
+
+    async def scenario():
+        # El flush funciona y el replay falla a mitad, sin disco para devolver el resto al spill
+        mongo = FakeMongo(fail_after=1)
+        logger = InteractionLogger(mongo, max_batch_size=5, flush_interval_ms=10, spill_path=spill)
+        await logger.start()
+        with monkeypatch.context() as patch:
+            patch.setattr(interaction_logger_module, "_append_lines", disk_full)
+            logger.log({"_id": "a"})
+            await asyncio.sleep(0.1)
+        assert not logger._worker.done()
+        assert os.path.exists(f"{spill}.replay") and logger.stats()["spill_pending"]
+
+        mongo.fail_after = None
+        logger.log({"_id": "b"})
+        await asyncio.sleep(0.1)
+        await logger.stop()
+        return mongo
+
+    mongo = asyncio.run(scenario())
+    assert {document["_id"] for document in mongo.documents} == set(range(10)) | {"a", "b"}
+    assert not os.path.exists(spill) and not os.path.exists(f"{spill}.replay")
+
+
+def test_stop_with_full_queue_respects_timeout():
+    class StuckMongo(FakeMongo):
+        async def insert_documents(self, collection_name, documents):
+            await asyncio.sleep(60)
+
+    async def scenario():
+        logger = InteractionLogger(StuckMongo(), max_batch_size=1, flush_interval_ms=0, max_queue_size=2,
+                                   spill_path=None)
+        await logger.start()
+        for number in range(5):
+            logger.log({"_id": number})
+        await asyncio.sleep(0.01)
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        await logger.stop(timeout=0.3)
+        return loop.time() - start
+
+    assert asyncio.run(scenario()) < 1
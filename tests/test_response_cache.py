@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from services.rag import response_cache as response_cache_module
+from services.rag.response_cache import ResponseCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(response_cache_module.time, "monotonic", clock)
+    return clock
+
+
+def unit(values):
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def test_exact_hit_ignores_case_and_spacing(clock):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.put("DEV", False, "¿Qué es el  PX-1?", "respuesta")
+    assert cache.get("DEV", False, "¿qué es el PX-1?") == ("respuesta", "exact")
+    assert cache.get("HR", False, "¿qué es el PX-1?") is None
+
+
+def test_semantic_hit_needs_same_role_and_threshold(clock):
+    cache = ResponseCache(ttl_seconds=60, similarity_threshold=0.95)
+    cache.put("DEV", False, "pregunta original", "respuesta", unit([1, 0, 0]))
+    assert cache.get("DEV", False, "otra forma de preguntarlo", unit([1, 0.1, 0])) == ("respuesta", "semantic")
+    assert cache.get("DEV", False, "otra pregunta", unit([1, 1, 0])) is None
+    assert cache.get("ADMIN", False, "otra forma de preguntarlo", unit([1, 0.1, 0])) is None
+
+
+def test_entries_expire(clock):
+    cache = ResponseCache(ttl_seconds=60)
+    cache.put("", False, "hola", "respuesta")
+    clock.now += 61
+    assert cache.get("", False, "hola") is None
+    assert cache.stats()["expirations"] == 1
+
+
+def test_mcp_answers_not_cached_by_default(clock):
+    cache = ResponseCache(ttl_seconds=3600, mcp_ttl_seconds=0)
+    cache.put("", True, "¿precio del dólar?", "1 USD = 0.92 EUR")
+    assert cache.get("", True, "¿precio del dólar?") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_mcp_answers_use_their_own_ttl(clock):
+    cache = ResponseCache(ttl_seconds=3600, mcp_ttl_seconds=300)
+    cache.put("", True, "¿precio del dólar?", "1 USD = 0.92 EUR")
+    cache.put("", False, "¿precio del dólar?", "sin tools")
+    clock.now += 301
+    assert cache.get("", True, "¿precio del dólar?") is None
+    assert cache.get("", False, "¿precio del dólar?") == ("sin tools", "exact")
+
+
+def test_least_recently_used_is_evicted(clock):
+    cache = ResponseCache(max_entries=2, ttl_seconds=60)
+    cache.put("", False, "a", "1")
+    cache.put("", False, "b", "2")
+    cache.get("", False, "a")
+    cache.put("", False, "c", "3")
+    assert cache.get("", False, "b") is None
+    assert cache.get("", False, "a") == ("1", "exact")
+    assert cache.stats()["evictions"] == 1
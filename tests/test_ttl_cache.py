@@ -0,0 +1,114 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from src.utils import ttl_cache
+from src.utils.ttl_cache import AsyncTTLCache, TTLCache
+
+
+def test_concurrent_misses_load_once():
+    cache = TTLCache(ttl_seconds=60)
+    calls = []
+    started = threading.Barrier(20)
+
+    def loader():
+        calls.append(1)
+        time.sleep(0.05)
+        return "rates"
+
+    results = []
+
+    def worker():
+        started.wait()
+        results.append(cache.get_or_load("get_usd_price", loader))
+
+    threads = [threading.Thread(target=worker) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == ["rates"] * 20
+    assert len(calls) == 1
+    assert cache.get_or_load("get_usd_price", loader) == "rates"
+    assert cache.stats()["hits"] == 1
+
+
+def test_errors_are_not_cached():
+    cache = TTLCache(ttl_seconds=60)
+
+    def failing():
+        raise RuntimeError("upstream down")
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load("key", failing)
+    assert cache.get_or_load("key", lambda: "ok") == "ok"
+    assert cache.stats()["errors"] == 1
+
+
+def test_values_expire(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(ttl_seconds=10)
+    assert cache.get_or_load("key", lambda: 1) == 1
+    now[0] += 5
+    assert cache.get_or_load("key", lambda: 2) == 1
+    now[0] += 6
+    assert cache.get_or_load("key", lambda: 3) == 3
+
+
+def test_max_entries_drops_oldest():
+    cache = TTLCache(ttl_seconds=60, max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.get_or_load(key, lambda: key)
+    assert cache.stats()["entries"] == 2
+    assert cache.get_or_load("a", lambda: "reloaded") == "reloaded"
+
+
+def test_async_burst_loads_once_and_shares_errors():
+    async def scenario():
+        cache = AsyncTTLCache(ttl_seconds=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "rates"
+
+        results = await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(100)))
+        assert results == ["rates"] * 100 and calls == 1
+
+        async def failing():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        errors = await asyncio.gather(*(cache.get_or_load("other", failing) for _ in range(10)),
+                                      return_exceptions=True)
+        assert all(isinstance(error, RuntimeError) for error in errors)
+        assert cache.stats()["loads"] == 2 and cache.stats()["errors"] == 1
+        assert await cache.get_or_load("other", loader) == "rates"
+
+    asyncio.run(scenario())
+
+
+def test_async_cancelled_caller_does_not_cancel_the_load():
+    async def scenario():
+        cache = AsyncTTLCache(ttl_seconds=60)
+        calls = 0
+
+        async def loader():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return "rates"
+
+        first = asyncio.ensure_future(cache.get_or_load("key", loader))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        assert await cache.get_or_load("key", loader) == "rates"
+        assert calls == 1
+
+    asyncio.run(scenario())
@@ -0,0 +1,157 @@
+import os
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from vector_store import VectorStore
+
+DIMENSION = 32
+
+
+def make_vectors(count: int, seed: int = 0) -> np.ndarray:
+    vectors = np.random.default_rng(seed).standard_normal((count, DIMENSION)).astype(np.float32)
+    faiss.normalize_L2(vectors)
+    return vectors
+
+
+def fill(store: VectorStore, count: int, role_id: int = 1, prefix: str = "doc") -> np.ndarray:
+    vectors = make_vectors(count)
+    store.add([f"{prefix}_{i}" for i in range(count)], vectors, [{"role_id": role_id} for _ in range(count)],
+              [f"texto del documento {i}" for i in range(count)])
+    return vectors
+
+
+def assert_consistent(store: VectorStore) -> None:
+    labels = set()
+    for role_id in store.role_indexes:
+        labels.update(store._role_vectors(role_id)[1].tolist())
+    assert labels == set(store.id_to_label.values())
+    assert store.ntotal == len(store.all_ids())
+
+
+@pytest.mark.parametrize("index_factory", ["IVF16,Flat", "IVF16,PQ8x4"])
+def test_save_load_add_with_ivf(tmp_path, index_factory):
+    store = VectorStore(DIMENSION, index_factory=index_factory, train_min_vectors=500)
+    fill(store, 600)
+    store.save(str(tmp_path))
+
+    restored = VectorStore(DIMENSION, index_factory=index_factory, train_min_vectors=500)
+    assert restored.load(str(tmp_path), mmap=True)
+    extra = make_vectors(3, seed=1)
+    restored.add(["new_0", "new_1", "new_2"], extra, [{"role_id": 1}] * 3)
+
+    assert_consistent(restored)
+    assert restored.ntotal == 603
+    results = restored.search(extra[:1], 1, 1, nprobe=16)[0]
+    assert results[0]["id"] == "new_0"
+
+
+@pytest.mark.parametrize("index_factory", ["IVF16,PQ8x4", "HNSW16"])
+def test_ann_replaces_flat_copy(index_factory):
+    store = VectorStore(DIMENSION, index_factory=index_factory, train_min_vectors=500)
+    vectors = fill(store, 600)
+
+    index_type = store.index_types()["1"]["index_type"]
+    assert index_type != "IndexFlat"
+    if "PQ" in index_factory:
+        assert store.memory_usage()["vector_bytes"] < 600 * DIMENSION * 4
+    assert store.search(vectors[10:11], 1, 1, nprobe=16, ef_search=64)[0][0]["id"] == "doc_10"
+
+
+def test_delete_and_upsert_on_ann(tmp_path):
+    for index_factory in ("IVF16,Flat", "HNSW16"):
+        store = VectorStore(DIMENSION, index_factory=index_factory, train_min_vectors=500)
+        vectors = fill(store, 600)
+        assert store.delete(["doc_0", "doc_1", "missing"]) == 2
+        assert store.add(["doc_2"], vectors[3:4], [{"role_id": 1}]) == 1
+        assert_consistent(store)
+        assert store.ntotal == 598
+        found = store.search(vectors[3:4], 2, 1, nprobe=16, ef_search=64)[0]
+        assert {result["id"] for result in found} == {"doc_2", "doc_3"}
+
+
+class FailingIndex:
+    """Stands in for a role index whose add fails (e.g. a read-only index)."""
+
+    ntotal = 0
+
+    def add_with_ids(self, vectors, labels):
+        raise RuntimeError("read-only index")
+
+
+def test_add_is_all_or_nothing():
+    store = VectorStore(DIMENSION)
+    fill(store, 10)
+    store.role_indexes[2] = FailingIndex()
+
+    with pytest.raises(RuntimeError):
+        store.add(["a", "b"], make_vectors(2, seed=2), [{"role_id": 1}, {"role_id": 2}])
+
+    assert store.role_indexes[1].ntotal == 10
+    assert len(store.ids) == 10 and "a" not in store.id_to_label
+    del store.role_indexes[2]
+    store.add(["a"], make_vectors(1, seed=3), [{"role_id": 1}])
+    assert_consistent(store)
+    assert store.search(make_vectors(1, seed=3), 1, 1)[0][0]["id"] == "a"
+
+
+def test_upsert_failure_keeps_old_version():
+    store = VectorStore(DIMENSION)
+    vectors = fill(store, 10)
+    store.role_indexes[2] = FailingIndex()
+
+    with pytest.raises(RuntimeError):
+        store.add(["doc_0"], vectors[:1], [{"role_id": 2}])
+
+    del store.role_indexes[2]
+    assert store.search(vectors[:1], 1, 1)[0][0]["id"] == "doc_0"
+    assert_consistent(store)
+
+
+def test_rebuild_switches_type_without_losing_vectors():
+    store = VectorStore(DIMENSION, index_factory="IVF16,Flat", train_min_vectors=500)
+    vectors = fill(store, 600)
+    store.rebuild("Flat")
+    assert store.index_types()["1"]["index_type"].startswith("IndexFlat")
+    assert store.search(vectors[5:6], 1, 1)[0][0]["id"] == "doc_5"
+    assert_consistent(store)
+
+
+def test_flat_restore_is_memory_mapped_until_written(tmp_path):
+    store = VectorStore(DIMENSION)
+    vectors = fill(store, 200)
+    fill(store, 50, role_id=2, prefix="other")
+    store.save(str(tmp_path))
+
+    restored = VectorStore(DIMENSION)
+    assert restored.load(str(tmp_path), mmap=True)
+    assert all(restored._is_mapped(index) for index in restored.role_indexes.values())
+    if os.path.exists("/proc/self/maps"):
+        with open("/proc/self/maps", encoding="utf-8") as f:
+            assert restored.snapshot["path"] in f.read()
+    assert restored.search(vectors[7:8], 1, 1)[0][0]["id"] == "doc_7"
+
+    # El primer add o delete copia solo ese rol a memoria
+    restored.add(["new"], make_vectors(1, seed=4), [{"role_id": 1}])
+    assert restored.delete(["doc_0"]) == 1
+    assert not restored._is_mapped(restored.role_indexes[1])
+    assert restored._is_mapped(restored.role_indexes[2])
+    assert_consistent(restored)
+    assert restored.ntotal == 250
+
+    # Un snapshot nuevo borra el directorio mapeado sin romper el rol que sigue mapeado
+    restored.save(str(tmp_path))
+    assert restored.search(make_vectors(50)[:1], 1, 2)[0][0]["id"] == "other_0"
+    assert restored.delete(["other_1"]) == 1
+    assert_consistent(restored)
+
+
+def test_load_without_mmap_reads_into_memory(tmp_path):
+    store = VectorStore(DIMENSION)
+    fill(store, 20)
+    store.save(str(tmp_path))
+    restored = VectorStore(DIMENSION)
+    assert restored.load(str(tmp_path), mmap=False)
+    assert not restored._is_mapped(restored.role_indexes[1])